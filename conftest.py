@@ -0,0 +1 @@
+# Lets the tests under tests/ import the toolkit's modules package from the repository root
@@ -1,68 +1,124 @@
-from modules import (
-    ec2_checker,
-    s3_checker,
-    lambda_checker,
-    rds_checker,
-    dynamodb_checker,
-    ebs_checker,
-    cloudtrail_checker,
-    cloudwatch_checker,
-    api_gateway_checker,
-    vpc_checker,
-    iam_checker,
-    ecs_checker,
-    eks_checker
-)
+import argparse
+import time
+
+STARTED = time.perf_counter()
+
+from dotenv import load_dotenv
+
+from modules import checkpoint, registry
+from modules.registry import LazyCheck
+
+# Checker modules are imported when first run, not at startup
+CHECKERS = [
+    ("EC2", LazyCheck("ec2_checker")),
+    ("S3", LazyCheck("s3_checker")),
+    ("Lambda", LazyCheck("lambda_checker")),
+    ("RDS", LazyCheck("rds_checker")),
+    ("DynamoDB", LazyCheck("dynamodb_checker")),
+    ("EBS", LazyCheck("ebs_checker")),
+    ("CloudTrail", LazyCheck("cloudtrail_checker")),
+    ("CloudWatch", LazyCheck("cloudwatch_checker")),
+    ("API Gateway", LazyCheck("api_gateway_checker")),
+    ("VPC", LazyCheck("vpc_checker")),
+    ("IAM", LazyCheck("iam_checker")),
+    ("ECS", LazyCheck("ecs_checker")),
+    ("EKS", LazyCheck("eks_checker")),
+    ("Utilization (CloudWatch metrics)", LazyCheck("metrics_checker")),
+    ("Tag compliance", LazyCheck("tag_checker")),
+    # Reads what the checkers above recorded, so it runs last
+    ("Cross-service findings (inventory)", LazyCheck("inventory_checker")),
+]
+
+def run_all(resume=False, checkpoint_path=checkpoint.DEFAULT_PATH):
+    from modules import prefetch
+
+    # Progress is journaled so an interrupted run can continue with --resume
+    journal = checkpoint.Checkpoint(checkpoint_path, resume=resume)
+    # Datasets declared by the checkers still to run are fetched once, in parallel, up front
+    datasets = [d for name, check in CHECKERS if not journal.is_complete(name) for d in prefetch.declared(check)]
+    try:
+        with prefetch.shared(datasets):
+            for name, check in CHECKERS:
+                journal.run(name, check)
+    finally:
+        journal.close()
+
+def run_query(sql):
+    # Ad-hoc SQL against the local inventory, e.g. --query "SELECT * FROM resources WHERE vpc_id = 'vpc-1'"
+    from modules import inventory
+
+    try:
+        rows = inventory.store().query(sql)
+    except Exception as e:
+        print(f"[ERROR] Inventory query failed: {e}")
+        return
+    for row in rows:
+        print(" | ".join("" if value is None else str(value) for value in row.values()))
+    print(f"({len(rows)} row(s))")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cloud Support Toolkit - AWS Diagnostics")
+    parser.add_argument("--all", action="store_true", help="run all checkers without the menu")
+    parser.add_argument("--resume", action="store_true", help="skip work completed by an interrupted 'Run ALL'")
+    parser.add_argument("--checkpoint", default=checkpoint.DEFAULT_PATH, help="checkpoint journal path")
+    parser.add_argument("--daemon", action="store_true", help="re-run checkers on a schedule and serve results over HTTP")
+    parser.add_argument("--port", type=int, help="daemon HTTP port (default: DAEMON_PORT or 8787)")
+    parser.add_argument("--query", metavar="SQL", help="run a SQL query against the local resource inventory")
+    parser.add_argument("--startup-report", action="store_true", help="import every checker and report each module's import cost")
+    return parser.parse_args()
+
+def startup_report(startup):
+    # Loads every checker (and boto3, which they import on first use) to show where import time goes
+    for _, check in CHECKERS:
+        check.module()
+    registry.load("boto3")
+    registry.print_import_report(startup)
 
 def main():
+    # .env is read once here; checker modules only read os.environ
+    load_dotenv()
+    args = parse_args()
+    startup = time.perf_counter() - STARTED
+    if args.startup_report:
+        startup_report(startup)
+        return
+    if args.query:
+        run_query(args.query)
+        return
+    if args.daemon:
+        from modules import daemon
+        daemon.serve(CHECKERS, port=args.port)
+        return
+    if args.all:
+        run_all(args.resume, args.checkpoint)
+        return
+
+    resume = args.resume
+    run_all_choice = str(len(CHECKERS) + 1)
+    options = {str(number): check for number, (_, check) in enumerate(CHECKERS, start=1)}
+
     while True:
         print("\nCloud Support Toolkit - AWS Diagnostics")
         print("========================================")
         print("Select a service to run diagnostics:")
-        print(" 1. EC2")
-        print(" 2. S3")
-        print(" 3. Lambda")
-        print(" 4. RDS")
-        print(" 5. DynamoDB")
-        print(" 6. EBS")
-        print(" 7. CloudTrail")
-        print(" 8. CloudWatch")
-        print(" 9. API Gateway")
-        print("10. VPC")
-        print("11. IAM")
-        print("12. ECS")
-        print("13. EKS")
-        print("14. Run ALL")
+        for number, (name, _) in enumerate(CHECKERS, start=1):
+            print(f"{number:2}. {name}")
+        print(f"{run_all_choice}. Run ALL")
         print(" 0. Exit")
 
-        choice = input("\nEnter your choice (0-14): ").strip()
-
-        options = {
-            "1": ec2_checker.run_check,
-            "2": s3_checker.run_check,
-            "3": lambda_checker.run_check,
-            "4": rds_checker.run_check,
-            "5": dynamodb_checker.run_check,
-            "6": ebs_checker.run_check,
-            "7": cloudtrail_checker.run_check,
-            "8": cloudwatch_checker.run_check,
-            "9": api_gateway_checker.run_check,
-            "10": vpc_checker.run_check,
-            "11": iam_checker.run_check,
-            "12": ecs_checker.run_check,
-            "13": eks_checker.run_check
-        }
+        choice = input(f"\nEnter your choice (0-{run_all_choice}): ").strip()
 
         if choice == "0":
             print("Exiting... Goodbye!")
             break
-        elif choice == "14":
-            for check in options.values():
-                check()
+        elif choice == run_all_choice:
+            run_all(resume, args.checkpoint)
+            # Only the first run of the session resumes; later runs start fresh
+            resume = False
         elif choice in options:
             options[choice]()
         else:
-            print("[ERROR] Invalid choice. Please select a number between 0 and 14.")
+            print(f"[ERROR] Invalid choice. Please select a number between 0 and {run_all_choice}.")
 
 if __name__ == "__main__":
     main()
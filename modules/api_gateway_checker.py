@@ -1,21 +1,11 @@
-import boto3
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from modules import aws_session
 
 def run_check():
     print("\n[INFO] Starting API Gateway diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        client = session.client("apigateway")
-        waf_client = session.client("waf-regional")
+        client = aws_session.client("apigateway")
+        waf_client = aws_session.client("waf-regional")
 
         apis = client.get_rest_apis(limit=500)["items"]
         if not apis:
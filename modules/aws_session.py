@@ -0,0 +1,62 @@
+# modules/aws_session.py
+import os
+import threading
+
+# One session and one client per service are shared by every checker, so
+# repeated runs (menu, Run ALL, daemon) reuse warm connection pools. boto3 is
+# imported when the first session is created, which keeps it off the startup path.
+_lock = threading.Lock()
+_session = None
+_clients = {}
+_account_id = None
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            import boto3
+            _session = boto3.Session(
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+                region_name=os.getenv("AWS_REGION")
+            )
+        return _session
+
+
+def client(service_name, max_pool_connections=None, region_name=None):
+    # region_name reaches resources outside the configured region (e.g. ECR images)
+    key = (service_name, max_pool_connections, region_name)
+    cached = _clients.get(key)
+    if cached is not None:
+        return cached
+
+    session = get_session()
+    # Sessions are not thread-safe, so client creation is serialized
+    with _lock:
+        if key not in _clients:
+            from botocore.config import Config
+            config = Config(max_pool_connections=max_pool_connections) if max_pool_connections else None
+            _clients[key] = session.client(service_name, config=config, region_name=region_name)
+        return _clients[key]
+
+
+def reset():
+    # Drops cached clients, e.g. in a forked worker process or after credentials change
+    global _session, _account_id
+    with _lock:
+        _session = None
+        _account_id = None
+        _clients.clear()
+
+
+def region():
+    return get_session().region_name
+
+
+def account_id():
+    # Resolved once per process for building ARNs of resources that lack one
+    global _account_id
+    if _account_id is None:
+        _account_id = client("sts").get_caller_identity()["Account"]
+    return _account_id
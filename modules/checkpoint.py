@@ -0,0 +1,226 @@
+# modules/checkpoint.py
+import io
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+
+DEFAULT_PATH = ".toolkit_checkpoint.jsonl"
+
+# Items per resumable batch when paging through large listings
+BATCH_ITEMS = 100
+
+# A checker that printed this did not finish and must run again on resume
+FAILURE_MARKER = "[ERROR] Failed to run"
+
+_active = None
+
+
+class _Tee(io.TextIOBase):
+    # Passes output through to the console while keeping a copy for the journal
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        self.stream.write(text)
+        return self.buffer.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def mark(self):
+        return self.buffer.tell()
+
+    def since(self, mark):
+        self.buffer.seek(mark)
+        return self.buffer.read()
+
+
+class Checkpoint:
+    # Append-only JSON-lines journal. Each completed batch or checker is one
+    # line; only checker completion is fsync'd, so batch writes stay cheap.
+    # Resume is at-least-once per batch: a batch interrupted before its line
+    # was written runs again, repeating its API calls and inventory writes.
+    def __init__(self, path=DEFAULT_PATH, resume=False, region=None):
+        self.path = path
+        self.region = region or os.getenv("AWS_REGION")
+        self.completed = {}
+        self.batches = {}
+        self._checker = None
+        self._tee = None
+        self._replayed = False
+        self._notes = {}
+
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted write is ignored
+                    continue
+                key = (entry["checker"], entry["region"], entry.get("scope", ""))
+                if entry["type"] == "checker":
+                    self.completed[key[:2]] = entry["output"]
+                elif entry["type"] == "batch":
+                    state = self.batches.setdefault(key, {"outputs": [], "token": None, "items": set(), "notes": []})
+                    state["outputs"].append(entry["output"])
+                    state["notes"].extend(entry.get("notes", []))
+                    state["token"] = entry.get("token")
+                    if entry.get("item") is not None:
+                        state["items"].add(entry["item"])
+                    state["items"].update(entry.get("items", []))
+                    state["done"] = entry.get("done", False)
+
+    def _write(self, entry, sync=False):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def is_complete(self, name):
+        return (name, self.region) in self.completed
+
+    def run(self, name, check):
+        global _active
+        key = (name, self.region)
+        if key in self.completed:
+            print(f"\n[INFO] {name} already completed in a previous run (region {self.region}); replaying saved findings.")
+            sys.stdout.write(self.completed[key])
+            return
+
+        self._checker = name
+        self._replayed = False
+        self._notes = {}
+        self._tee = _Tee(sys.stdout)
+        _active = self
+        try:
+            with redirect_stdout(self._tee):
+                check()
+        finally:
+            _active = None
+            self._checker = None
+
+        output = self._tee.since(0)
+        if FAILURE_MARKER not in output:
+            self._write({"type": "checker", "checker": name, "region": self.region, "output": output}, sync=True)
+
+    def _state(self, scope):
+        return self.batches.get((self._checker, self.region, scope))
+
+    def _record_batch(self, scope, output, **extra):
+        entry = {"type": "batch", "checker": self._checker, "region": self.region, "scope": scope, "output": output}
+        entry.update(extra)
+        notes = self._notes.pop(scope, None)
+        if notes:
+            entry["notes"] = notes
+        self._write(entry)
+
+    def _replay(self, state):
+        self._replayed = True
+        print(f"  [INFO] Resuming from checkpoint: {len(state['outputs'])} completed batch(es) replayed.")
+        for output in state["outputs"]:
+            sys.stdout.write(output)
+
+    def paginate(self, paginator, scope, **kwargs):
+        state = self._state(scope)
+        token = None
+        if state:
+            self._replay(state)
+            if state.get("done"):
+                return
+            token = state["token"]
+
+        # MaxItems-bounded chunks give a documented resume token after each batch
+        base_config = kwargs.pop("PaginationConfig", {})
+        while True:
+            config = dict(base_config, MaxItems=BATCH_ITEMS)
+            if token:
+                config["StartingToken"] = token
+            iterator = paginator.paginate(PaginationConfig=config, **kwargs)
+
+            mark = self._tee.mark()
+            for page in iterator:
+                yield page
+            token = iterator.resume_token
+            self._record_batch(scope, self._tee.since(mark), token=token, done=token is None)
+            if token is None:
+                return
+
+    def each(self, items, scope, key):
+        state = self._state(scope)
+        done = set()
+        if state:
+            self._replay(state)
+            done = state["items"]
+        for item in items:
+            item_key = key(item)
+            if item_key in done:
+                continue
+            mark = self._tee.mark()
+            yield item
+            self._record_batch(scope, self._tee.since(mark), item=item_key)
+
+    def each_batch(self, items, scope, key):
+        # Every item's key is journaled, so batches are re-formed from whatever
+        # is left on resume even if the listing changed in between
+        state = self._state(scope)
+        done = set()
+        if state:
+            self._replay(state)
+            done = state["items"]
+        pending = [item for item in items if key(item) not in done]
+        for start in range(0, len(pending), BATCH_ITEMS):
+            batch = pending[start:start + BATCH_ITEMS]
+            mark = self._tee.mark()
+            yield batch
+            self._record_batch(scope, self._tee.since(mark), items=[key(item) for item in batch])
+
+
+def paginate(paginator, scope="default", **kwargs):
+    # Checkers call this in place of paginator.paginate(); without an active
+    # checkpoint it is a plain pass-through.
+    if _active is None:
+        return paginator.paginate(**kwargs)
+    return _active.paginate(paginator, scope, **kwargs)
+
+
+def each(items, scope="default", key=lambda item: item):
+    if _active is None:
+        return iter(items)
+    return _active.each(items, scope, key)
+
+
+def each_batch(items, scope="default", key=lambda item: item):
+    # Lists of up to BATCH_ITEMS items, each list one resumable step
+    if _active is None:
+        items = list(items)
+        return iter([items[i:i + BATCH_ITEMS] for i in range(0, len(items), BATCH_ITEMS)])
+    return _active.each_batch(items, scope, key)
+
+
+def note(scope, value):
+    # Saves a JSON value with the batch in progress, so a resumed run can rebuild
+    # aggregates over replayed batches without calling AWS for them again
+    if _active is not None:
+        _active._notes.setdefault(scope, []).append(value)
+
+
+def notes(scope):
+    # Values noted by the batches replayed from the journal
+    if _active is None:
+        return []
+    state = _active._state(scope)
+    return list(state["notes"]) if state else []
+
+
+def resumed():
+    return _active is not None and _active._replayed
@@ -1,20 +1,35 @@
-import boto3
 import os
-from dotenv import load_dotenv
+from modules import aws_session, cloudtrail_log_analyzer, rule_engine
+from modules.kms_posture import KeyPostureIndex
 
-load_dotenv()
+def analyze_logs(trails, log_source):
+    days = int(os.getenv("CLOUDTRAIL_LOG_DAYS", "1"))
+    workers = int(os.getenv("CLOUDTRAIL_LOG_WORKERS", "0")) or None
+
+    try:
+        if log_source.lower() != "s3":
+            print(f"\n  Log analysis (local directory: {log_source})")
+            cloudtrail_log_analyzer.print_report(cloudtrail_log_analyzer.analyze_local(log_source, workers))
+            return
+
+        s3 = aws_session.client("s3")
+        seen = set()
+        for trail in trails:
+            location = (trail.get("S3BucketName"), trail.get("S3KeyPrefix"))
+            if not location[0] or location in seen:
+                continue
+            seen.add(location)
+            print(f"\n  Log analysis (s3://{location[0]}, last {days} day(s))")
+            aggregates = cloudtrail_log_analyzer.analyze_s3(s3, location[0], location[1], days, workers)
+            cloudtrail_log_analyzer.print_report(aggregates)
+    except Exception as e:
+        print(f"  Could not analyze CloudTrail log files: {e}")
 
 def run_check():
     print("\n[INFO] Starting CloudTrail diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        ct = session.client("cloudtrail")
+        ct = aws_session.client("cloudtrail")
         trails = ct.describe_trails(includeShadowTrails=False).get("trailList", [])
 
         if not trails:
@@ -23,6 +38,12 @@ def run_check():
 
         print(f"  Found {len(trails)} trail(s).")
 
+        # Each distinct trail key is inspected once, concurrently
+        keys = KeyPostureIndex()
+        for trail in trails:
+            keys.add(trail.get("KmsKeyId"))
+        keys.resolve()
+
         for trail in trails:
             name = trail.get("Name")
             home_region = trail.get("HomeRegion")
@@ -39,6 +60,7 @@ def run_check():
             print(f"   Logging to S3: {s3_bucket}")
             print(f"   CloudWatch Logs Integration: {'ENABLED' if cloudwatch_logs_log_group else 'NOT enabled'}")
             print(f"   KMS Encryption: {'Enabled' if kms_key else 'Not Enabled'}")
+            rule_engine.print_findings(keys.findings(kms_key))
 
             # Check insight selectors
             try:
@@ -67,5 +89,10 @@ def run_check():
                 else:
                     print("     - No specific data resources tracked.")
 
+        # Optional: parse delivered log files (CLOUDTRAIL_LOG_SOURCE=s3 or a local directory)
+        log_source = os.getenv("CLOUDTRAIL_LOG_SOURCE")
+        if log_source:
+            analyze_logs(trails, log_source)
+
     except Exception as e:
         print(f"[ERROR] Failed to run CloudTrail diagnostics: {e}")
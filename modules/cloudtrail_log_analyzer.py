@@ -0,0 +1,239 @@
+# modules/cloudtrail_log_analyzer.py
+import gzip
+import io
+import json
+import multiprocessing
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from modules import aws_session
+
+COLUMNS = ("eventSource", "eventName", "caller", "errorCode", "sourceIPAddress", "awsRegion")
+DENIED_ERRORS = ("AccessDenied", "AccessDeniedException", "UnauthorizedOperation", "Client.UnauthorizedOperation")
+
+READ_CHUNK = 1 << 20
+TOP_N = 10
+
+_worker_s3 = None
+
+
+class ColumnBatch:
+    # Dictionary-encoded columns: each record is reduced to one small int per
+    # column, and distinct strings are stored once per file.
+    def __init__(self, source):
+        self.source = source
+        self.count = 0
+        self.values = [""]
+        self._codes = {"": 0}
+        self.columns = {name: array("I") for name in COLUMNS}
+
+    def _code(self, value):
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def add(self, record):
+        identity = record.get("userIdentity") or {}
+        caller = identity.get("arn") or identity.get("invokedBy") or identity.get("type")
+        row = {
+            "eventSource": record.get("eventSource"),
+            "eventName": record.get("eventName"),
+            "caller": caller,
+            "errorCode": record.get("errorCode"),
+            "sourceIPAddress": record.get("sourceIPAddress"),
+            "awsRegion": record.get("awsRegion"),
+        }
+        for name in COLUMNS:
+            self.columns[name].append(self._code(row[name]))
+        self.count += 1
+
+    def __getstate__(self):
+        # The reverse lookup is rebuilt on demand and not worth pickling
+        state = dict(self.__dict__)
+        state.pop("_codes", None)
+        return state
+
+
+def iter_records(stream, chunk_size=READ_CHUNK):
+    # Incrementally decode the {"Records": [...]} array one record at a time,
+    # holding at most one chunk plus one partial record in memory.
+    decoder = json.JSONDecoder()
+    buf = ""
+    while True:
+        start = buf.find("[")
+        if start >= 0:
+            pos = start + 1
+            break
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        buf += chunk
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+                yield record
+                continue
+            except json.JSONDecodeError:
+                pass
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            if pos < len(buf):
+                raise ValueError("truncated CloudTrail log file")
+            return
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def _parse_stream(raw, source):
+    batch = ColumnBatch(source)
+    compressed = source.endswith(".gz")
+    binary = gzip.GzipFile(fileobj=raw) if compressed else raw
+    text = io.TextIOWrapper(binary, encoding="utf-8")
+    for record in iter_records(text):
+        batch.add(record)
+    return batch
+
+
+def parse_local_file(path):
+    with open(path, "rb") as raw:
+        return _parse_stream(raw, path)
+
+
+def _init_s3_worker():
+    global _worker_s3
+    # Each worker builds its own session and client from the inherited environment
+    _worker_s3 = aws_session.client("s3")
+
+
+def parse_s3_object(location):
+    bucket, key = location
+    body = _worker_s3.get_object(Bucket=bucket, Key=key)["Body"]
+    try:
+        return _parse_stream(body, key)
+    finally:
+        body.close()
+
+
+def local_log_files(root):
+    for dirpath, _, filenames in os.walk(root):
+        if "CloudTrail-Digest" in dirpath:
+            continue
+        for filename in sorted(filenames):
+            if filename.endswith(".json.gz") or filename.endswith(".json"):
+                yield os.path.join(dirpath, filename)
+
+
+def _child_prefixes(s3, bucket, prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for common in page.get("CommonPrefixes", []):
+            yield common["Prefix"]
+
+
+def s3_log_objects(s3, bucket, key_prefix=None, days=1):
+    # Walk AWSLogs/[org-id/]account/CloudTrail/region/ and list only the
+    # day folders inside the requested window.
+    root = f"{key_prefix.rstrip('/')}/AWSLogs/" if key_prefix else "AWSLogs/"
+    today = datetime.now(timezone.utc).date()
+    day_paths = [(today - timedelta(days=n)).strftime("%Y/%m/%d/") for n in range(days)]
+
+    account_prefixes = []
+    for prefix in _child_prefixes(s3, bucket, root):
+        if prefix[len(root):].startswith("o-"):
+            account_prefixes.extend(_child_prefixes(s3, bucket, prefix))
+        else:
+            account_prefixes.append(prefix)
+
+    paginator = s3.get_paginator("list_objects_v2")
+    for account_prefix in account_prefixes:
+        for region_prefix in _child_prefixes(s3, bucket, account_prefix + "CloudTrail/"):
+            for day_path in day_paths:
+                for page in paginator.paginate(Bucket=bucket, Prefix=region_prefix + day_path):
+                    for obj in page.get("Contents", []):
+                        if obj["Key"].endswith(".json.gz"):
+                            yield bucket, obj["Key"]
+
+
+class TrailAggregates:
+    def __init__(self):
+        self.files = 0
+        self.records = 0
+        self.callers = Counter()
+        self.events = Counter()
+        self.errors = Counter()
+        self.source_ips = Counter()
+        self.denied_by_ip = Counter()
+
+    def _merge_column(self, target, batch, column, skip_empty=True):
+        for code, count in Counter(batch.columns[column]).items():
+            if skip_empty and code == 0:
+                continue
+            target[batch.values[code]] += count
+
+    def add(self, batch):
+        self.files += 1
+        self.records += batch.count
+        self._merge_column(self.callers, batch, "caller")
+        self._merge_column(self.errors, batch, "errorCode")
+        self._merge_column(self.source_ips, batch, "sourceIPAddress")
+
+        sources = batch.columns["eventSource"]
+        names = batch.columns["eventName"]
+        for (source, name), count in Counter(zip(sources, names)).items():
+            self.events[f"{batch.values[source]}:{batch.values[name]}"] += count
+
+        denied = {i for i, value in enumerate(batch.values) if value in DENIED_ERRORS}
+        if denied:
+            pairs = zip(batch.columns["sourceIPAddress"], batch.columns["errorCode"])
+            for ip, count in Counter(ip for ip, err in pairs if err in denied).items():
+                self.denied_by_ip[batch.values[ip]] += count
+
+
+def analyze(tasks, parser, workers=None, initializer=None):
+    aggregates = TrailAggregates()
+    # Workers are spawned, not forked: the daemon runs checkers next to its HTTP
+    # and scheduler threads, and a fork can copy a lock another thread holds.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer) as pool:
+        for batch in pool.map(parser, tasks, chunksize=4):
+            aggregates.add(batch)
+    return aggregates
+
+
+def analyze_local(root, workers=None):
+    return analyze(list(local_log_files(root)), parse_local_file, workers)
+
+
+def analyze_s3(s3, bucket, key_prefix=None, days=1, workers=None):
+    tasks = list(s3_log_objects(s3, bucket, key_prefix, days))
+    return analyze(tasks, parse_s3_object, workers, initializer=_init_s3_worker)
+
+
+def print_report(aggregates):
+    print(f"   Parsed {aggregates.records} record(s) from {aggregates.files} log file(s).")
+    sections = (
+        ("Top API callers", aggregates.callers),
+        ("Top API calls", aggregates.events),
+        ("Error codes", aggregates.errors),
+        ("Top source IPs", aggregates.source_ips),
+        ("Access denied by source IP", aggregates.denied_by_ip),
+    )
+    for title, counter in sections:
+        if not counter:
+            continue
+        print(f"   {title}:")
+        for value, count in counter.most_common(TOP_N):
+            print(f"     - {value}: {count}")
@@ -1,27 +1,24 @@
-import boto3
-import os
-from dotenv import load_dotenv
+from modules import aws_session, rule_engine
+from modules.kms_posture import KeyPostureIndex
 from datetime import datetime, timezone
 
-load_dotenv()
-
 def run_check():
     print("\n[INFO] Starting CloudWatch diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        logs = session.client("logs")
-        cw = session.client("cloudwatch")
+        logs = aws_session.client("logs")
+        cw = aws_session.client("cloudwatch")
         
         # --- Log Groups ---
         log_groups = logs.describe_log_groups(limit=50).get("logGroups", [])
         print(f"  Found {len(log_groups)} log group(s).")
 
+        # Log groups often share a key, so each distinct key is inspected once
+        keys = KeyPostureIndex()
+        for group in log_groups:
+            keys.add(group.get("kmsKeyId"))
+        keys.resolve()
+
         for group in log_groups:
             name = group["logGroupName"]
             retention = group.get("retentionInDays", "Never Expire")
@@ -29,6 +26,7 @@ def run_check():
             print(f"\n  Log Group: {name}")
             print(f"   Retention: {retention} days")
             print(f"   KMS Encryption: {'ENABLED' if kms else 'Not Enabled'}")
+            rule_engine.print_findings(keys.findings(kms))
 
             streams = logs.describe_log_streams(logGroupName=name, orderBy="LastEventTime", descending=True).get("logStreams", [])
             if streams:
@@ -0,0 +1,19 @@
+# modules/common.py
+# Small helpers shared by more than one checker
+
+# Private, shared, link-local, loopback and multicast space: addresses in these
+# networks are never reached from (or sent to) the internet
+NON_INTERNET_CIDRS = (
+    "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "100.64.0.0/10",
+    "169.254.0.0/16", "127.0.0.0/8", "224.0.0.0/4", "0.0.0.0/8",
+    "fc00::/7", "fe80::/10",
+)
+
+
+def fmt_bytes(size):
+    size = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
@@ -0,0 +1,229 @@
+# modules/config_inventory.py
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from modules import aws_session, inventory
+from modules.sg_exposure import ExposureIndex
+
+# AWS Config resource type -> prefetch dataset it can stand in for. Snapshots,
+# AMIs and flow logs are not served from Config and always use the service APIs.
+RESOURCE_TYPES = {
+    "AWS::EC2::Instance": "ec2.reservations",
+    "AWS::EC2::Volume": "ec2.volumes",
+    "AWS::EC2::SecurityGroup": "ec2.security_groups",
+    "AWS::EC2::NetworkInterface": "ec2.network_interfaces",
+    "AWS::EC2::Subnet": "ec2.subnets",
+    "AWS::EC2::RouteTable": "ec2.route_tables",
+    "AWS::EC2::VPC": "ec2.vpcs",
+    "AWS::EC2::InternetGateway": "ec2.internet_gateways",
+    "AWS::RDS::DBInstance": "rds.db_instances",
+    "AWS::Lambda::Function": "lambda.functions",
+}
+
+QUERY = (
+    "SELECT resourceId, resourceType, accountId, awsRegion, arn, configuration "
+    "WHERE resourceType IN ({types})"
+)
+
+# Advanced queries return at most 100 results per page
+PAGE_SIZE = 100
+DEFAULT_CACHE_TTL = 300
+
+# Values under these keys are user-defined maps whose keys must not be renamed
+OPAQUE_KEYS = {"variables"}
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def enabled():
+    return bool(os.getenv("CONFIG_AGGREGATOR")) or os.getenv("CONFIG_INVENTORY", "").lower() in ("1", "true", "yes")
+
+
+def _pascal(value):
+    # Config stores describe-call shapes with camelCase keys (instanceId -> InstanceId)
+    if isinstance(value, dict):
+        return {
+            key[:1].upper() + key[1:]: item if key in OPAQUE_KEYS else _pascal(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_pascal(item) for item in value]
+    return value
+
+
+def _security_group(group):
+    # Config keeps the legacy flat "ipRanges" string list next to "ipv4Ranges"
+    for key in ("IpPermissions", "IpPermissionsEgress"):
+        for perm in group.get(key, []):
+            perm["IpRanges"] = perm.pop("Ipv4Ranges", None) or [
+                {"CidrIp": cidr} for cidr in perm.get("IpRanges", []) if isinstance(cidr, str)
+            ]
+    return group
+
+
+FIXUPS = {
+    "AWS::EC2::SecurityGroup": _security_group,
+}
+
+
+def _lambda_vpcs(functions, subnets):
+    # Config's Lambda items carry SubnetIds but not always VpcId; the VPC is taken
+    # from the subnets in the same snapshot. Returns False if any stays unknown.
+    vpc_of = {subnet.get("SubnetId"): subnet.get("VpcId") for subnet in subnets}
+    complete = True
+    for fn in functions:
+        vpc_config = fn.get("VpcConfig") or {}
+        if vpc_config.get("VpcId") or not vpc_config.get("SubnetIds"):
+            continue
+        vpc_id = next((vpc_of[s] for s in vpc_config["SubnetIds"] if vpc_of.get(s)), None)
+        if vpc_id:
+            vpc_config["VpcId"] = vpc_id
+        else:
+            complete = False
+    return complete
+
+
+def query(types, aggregator=None):
+    # Pages through one advanced query; yields each result as a dict
+    config = aws_session.client("config")
+    expression = QUERY.format(types=", ".join(f"'{t}'" for t in types))
+    kwargs = {"Expression": expression, "Limit": PAGE_SIZE}
+    if aggregator:
+        kwargs["ConfigurationAggregatorName"] = aggregator
+    while True:
+        if aggregator:
+            response = config.select_aggregate_resource_config(**kwargs)
+        else:
+            response = config.select_resource_config(**kwargs)
+        for result in response.get("Results", []):
+            yield json.loads(result)
+        if not response.get("NextToken"):
+            break
+        kwargs["NextToken"] = response["NextToken"]
+
+
+def recorded_types():
+    # Resource types this account's recorder captures, or an empty set when it is off
+    config = aws_session.client("config")
+    statuses = config.describe_configuration_recorder_status().get("ConfigurationRecordersStatus", [])
+    if not any(status.get("recording") for status in statuses):
+        return set()
+    types = set()
+    for recorder in config.describe_configuration_recorders().get("ConfigurationRecorders", []):
+        group = recorder.get("recordingGroup", {})
+        # Exclusion recorders report allSupported false with an empty resourceTypes list
+        strategy = group.get("recordingStrategy", {}).get("useOnly")
+        if group.get("allSupported", True) or strategy == "EXCLUSION_BY_RESOURCE_TYPES":
+            excluded = set(group.get("exclusionByResourceTypes", {}).get("resourceTypes", []))
+            types |= set(RESOURCE_TYPES) - excluded
+        else:
+            types |= set(group.get("resourceTypes", [])) & set(RESOURCE_TYPES)
+    return types
+
+
+class ConfigSnapshot:
+    # Every supported resource in one query stream, converted to the shapes the
+    # describe calls return and grouped by (type, account, region).
+    def __init__(self, aggregator=None):
+        self.aggregator = aggregator
+        self.items = defaultdict(list)
+        self.available = set()
+        # (type, account, region) groups missing fields Config does not record
+        self.incomplete = set()
+        self.loaded_at = None
+
+    def load(self):
+        types = set(RESOURCE_TYPES) if self.aggregator else recorded_types()
+        for row in query(sorted(types), self.aggregator) if types else ():
+            resource_type = row["resourceType"]
+            item = _pascal(row.get("configuration") or {})
+            fixup = FIXUPS.get(resource_type)
+            if fixup:
+                item = fixup(item)
+            self.items[(resource_type, row["accountId"], row["awsRegion"])].append(item)
+        for resource_type, account, region in list(self.items):
+            if resource_type == "AWS::Lambda::Function":
+                subnets = self.items.get(("AWS::EC2::Subnet", account, region), [])
+                if not _lambda_vpcs(self.items[(resource_type, account, region)], subnets):
+                    self.incomplete.add((resource_type, account, region))
+        if self.aggregator:
+            # An aggregator cannot say what its sources record, so only types with results are trusted
+            types = {resource_type for resource_type, _, _ in self.items}
+        self.available = types
+        self.loaded_at = time.time()
+        return self
+
+    def dataset(self, resource_type, account, region):
+        # Items for one account and region, or None when Config does not record the type
+        key = (resource_type, account, region)
+        if resource_type not in self.available or key in self.incomplete:
+            return None
+        # An aggregator's results for one source say nothing about the others
+        if self.aggregator and key not in self.items:
+            return None
+        items = self.items.get(key, [])
+        if resource_type == "AWS::EC2::Instance":
+            return ({"OwnerId": account, "Instances": items},) if items else ()
+        return tuple(items)
+
+    def record_inventory(self):
+        # Writes every account and region to the local inventory in one pass
+        for (resource_type, account, region), items in self.items.items():
+            if resource_type == "AWS::EC2::Instance":
+                for instance in items:
+                    inventory.record(inventory.ec2_instance(instance, account, region))
+            elif resource_type == "AWS::EC2::Volume":
+                for volume in items:
+                    inventory.record(inventory.ebs_volume(volume, account, region))
+            elif resource_type == "AWS::EC2::SecurityGroup":
+                exposure = ExposureIndex()
+                for group in items:
+                    exposure.add_group(group)
+                exposure.build()
+                for group in items:
+                    internet_open = bool(exposure.internet_rules_for_groups([group["GroupId"]]))
+                    inventory.record(inventory.security_group(group, internet_open, region))
+            elif resource_type in ("AWS::Lambda::Function", "AWS::RDS::DBInstance"):
+                normalize = inventory.lambda_function if resource_type == "AWS::Lambda::Function" else inventory.rds_instance
+                for item in items:
+                    record = normalize(item)
+                    record["region"] = region
+                    inventory.record(record)
+
+    def counts(self):
+        totals = defaultdict(int)
+        for (resource_type, _, _), items in self.items.items():
+            totals[resource_type] += len(items)
+        return dict(totals)
+
+
+def snapshot():
+    # Loaded once and reused by every dataset for CONFIG_CACHE_TTL seconds
+    global _snapshot
+    ttl = int(os.getenv("CONFIG_CACHE_TTL", str(DEFAULT_CACHE_TTL)))
+    with _lock:
+        if _snapshot is None or time.time() - _snapshot.loaded_at > ttl:
+            loaded = ConfigSnapshot(os.getenv("CONFIG_AGGREGATOR") or None)
+            try:
+                loaded.load()
+                loaded.record_inventory()
+                counts = loaded.counts()
+                print(f"[INFO] AWS Config: {sum(counts.values())} resource(s) of {len(counts)} type(s) loaded from one query.")
+            except Exception as e:
+                # An empty snapshot sends every dataset to the service APIs until the TTL expires
+                print(f"[WARN] AWS Config query failed, using service APIs: {e}")
+                loaded = ConfigSnapshot()
+                loaded.loaded_at = time.time()
+            _snapshot = loaded
+        return _snapshot
+
+
+def dataset(resource_type):
+    # Config-backed items for the current account and region, or None to use the service API
+    if not enabled():
+        return None
+    return snapshot().dataset(resource_type, aws_session.account_id(), aws_session.region())
@@ -0,0 +1,157 @@
+# modules/daemon.py
+import heapq
+import io
+import json
+import os
+import re
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from modules.checkpoint import FAILURE_MARKER
+
+DEFAULT_INTERVAL = 900
+DEFAULT_PORT = 8787
+
+
+def checker_key(name):
+    # "API Gateway" -> "api_gateway"; used for URLs and DAEMON_INTERVAL_<KEY>
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp else None
+
+
+class ResultStore:
+    def __init__(self, names):
+        self._lock = threading.Lock()
+        self._results = {checker_key(name): {"name": name, "status": "pending"} for name in names}
+
+    def update(self, name, **fields):
+        with self._lock:
+            self._results[checker_key(name)].update(fields)
+
+    def snapshot(self, key=None):
+        now = time.time()
+        with self._lock:
+            keys = [key] if key else list(self._results)
+            snapshot = {}
+            for k in keys:
+                if k not in self._results:
+                    continue
+                result = dict(self._results[k])
+                finished = result.pop("finished_ts", None)
+                result["last_scan_age_seconds"] = round(now - finished, 1) if finished else None
+                snapshot[k] = result
+            return snapshot
+
+
+class Scheduler(threading.Thread):
+    # Runs each checker on its own interval in one background thread. Clients
+    # come from aws_session, so connection pools stay warm between runs.
+    def __init__(self, checkers, store):
+        super().__init__(daemon=True)
+        self.checkers = checkers
+        self.store = store
+        self.stop_event = threading.Event()
+        self.intervals = {
+            name: int(os.getenv(f"DAEMON_INTERVAL_{checker_key(name).upper()}",
+                                os.getenv("DAEMON_INTERVAL", str(DEFAULT_INTERVAL))))
+            for name, _ in checkers
+        }
+
+    def run_one(self, name, check):
+        started = time.time()
+        self.store.update(name, status="running", started_at=_iso(started))
+        buffer = io.StringIO()
+        try:
+            with redirect_stdout(buffer):
+                check()
+            output = buffer.getvalue()
+            status = "error" if FAILURE_MARKER in output else "ok"
+        except Exception as e:
+            output = buffer.getvalue() + f"\n[ERROR] {e}\n"
+            status = "error"
+        finished = time.time()
+        self.store.update(
+            name,
+            status=status,
+            finished_at=_iso(finished),
+            finished_ts=finished,
+            duration_seconds=round(finished - started, 2),
+            warnings=[line.strip() for line in output.splitlines() if "[WARN" in line],
+            output=output,
+        )
+        print(f"[INFO] {name} diagnostics refreshed in {finished - started:.1f}s ({status}).")
+
+    def run(self):
+        # Min-heap of (next due time, checker index)
+        queue = [(time.time(), i) for i in range(len(self.checkers))]
+        heapq.heapify(queue)
+        while not self.stop_event.is_set():
+            due, index = queue[0]
+            wait = due - time.time()
+            if wait > 0:
+                self.stop_event.wait(wait)
+                continue
+            heapq.heappop(queue)
+            name, check = self.checkers[index]
+            self.run_one(name, check)
+            heapq.heappush(queue, (time.time() + self.intervals[name], index))
+
+
+def _handler(store, started):
+    class ResultsHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body, indent=2, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            path = unquote(self.path.split("?", 1)[0]).rstrip("/")
+            if path in ("", "/health"):
+                self._send(200, {"status": "ok", "uptime_seconds": round(time.time() - started, 1)})
+            elif path == "/results":
+                self._send(200, {"generated_at": _iso(time.time()), "checkers": store.snapshot()})
+            elif path.startswith("/results/"):
+                key = checker_key(path[len("/results/"):])
+                result = store.snapshot(key)
+                if result:
+                    self._send(200, result[key])
+                else:
+                    self._send(404, {"error": f"unknown checker: {key}"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            # Keep request logs off stdout, which is redirected while checkers run
+            pass
+
+    return ResultsHandler
+
+
+def serve(checkers, host="127.0.0.1", port=None):
+    port = port or int(os.getenv("DAEMON_PORT", str(DEFAULT_PORT)))
+    store = ResultStore([name for name, _ in checkers])
+    scheduler = Scheduler(checkers, store)
+    server = ThreadingHTTPServer((host, port), _handler(store, time.time()))
+
+    print(f"[INFO] Daemon mode: serving diagnostics on http://{host}:{port}/results")
+    for name, _ in checkers:
+        print(f"  {name}: every {scheduler.intervals[name]}s")
+
+    scheduler.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping daemon...")
+    finally:
+        scheduler.stop_event.set()
+        server.server_close()
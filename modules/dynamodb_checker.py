@@ -1,19 +1,11 @@
-import boto3
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from modules import aws_session, rule_engine
+from modules.kms_posture import KeyPostureIndex
 
 def run_check():
     print("\n[INFO] Starting DynamoDB diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-        dynamodb = session.client("dynamodb")
+        dynamodb = aws_session.client("dynamodb")
 
         tables = dynamodb.list_tables().get("TableNames", [])
         if not tables:
@@ -22,9 +14,23 @@ def run_check():
 
         print(f"  {len(tables)} table(s) found.")
 
+        # Describe every table first so the rules run over the whole batch at once
+        described = []
         for table_name in tables:
-            print(f"\n  [TABLE] {table_name}")
             table_info = dynamodb.describe_table(TableName=table_name)["Table"]
+            table_info.update(dynamodb.describe_continuous_backups(TableName=table_name))
+            described.append(table_info)
+        findings = rule_engine.evaluate("dynamodb:table", described)
+
+        # Tables using a KMS key (rather than the AWS owned key) share one lookup per key
+        keys = KeyPostureIndex()
+        for table_info in described:
+            keys.add(table_info.get("SSEDescription", {}).get("KMSMasterKeyArn"))
+        keys.resolve()
+
+        for table_info, table_findings in zip(described, findings):
+            table_name = table_info["TableName"]
+            print(f"\n  [TABLE] {table_name}")
 
             # Table status
             status = table_info["TableStatus"]
@@ -36,7 +42,7 @@ def run_check():
 
             # Auto-scaling
             if billing_mode == "PROVISIONED":
-                autoscaling = session.client("application-autoscaling")
+                autoscaling = aws_session.client("application-autoscaling")
                 scalable_targets = autoscaling.describe_scalable_targets(
                     ServiceNamespace="dynamodb",
                     ResourceIds=[f"table/{table_name}"],
@@ -49,9 +55,10 @@ def run_check():
             # Encryption
             encryption = table_info.get("SSEDescription", {}).get("Status", "DISABLED")
             print(f"   → Encryption at Rest: {encryption}")
+            rule_engine.print_findings(keys.findings(table_info.get("SSEDescription", {}).get("KMSMasterKeyArn")))
 
             # PITR
-            pitr = dynamodb.describe_continuous_backups(TableName=table_name)["ContinuousBackupsDescription"]
+            pitr = table_info["ContinuousBackupsDescription"]
             pitr_status = pitr.get("PointInTimeRecoveryDescription", {}).get("PointInTimeRecoveryStatus", "DISABLED")
             print(f"   → Point-in-Time Recovery: {pitr_status}")
 
@@ -73,5 +80,7 @@ def run_check():
             else:
                 print("   → Global Table Replication: Not configured")
 
+            rule_engine.print_findings(table_findings)
+
     except Exception as e:
         print(f"[ERROR] Failed to run DynamoDB diagnostics: {e}")
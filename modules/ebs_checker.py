@@ -1,32 +1,21 @@
-import boto3
-import os
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
+import time
+from datetime import datetime, timedelta, timezone
+from modules import inventory, prefetch
+from modules.ebs_lineage import print_report
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("ebs.lineage",)
 
 def run_check():
     print("\n[INFO] Starting EBS diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+        started = time.time()
 
-        ec2 = session.client("ec2")
-
-        volumes = ec2.describe_volumes()["Volumes"]
-        snapshots = ec2.describe_snapshots(OwnerIds=["self"])["Snapshots"]
-
-        snapshot_map = {}
-        for snap in snapshots:
-            volume_id = snap.get("VolumeId")
-            if volume_id:
-                if volume_id not in snapshot_map:
-                    snapshot_map[volume_id] = []
-                snapshot_map[volume_id].append(snap)
+        # Volumes, owned snapshots, AMIs and instances, one paginated pass each
+        lineage = prefetch.get("ebs.lineage")
+        volumes = lineage.volumes
+        week_ago = datetime.now(timezone.utc) - timedelta(days=7)
 
         print(f"  {len(volumes)} volume(s) found.")
 
@@ -36,6 +25,7 @@ def run_check():
             vol_type = vol["VolumeType"]
             encrypted = vol["Encrypted"]
             attachments = vol.get("Attachments", [])
+            inventory.record(inventory.ebs_volume(vol))
 
             print(f"\n  Volume ID: {vol_id}")
             print(f"   State: {state}")
@@ -46,15 +36,14 @@ def run_check():
                 print("   [WARN] Volume is unattached (orphaned).")
 
             # Snapshot check
-            recent_snap = False
-            if vol_id in snapshot_map:
-                for snap in snapshot_map[vol_id]:
-                    start_time = snap["StartTime"]
-                    if start_time > datetime.utcnow() - timedelta(days=7):
-                        recent_snap = True
-                        break
-            if not recent_snap:
+            latest = lineage.latest_snapshot.get(vol_id)
+            if latest is None or latest <= week_ago:
                 print("   [WARN] No recent snapshot in last 7 days.")
 
+        inventory.prune("ec2:volume", started)
+
+        # Snapshots and AMIs left behind by deleted volumes, deregistered or unused AMIs
+        print_report(lineage)
+
     except Exception as e:
         print(f"[ERROR] Failed to run EBS diagnostics: {e}")
@@ -0,0 +1,126 @@
+# modules/ebs_lineage.py
+import re
+from collections import defaultdict
+
+# Snapshots created for an AMI record it in their description, which survives deregistration
+AMI_SNAPSHOT_DESCRIPTION = re.compile(r"(?:CreateImage\(i-[0-9a-f]+\) for|DestinationAmi) (ami-[0-9a-f]+)")
+
+# Instances in these states still depend on the AMI they were launched from
+LIVE_INSTANCE_STATES = ["pending", "running", "stopping", "stopped", "shutting-down"]
+
+# Copied and AMI-imported snapshots report this placeholder instead of a real source volume
+PLACEHOLDER_VOLUME = "vol-ffffffff"
+
+TOP_N = 10
+
+
+class LineageIndex:
+    # Built from the prefetched volume, snapshot, image and instance listings. Only
+    # ids, sizes and links are kept per snapshot, so the index stays small for
+    # hundreds of thousands of them.
+    def __init__(self):
+        self.volumes = []
+        self.volume_ids = set()
+        self.snapshot_size = {}
+        self.snapshot_volume = {}
+        self.snapshot_ami = {}
+        self.latest_snapshot = {}
+        self.images = {}
+        self.image_snapshots = defaultdict(set)
+        self.instance_amis = set()
+
+    def add_volume(self, volume):
+        self.volumes.append(volume)
+        self.volume_ids.add(volume["VolumeId"])
+
+    def add_instance(self, instance):
+        if instance.get("State", {}).get("Name") in LIVE_INSTANCE_STATES:
+            self.instance_amis.add(instance.get("ImageId"))
+
+    def add_snapshot(self, snapshot):
+        snapshot_id = snapshot["SnapshotId"]
+        volume_id = snapshot.get("VolumeId")
+        self.snapshot_size[snapshot_id] = snapshot.get("VolumeSize", 0)
+        if volume_id and volume_id != PLACEHOLDER_VOLUME:
+            self.snapshot_volume[snapshot_id] = volume_id
+            started = snapshot["StartTime"]
+            latest = self.latest_snapshot.get(volume_id)
+            if latest is None or started > latest:
+                self.latest_snapshot[volume_id] = started
+        match = AMI_SNAPSHOT_DESCRIPTION.search(snapshot.get("Description", ""))
+        if match:
+            self.snapshot_ami[snapshot_id] = match.group(1)
+
+    def add_image(self, image):
+        image_id = image["ImageId"]
+        self.images[image_id] = image.get("Name") or image_id
+        for mapping in image.get("BlockDeviceMappings", []):
+            snapshot_id = mapping.get("Ebs", {}).get("SnapshotId")
+            if snapshot_id:
+                self.image_snapshots[image_id].add(snapshot_id)
+
+    def gib(self, snapshot_ids):
+        return sum(self.snapshot_size.get(s, 0) for s in snapshot_ids)
+
+    def analyze(self):
+        snapshots = set(self.snapshot_size)
+        registered = set(self.images)
+
+        # Snapshots still backing a registered AMI
+        ami_backing = set()
+        for image_snapshots in self.image_snapshots.values():
+            ami_backing |= image_snapshots
+
+        # AMIs that no existing instance was launched from, and what they keep alive
+        unused_amis = registered - self.instance_amis
+        unused_ami_snapshots = {ami: self.image_snapshots[ami] & snapshots for ami in unused_amis}
+
+        # Snapshots made for AMIs that have since been deregistered
+        leftover = defaultdict(set)
+        for snapshot_id, ami in self.snapshot_ami.items():
+            if ami not in registered:
+                leftover[ami].add(snapshot_id)
+        leftover_snapshots = set().union(*leftover.values())
+
+        # Snapshots whose source volume is gone and that no AMI uses
+        from_deleted = {s for s, v in self.snapshot_volume.items() if v not in self.volume_ids}
+        orphaned = from_deleted - ami_backing - leftover_snapshots
+        by_volume = defaultdict(set)
+        for snapshot_id in orphaned:
+            by_volume[self.snapshot_volume[snapshot_id]].add(snapshot_id)
+
+        return {
+            "unused_amis": unused_ami_snapshots,
+            "deregistered_amis": dict(leftover),
+            "deleted_volumes": dict(by_volume),
+        }
+
+
+def _print_chains(title, chains, index, label):
+    if not chains:
+        return
+    all_snapshots = set().union(*chains.values())
+    print(f"   [WARN] {title}: {len(chains)} chain(s), {len(all_snapshots)} snapshot(s), {index.gib(all_snapshots)} GiB")
+    ranked = sorted(chains.items(), key=lambda item: index.gib(item[1]), reverse=True)
+    for source, snapshot_ids in ranked[:TOP_N]:
+        print(f"     - {label(source)}: {len(snapshot_ids)} snapshot(s), {index.gib(snapshot_ids)} GiB")
+    if len(ranked) > TOP_N:
+        print(f"     ... and {len(ranked) - TOP_N} more")
+
+
+def print_report(index):
+    result = index.analyze()
+    print(f"\n  Snapshot lineage: {len(index.snapshot_size)} snapshot(s), {len(index.images)} AMI(s), "
+          f"{len(index.volume_ids)} volume(s) indexed (GiB are source volume sizes; snapshots are billed incrementally).")
+
+    _print_chains("AMIs not used by any instance", result["unused_amis"], index,
+                  lambda ami: f"{ami} ({index.images[ami]})")
+    _print_chains("Snapshots left by deregistered AMIs", result["deregistered_amis"], index,
+                  lambda ami: f"{ami} (deregistered)")
+    _print_chains("Snapshots of deleted volumes not used by any AMI", result["deleted_volumes"], index,
+                  lambda volume: f"{volume} (deleted)")
+
+    if result["unused_amis"]:
+        print("   [INFO] AMIs may still be referenced by launch templates or Auto Scaling groups; review before deregistering.")
+    if not any(result.values()):
+        print("   No orphaned snapshots or unused AMIs found.")
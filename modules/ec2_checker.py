@@ -1,8 +1,11 @@
-import boto3
 import os
-from dotenv import load_dotenv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules import aws_session, inventory, prefetch, secret_scanner
+from modules.sg_exposure import ADMIN_PORTS
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("ec2.reservations", "ec2.volumes", "sg.exposure", "iam.instance_profiles")
 
 def check_tags(instance):
     tags = {tag["Key"]: tag["Value"] for tag in instance.get("Tags", [])}
@@ -10,29 +13,59 @@ def check_tags(instance):
         print("   [WARN] Instance missing 'Name' tag")
 
 
-def check_security_groups(ec2, instance):
-    for sg in instance["SecurityGroups"]:
-        sg_id = sg["GroupId"]
-        sg_data = ec2.describe_security_groups(GroupIds=[sg_id])
-        for perm in sg_data["SecurityGroups"][0]["IpPermissions"]:
-            for ip_range in perm.get("IpRanges", []):
-                cidr = ip_range.get("CidrIp")
-                if cidr == "0.0.0.0/0":
-                    port = perm.get("FromPort")
-                    if port in [22, 3389]:
-                        print(f"   [WARN] Port {port} open to world in SG {sg_id}")
+def check_security_groups(exposure, instance):
+    group_ids = [sg["GroupId"] for sg in instance["SecurityGroups"]]
+    for rule in exposure.internet_rules_for_groups(group_ids):
+        admin_ports = [
+            f"{port} ({label})" for port, label in ADMIN_PORTS.items()
+            if rule.protocol in ("tcp", "all") and rule.from_port <= port <= rule.to_port
+        ]
+        if admin_ports:
+            print(f"   [WARN] Port {', '.join(admin_ports)} open to world in SG {rule.group_id} "
+                  f"({rule.protocol} {rule.ports()} from {rule.source})")
+        else:
+            print(f"   [INFO] Ports {rule.ports()}/{rule.protocol} open to world in SG {rule.group_id} (from {rule.source})")
 
 
-def check_volume_encryption(ec2, instance):
+def check_volume_encryption(ec2, volumes, instance):
     for mapping in instance.get("BlockDeviceMappings", []):
         ebs = mapping.get("Ebs", {})
         volume_id = ebs.get("VolumeId")
         if volume_id:
-            volume = ec2.describe_volumes(VolumeIds=[volume_id])["Volumes"][0]
+            volume = volumes.get(volume_id)
+            if volume is None:
+                # Attached after the volume listing was taken
+                volume = ec2.describe_volumes(VolumeIds=[volume_id])["Volumes"][0]
+            inventory.record(inventory.ebs_volume(volume))
             if not volume.get("Encrypted", False):
                 print(f"   [WARN] Volume {volume_id} is not encrypted")
 
 
+def scan_user_data(ec2, instance_ids):
+    # User data is only returned one instance at a time, so fetches run concurrently
+    def fetch(instance_id):
+        try:
+            value = ec2.describe_instance_attribute(InstanceId=instance_id, Attribute="userData")["UserData"].get("Value")
+        except Exception:
+            return None
+        return secret_scanner.decode_user_data(value) if value else None
+
+    workers = int(os.getenv("USER_DATA_WORKERS", "8"))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        scripts = list(pool.map(fetch, instance_ids))
+    scanned = secret_scanner.scan_batch(
+        [secret_scanner.text_document(script) for script in scripts if script]
+    )
+    found = iter(scanned)
+    return {instance_id: next(found) for instance_id, script in zip(instance_ids, scripts) if script}
+
+
+def check_user_data(secrets, instance_id):
+    found = secrets.get(instance_id)
+    if found:
+        print(f"   [WARN] Potential secret(s) in user data: {secret_scanner.describe(found)}")
+
+
 def check_monitoring(instance):
     monitoring = instance.get("Monitoring", {})
     if not monitoring.get("State") == "enabled":
@@ -43,33 +76,49 @@ def run_check():
     print("\n[INFO] Starting EC2 diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+        ec2 = aws_session.client("ec2")
+        started = time.time()
 
-        ec2 = session.client("ec2")
-        instances = ec2.describe_instances()
+        # Every security group rule in the region, parsed once
+        exposure = prefetch.get("sg.exposure")
+        inventory.record_security_groups(exposure)
 
         found = False
 
-        for reservation in instances["Reservations"]:
+        reservations = prefetch.get("ec2.reservations")
+        volumes = {volume["VolumeId"]: volume for volume in prefetch.get("ec2.volumes")}
+        try:
+            profile_roles = inventory.instance_profile_roles(prefetch.get("iam.instance_profiles"))
+        except Exception as e:
+            print(f"[WARN] Could not list IAM instance profiles; instance roles are not recorded: {e}")
+            profile_roles = {}
+        user_data_secrets = scan_user_data(ec2, [
+            instance["InstanceId"] for reservation in reservations for instance in reservation["Instances"]
+        ])
+
+        for reservation in reservations:
             for instance in reservation["Instances"]:
                 found = True
                 instance_id = instance["InstanceId"]
                 state = instance["State"]["Name"]
+                profile_arn = instance.get("IamInstanceProfile", {}).get("Arn")
+                inventory.record(inventory.ec2_instance(
+                    instance, reservation.get("OwnerId"), role_arn=profile_roles.get(profile_arn)))
 
                 print(f"\n[INFO] Instance: {instance_id}")
                 print(f"   State: {state}")
 
                 check_tags(instance)
-                check_security_groups(ec2, instance)
-                check_volume_encryption(ec2, instance)
+                check_security_groups(exposure, instance)
+                check_volume_encryption(ec2, volumes, instance)
+                check_user_data(user_data_secrets, instance_id)
                 check_monitoring(instance)
 
         if not found:
             print("[INFO] No EC2 instances found.")
 
+        inventory.prune("ec2:instance", started)
+        inventory.prune("ec2:security-group", started)
+
     except Exception as e:
         print(f"[ERROR] Failed to run EC2 diagnostics: {e}")
@@ -0,0 +1,195 @@
+# modules/ecr_image_scanner.py
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import aws_session
+
+# <account>.dkr.ecr.<region>.amazonaws.com/<repository>[:tag][@sha256:digest]
+ECR_IMAGE = re.compile(
+    r"^(?P<registry>\d{12})\.dkr\.ecr(?:-fips)?\.(?P<region>[a-z0-9-]+)\.amazonaws\.com(?:\.cn)?/"
+    r"(?P<repository>[^:@]+)(?::(?P<tag>[^@]+))?(?:@(?P<digest>sha256:[0-9a-f]{64}))?$"
+)
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "INFORMATIONAL", "UNDEFINED")
+
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+
+# batch_get_image accepts up to 100 image ids per call
+BATCH_SIZE = 100
+DEFAULT_WORKERS = 8
+
+# Scan results per digest, shared across runs (menu, Run ALL, daemon)
+_findings_cache = {}
+_cache_lock = threading.Lock()
+
+
+def parse_image(image):
+    match = ECR_IMAGE.match(image or "")
+    if not match:
+        return None
+    ref = match.groupdict()
+    if not ref["tag"] and not ref["digest"]:
+        ref["tag"] = "latest"
+    return ref
+
+
+def _cache_ttl():
+    return int(os.getenv("ECR_SCAN_CACHE_TTL", "3600"))
+
+
+class ScanResult:
+    def __init__(self, status, counts=None, error=None):
+        self.status = status
+        self.counts = Counter(counts or {})
+        self.error = error
+
+    def summary(self):
+        if self.status != "COMPLETE":
+            return f"scan {self.status.lower()}" + (f" ({self.error})" if self.error else "")
+        return format_counts(self.counts)
+
+
+class ImageVulnerabilityIndex:
+    # Container references are collected first; tags are resolved to digests in
+    # batches per repository and findings are fetched once per distinct digest.
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv("ECR_SCAN_WORKERS", str(DEFAULT_WORKERS)))
+        self.owners = defaultdict(set)
+        self.digests = {}
+        self.results = {}
+        self.unresolved = {}
+        self.other_images = set()
+
+    def add(self, image, owner):
+        if parse_image(image):
+            self.owners[owner].add(image)
+        else:
+            # Docker Hub, public ECR and other registries carry no ECR scan results
+            self.other_images.add(image)
+
+    def _resolve_tags(self):
+        # (region, registry, repository) -> tag -> image strings using that tag
+        by_repository = defaultdict(lambda: defaultdict(list))
+        for images in self.owners.values():
+            for image in images:
+                ref = parse_image(image)
+                if ref["digest"]:
+                    self.digests[image] = (ref["region"], ref["registry"], ref["repository"], ref["digest"])
+                else:
+                    by_repository[(ref["region"], ref["registry"], ref["repository"])][ref["tag"]].append(image)
+
+        for (region, registry, repository), by_tag in by_repository.items():
+            ecr = aws_session.client("ecr", region_name=region)
+            tags = sorted(by_tag)
+            for start in range(0, len(tags), BATCH_SIZE):
+                chunk = tags[start:start + BATCH_SIZE]
+                try:
+                    response = ecr.batch_get_image(
+                        registryId=registry,
+                        repositoryName=repository,
+                        imageIds=[{"imageTag": tag} for tag in chunk],
+                        acceptedMediaTypes=MANIFEST_MEDIA_TYPES,
+                    )
+                except Exception as e:
+                    for tag in chunk:
+                        for image in by_tag[tag]:
+                            self.unresolved[image] = str(e)
+                    continue
+                for found in response.get("images", []):
+                    image_id = found["imageId"]
+                    for image in by_tag.get(image_id.get("imageTag"), []):
+                        self.digests[image] = (region, registry, repository, image_id["imageDigest"])
+                for failure in response.get("failures", []):
+                    for image in by_tag.get(failure.get("imageId", {}).get("imageTag"), []):
+                        self.unresolved[image] = failure.get("failureReason") or failure.get("failureCode")
+
+    def _fetch(self, key):
+        region, registry, repository, digest = key
+        now = time.time()
+        with _cache_lock:
+            cached = _findings_cache.get(key)
+        if cached and now - cached[0] < _cache_ttl():
+            return cached[1]
+
+        ecr = aws_session.client("ecr", region_name=region)
+        try:
+            # Severity counts come with the first page, so no finding details are paged
+            response = ecr.describe_image_scan_findings(
+                registryId=registry,
+                repositoryName=repository,
+                imageId={"imageDigest": digest},
+                maxResults=1,
+            )
+            status = response.get("imageScanStatus", {}).get("status", "UNKNOWN")
+            counts = response.get("imageScanFindings", {}).get("findingSeverityCounts", {})
+            result = ScanResult(status, counts, response.get("imageScanStatus", {}).get("description"))
+        except ecr.exceptions.ScanNotFoundException:
+            result = ScanResult("NOT_SCANNED")
+        except Exception as e:
+            # Errors are not cached, so the next run tries again
+            return ScanResult("FAILED", error=str(e))
+
+        with _cache_lock:
+            _findings_cache[key] = (now, result)
+        return result
+
+    def resolve(self):
+        self._resolve_tags()
+        distinct = sorted(set(self.digests.values()))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.results = dict(zip(distinct, pool.map(self._fetch, distinct)))
+        return self
+
+    def image_result(self, image):
+        key = self.digests.get(image)
+        if key is None:
+            return None
+        return self.results.get(key)
+
+    def owner_counts(self, owner):
+        # Distinct digests behind an owner's images, so a digest tagged twice counts once
+        keys = {self.digests[image] for image in self.owners.get(owner, ()) if image in self.digests}
+        totals = Counter()
+        for key in keys:
+            result = self.results.get(key)
+            if result and result.status == "COMPLETE":
+                totals.update(result.counts)
+        return totals
+
+    def stats(self):
+        references = sum(len(images) for images in self.owners.values())
+        return references, len(set(self.digests.values()))
+
+
+def format_counts(counts):
+    found = [f"{s}: {counts[s]}" for s in SEVERITIES if counts.get(s)]
+    return ", ".join(found) if found else "no findings"
+
+
+def print_report(index, indent="   "):
+    references, digests = index.stats()
+    print(f"{indent}Image vulnerabilities: {references} ECR image reference(s), {digests} distinct digest(s)")
+    for owner in sorted(index.owners):
+        counts = index.owner_counts(owner)
+        marker = "[WARN] " if counts.get("CRITICAL") or counts.get("HIGH") else ""
+        scanned = any(
+            (index.image_result(image) or ScanResult("MISSING")).status == "COMPLETE" for image in index.owners[owner]
+        )
+        print(f"{indent}- {marker}{owner}: {format_counts(counts) if scanned else 'no scan results'}")
+        for image in sorted(index.owners[owner]):
+            result = index.image_result(image)
+            if result is None:
+                reason = index.unresolved.get(image, "tag not found")
+                print(f"{indent}    → {image}: could not resolve ({reason})")
+            elif result.status != "COMPLETE":
+                print(f"{indent}    → {image}: {result.summary()}")
+    if index.other_images:
+        print(f"{indent}[INFO] {len(index.other_images)} image(s) from registries other than ECR were not checked.")
@@ -1,57 +1,90 @@
-import boto3
-import os
-from dotenv import load_dotenv
+from modules import aws_session, ecs_tasks, secret_scanner
+from modules.ecr_image_scanner import ImageVulnerabilityIndex, print_report
 
-load_dotenv()
+# describe_services accepts up to 10 services per call
+DESCRIBE_SERVICES_BATCH = 10
 
 def run_check():
     print("\n[INFO] Starting ECS diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+        ecs = aws_session.client("ecs")
 
-        ecs = session.client("ecs")
-
-        clusters_arns = ecs.list_clusters().get("clusterArns", [])
+        clusters_arns = [
+            arn for page in ecs.get_paginator("list_clusters").paginate() for arn in page["clusterArns"]
+        ]
         if not clusters_arns:
             print("  No ECS clusters found.")
             return
 
         print(f"  Found {len(clusters_arns)} cluster(s).")
 
+        # Running and recently stopped tasks of every cluster, described in batches of 100
+        tasks = ecs_tasks.collect(clusters_arns)
+
+        # Task definitions shared by several services are described once
+        task_definitions = {}
+        images = ImageVulnerabilityIndex()
+
         for cluster_arn in clusters_arns:
             cluster = ecs.describe_clusters(clusters=[cluster_arn])["clusters"][0]
             cluster_name = cluster["clusterName"]
             print(f"\n  Cluster: {cluster_name}")
             print(f"   → Status: {cluster['status']}, Active Services: {cluster['activeServicesCount']}, Running Tasks: {cluster['runningTasksCount']}")
+            ecs_tasks.print_cluster(tasks[cluster_arn])
 
             # List services
-            service_arns = ecs.list_services(cluster=cluster_arn).get("serviceArns", [])
+            service_arns = [
+                arn for page in ecs.get_paginator("list_services").paginate(cluster=cluster_arn)
+                for arn in page["serviceArns"]
+            ]
             if not service_arns:
                 print("   No services found in this cluster.")
                 continue
 
-            services = ecs.describe_services(cluster=cluster_arn, services=service_arns).get("services", [])
+            services = []
+            for start in range(0, len(service_arns), DESCRIBE_SERVICES_BATCH):
+                batch = service_arns[start:start + DESCRIBE_SERVICES_BATCH]
+                services.extend(ecs.describe_services(cluster=cluster_arn, services=batch).get("services", []))
             for service in services:
                 name = service["serviceName"]
                 desired = service["desiredCount"]
                 running = service["runningCount"]
                 launch_type = service.get("launchType", "Unknown")
                 print(f"   - Service: {name}, Desired: {desired}, Running: {running}, Launch Type: {launch_type}")
+                ecs_tasks.print_service(tasks[cluster_arn].for_service(name), desired)
+
+            for service in services:
+                task_def = service.get("taskDefinition")
+                if task_def and task_def not in task_definitions:
+                    task_definitions[task_def] = ecs.describe_task_definition(taskDefinition=task_def)["taskDefinition"]
+
+            # Container environments of every task definition in the cluster are scanned as one batch
+            containers = [
+                container for service in services if service.get("taskDefinition")
+                for container in task_definitions[service["taskDefinition"]]["containerDefinitions"]
+            ]
+            secrets = iter(secret_scanner.scan_batch(
+                [secret_scanner.env_document(container.get("environment", [])) for container in containers]
+            ))
 
             # List task definitions used by services
             for service in services:
                 task_def = service.get("taskDefinition")
                 if task_def:
-                    td_desc = ecs.describe_task_definition(taskDefinition=task_def)
-                    container_defs = td_desc["taskDefinition"]["containerDefinitions"]
+                    container_defs = task_definitions[task_def]["containerDefinitions"]
                     print(f"     Task Definition: {task_def.split('/')[-1]}")
                     for container in container_defs:
                         print(f"       → Container: {container['name']}, Image: {container['image']}")
+                        images.add(container["image"], f"{cluster_name}/{service['serviceName']}")
+                        found = next(secrets)
+                        if found:
+                            print(f"         [WARN] Potential secret(s) in environment: {secret_scanner.describe(found)}")
+
+        # Scan findings are fetched once per distinct image digest
+        if images.owners or images.other_images:
+            print("\n  Container image scan results (per service):")
+            print_report(images.resolve(), indent="   ")
 
     except Exception as e:
         print(f"[ERROR] Failed to run ECS diagnostics: {e}")
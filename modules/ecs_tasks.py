@@ -0,0 +1,158 @@
+# modules/ecs_tasks.py
+import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import aws_session
+
+# list_tasks pages and describe_tasks batches both hold up to 100 tasks
+DESCRIBE_TASKS_BATCH = 100
+DEFAULT_WORKERS = 8
+
+# (signature, pattern) checked in order against the stop code, stopped reason
+# and container reasons of a stopped task; the first match wins.
+SIGNATURES = [
+    ("Out of memory", re.compile(r"OutOfMemory|\bOOM\b", re.I)),
+    ("Image pull failure", re.compile(r"CannotPullContainer|pull image|manifest .*not found|ImagePull", re.I)),
+    ("Secrets or log configuration", re.compile(r"ResourceInitializationError|unable to (?:pull|retrieve) secrets|\bssm\b|secretsmanager", re.I)),
+    ("Health check failure", re.compile(r"health ?checks?", re.I)),
+    ("Container failed to start", re.compile(r"CannotStartContainer|CannotCreateContainer|CannotInspectContainer|TaskFailedToStart", re.I)),
+    ("Spot interruption", re.compile(r"SpotInterruption|Spot Task was interrupted", re.I)),
+    ("Container instance lost", re.compile(r"Host EC2|TerminationNotice|instance .*(?:terminated|stopped)", re.I)),
+]
+
+# Stops initiated by deployments, scaling and users are routine, not failures
+ROUTINE = re.compile(r"Scaling activity initiated|deployment|UserInitiated|Task stopped by user", re.I)
+
+# OOM kills without an OutOfMemoryError reason surface as exit code 137
+OOM_EXIT_CODE = 137
+
+# Ids, addresses and numbers removed so similar reasons group together
+_VOLATILE = re.compile(r"\b(?:[0-9a-f]{8,}|i-[0-9a-f]+|\d+(?:\.\d+)*)\b")
+
+
+def _reasons(task):
+    reasons = [task.get("stopCode", ""), task.get("stoppedReason", "")]
+    reasons.extend(c.get("reason", "") for c in task.get("containers", []))
+    return " | ".join(r for r in reasons if r)
+
+
+def classify(task):
+    # Returns the failure signature of a stopped task, or None for routine stops
+    text = _reasons(task)
+    for signature, pattern in SIGNATURES:
+        if pattern.search(text):
+            return signature
+    # Containers killed at the end of a routine stop also exit with 137
+    if ROUTINE.search(task.get("stoppedReason", "")):
+        return None
+    if any(c.get("exitCode") == OOM_EXIT_CODE for c in task.get("containers", [])):
+        return "Out of memory (exit code 137)"
+    failed = [c for c in task.get("containers", []) if c.get("exitCode") not in (None, 0)]
+    if failed:
+        codes = ", ".join(sorted({str(c["exitCode"]) for c in failed}))
+        return f"Container exited with code {codes}"
+    reason = task.get("stoppedReason") or task.get("stopCode")
+    return _VOLATILE.sub("#", reason) if reason else "Stopped without a reason"
+
+
+def owner(task):
+    # Service tasks carry group "service:<name>"; run_task and scheduled tasks do not
+    group = task.get("group", "")
+    if group.startswith("service:"):
+        return group[len("service:"):]
+    return None
+
+
+class ServiceTasks:
+    def __init__(self):
+        self.running = 0
+        self.pending = 0
+        self.unhealthy = 0
+        self.stopped = 0
+        self.failures = Counter()
+        # signature -> containers seen failing with it
+        self.containers = defaultdict(set)
+
+
+class ClusterTasks:
+    def __init__(self, cluster_arn):
+        self.cluster_arn = cluster_arn
+        self.services = defaultdict(ServiceTasks)
+        self.standalone = ServiceTasks()
+        self.calls = 0
+        self.error = None
+
+    def for_service(self, name):
+        return self.services.get(name) or ServiceTasks()
+
+    def add(self, task):
+        name = owner(task)
+        stats = self.services[name] if name else self.standalone
+        status = task.get("lastStatus")
+        if task.get("desiredStatus") == "STOPPED":
+            stats.stopped += 1
+            signature = classify(task)
+            if signature:
+                stats.failures[signature] += 1
+                for container in task.get("containers", []):
+                    if container.get("reason") or container.get("exitCode") not in (None, 0):
+                        stats.containers[signature].add(container.get("name", "?"))
+        elif status == "RUNNING":
+            stats.running += 1
+            if task.get("healthStatus") == "UNHEALTHY":
+                stats.unhealthy += 1
+        else:
+            stats.pending += 1
+
+
+def _collect(cluster_arn):
+    # One list_tasks page of up to 100 arns becomes one describe_tasks call
+    ecs = aws_session.client("ecs")
+    result = ClusterTasks(cluster_arn)
+    try:
+        for desired_status in ("RUNNING", "STOPPED"):
+            paginator = ecs.get_paginator("list_tasks")
+            for page in paginator.paginate(
+                cluster=cluster_arn, desiredStatus=desired_status, PaginationConfig={"PageSize": DESCRIBE_TASKS_BATCH}
+            ):
+                result.calls += 1
+                arns = page.get("taskArns", [])
+                for start in range(0, len(arns), DESCRIBE_TASKS_BATCH):
+                    response = ecs.describe_tasks(cluster=cluster_arn, tasks=arns[start:start + DESCRIBE_TASKS_BATCH])
+                    result.calls += 1
+                    for task in response.get("tasks", []):
+                        result.add(task)
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def collect(cluster_arns, workers=None):
+    # Clusters are listed and described concurrently; returns {cluster_arn: ClusterTasks}
+    workers = workers or int(os.getenv("ECS_TASK_WORKERS", str(DEFAULT_WORKERS)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(cluster_arns, pool.map(_collect, cluster_arns)))
+
+
+def print_service(stats, desired, indent="     "):
+    health = f" ({stats.unhealthy} unhealthy)" if stats.unhealthy else ""
+    pending = f", {stats.pending} pending" if stats.pending else ""
+    print(f"{indent}Tasks: {stats.running} running{health}{pending}, {stats.stopped} recently stopped")
+    if stats.running < desired and not stats.failures:
+        print(f"{indent}[INFO] Running below desired count with no failed tasks retained; check service events.")
+    for signature, count in stats.failures.most_common():
+        containers = ", ".join(sorted(stats.containers.get(signature, ()))) or "?"
+        print(f"{indent}[WARN] {signature}: {count} stopped task(s) (containers: {containers})")
+
+
+def print_cluster(result, indent="   "):
+    if result.error:
+        print(f"{indent}[ERROR] Task diagnostics failed: {result.error}")
+        return
+    standalone = result.standalone
+    if standalone.running or standalone.stopped or standalone.pending:
+        print(f"{indent}- Standalone tasks (not part of a service):")
+        print_service(standalone, 0)
+    print(f"{indent}[INFO] Task diagnostics used {result.calls} API call(s); ECS keeps stopped tasks for about an hour.")
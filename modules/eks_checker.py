@@ -1,24 +1,22 @@
-import boto3
-import os
-from dotenv import load_dotenv
+import time
+from modules import aws_session, inventory, prefetch
+from modules.vpc_topology import PUBLIC
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("vpc.topology",)
 
 def run_check():
     print("\n[INFO] Starting EKS diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        eks = session.client("eks")
+        eks = aws_session.client("eks")
+        topology = None
+        started = time.time()
 
         clusters = eks.list_clusters().get("clusters", [])
         if not clusters:
             print("  No EKS clusters found.")
+            inventory.prune("eks:cluster", started)
             return
 
         print(f"  Found {len(clusters)} cluster(s).")
@@ -26,6 +24,7 @@ def run_check():
         for cluster_name in clusters:
             print(f"\n  Cluster: {cluster_name}")
             desc = eks.describe_cluster(name=cluster_name)["cluster"]
+            inventory.record(inventory.eks_cluster(desc))
 
             status = desc.get("status")
             version = desc.get("version")
@@ -50,8 +49,14 @@ def run_check():
             vpc_config = desc.get("resourcesVpcConfig", {})
             subnet_ids = vpc_config.get("subnetIds", [])
             sg_ids = vpc_config.get("securityGroupIds", [])
-            print(f"   → VPC Subnets: {', '.join(subnet_ids)}")
+            if topology is None:
+                topology = prefetch.get("vpc.topology")
+            print(f"   → VPC Subnets: {topology.describe_subnets(subnet_ids)}")
+            if topology.placement(subnet_ids) == PUBLIC and vpc_config.get("endpointPublicAccess"):
+                print("   [WARN] Cluster uses public subnets and a public API endpoint.")
             print(f"   → Security Groups: {', '.join(sg_ids)}")
 
+        inventory.prune("eks:cluster", started)
+
     except Exception as e:
         print(f"[ERROR] Failed to run EKS diagnostics: {e}")
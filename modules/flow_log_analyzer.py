@@ -0,0 +1,323 @@
+# modules/flow_log_analyzer.py
+import gzip
+import io
+import ipaddress
+import os
+import re
+from collections import Counter
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from modules.common import NON_INTERNET_CIDRS, fmt_bytes
+
+DEFAULT_FORMAT = (
+    "${version} ${account-id} ${interface-id} ${srcaddr} ${dstaddr} ${srcport} ${dstport} "
+    "${protocol} ${packets} ${bytes} ${start} ${end} ${action} ${log-status}"
+)
+REQUIRED_FIELDS = ("srcaddr", "dstaddr", "dstport", "bytes", "action")
+
+# Lines parsed into one set of column arrays (a few MB per batch)
+BATCH_LINES = 50_000
+# Distinct (source, destination) pairs kept across batches before the lighter half is dropped
+PAIR_LIMIT = 100_000
+TOP_N = 10
+# Longer fields cannot be an address, port, byte count or action; such lines are malformed
+MAX_FIELD_BYTES = 64
+
+
+def parse_format(log_format):
+    return re.findall(r"\$\{([^}]+)\}", log_format or DEFAULT_FORMAT)
+
+
+def _intervals(cidrs):
+    # Sorted, merged [start, end] uint32 intervals for vectorized membership tests
+    spans = []
+    for cidr in cidrs:
+        network = ipaddress.ip_network(cidr, strict=False)
+        if network.version == 4:
+            spans.append((int(network.network_address), int(network.broadcast_address)))
+    spans.sort()
+    merged = []
+    for lo, hi in spans:
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    starts = np.array([lo for lo, _ in merged], dtype=np.int64)
+    ends = np.array([hi for _, hi in merged], dtype=np.int64)
+    return starts, ends
+
+
+def _in_intervals(values, intervals):
+    starts, ends = intervals
+    if len(starts) == 0:
+        return np.zeros(len(values), dtype=bool)
+    idx = np.searchsorted(starts, values, side="right") - 1
+    found = idx >= 0
+    found[found] = values[found] <= ends[idx[found]]
+    return found & (values >= 0)
+
+
+def _ipv4_ints(addresses):
+    # Dotted-quad byte strings as integers for interval tests; IPv6 and "-" become -1.
+    # Decoded one character column at a time (at most 15), not one address at a time.
+    converted = np.full(len(addresses), -1, dtype=np.int64)
+    short = np.char.str_len(addresses) <= 15
+    chars = addresses[short].astype("S15").view(np.uint8).reshape(-1, 15).astype(np.int64)
+    rows = np.arange(len(chars))
+    octets = np.zeros((len(chars), 4), dtype=np.int64)
+    digits = np.zeros((len(chars), 4), dtype=np.int64)
+    octet = np.zeros(len(chars), dtype=np.int64)
+    valid = np.ones(len(chars), dtype=bool)
+    for column in chars.T:
+        is_digit = (column >= 48) & (column <= 57)
+        is_dot = column == 46
+        valid &= is_digit | is_dot | (column == 0)
+        at = np.minimum(octet, 3)
+        octets[rows, at] = np.where(is_digit, octets[rows, at] * 10 + column - 48, octets[rows, at])
+        digits[rows, at] += is_digit
+        octet += is_dot
+    valid &= (octet == 3) & (digits >= 1).all(axis=1) & (digits <= 3).all(axis=1) & (octets <= 255).all(axis=1)
+    # Leading zeros are ambiguous (octal in some parsers) and rejected, as ipaddress does
+    valid &= ~((digits > 1) & (octets < 10 ** np.maximum(digits - 1, 0))).any(axis=1)
+    values = octets @ np.array([1 << 24, 1 << 16, 1 << 8, 1], dtype=np.int64)
+    converted[np.flatnonzero(short)[valid]] = values[valid]
+    return converted
+
+
+def _column(raw, starts, ends, tokens):
+    # The given tokens as a fixed-width byte-string array, gathered from the buffer
+    if not len(tokens):
+        return np.array([], dtype="S1")
+    lengths = np.minimum(ends[tokens] - starts[tokens], MAX_FIELD_BYTES)
+    size = max(int(lengths.max()), 1)
+    offsets = np.arange(size)
+    at = np.minimum(starts[tokens][:, None] + offsets, len(raw) - 1)
+    chars = np.where(offsets < lengths[:, None], raw[at], 0).astype(np.uint8)
+    return chars.view(f"S{size}").ravel()
+
+
+def _numeric(column):
+    # Digits short enough for int64, or "-" for records without data
+    return (np.char.isdigit(column) & (np.char.str_len(column) <= 18)) | (column == b"-")
+
+
+def _counts(column):
+    return np.where(column == b"-", b"0", column).astype(np.int64)
+
+
+class FlowAggregates:
+    def __init__(self, private_cidrs=()):
+        self.records = 0
+        self.files = 0
+        self.skipped = 0
+        self.total_bytes = 0
+        self.talkers = Counter()
+        self.pairs = Counter()
+        self.pairs_pruned = False
+        self.rejected_ports = np.zeros(65536, dtype=np.int64)
+        self.egress_bytes = 0
+        self.egress_pairs = Counter()
+        self._private = _intervals(private_cidrs)
+        self._non_internet = _intervals(NON_INTERNET_CIDRS)
+
+    def add_batch(self, lines, fields):
+        # The whole batch is tokenized at once on the raw bytes: fields per line,
+        # width, status and numeric checks are array masks, the columns used are
+        # gathered into byte-string arrays and addresses become np.unique codes.
+        width = len(fields)
+        src_at, dst_at = fields.index("srcaddr"), fields.index("dstaddr")
+        bytes_at, port_at, action_at = fields.index("bytes"), fields.index("dstport"), fields.index("action")
+        status_at = fields.index("log-status") if "log-status" in fields else None
+
+        data = "".join(lines).encode()
+        raw = np.frombuffer(data, dtype=np.uint8)
+        # Same separators as bytes.split(): space, \t, \n, \v, \f and \r
+        space = (raw == 32) | ((raw >= 9) & (raw <= 13))
+        # Fields start and end wherever whitespace stops and starts
+        edges = np.flatnonzero(space[:-1] != space[1:]) + 1
+        if len(raw) and not space[0]:
+            edges = np.concatenate([[0], edges])
+        if len(raw) and not space[-1]:
+            edges = np.append(edges, len(raw))
+        starts, ends = edges[0::2], edges[1::2]
+        line_ends = np.append(np.flatnonzero(raw == ord("\n")), len(raw))
+        widths = np.diff(np.searchsorted(starts, line_ends), prepend=0)
+        complete = widths == width
+        # Blank lines are ignored; lines with the wrong field count are skipped
+        self.skipped += int(np.count_nonzero(~complete & (widths > 0)))
+        first = (np.cumsum(widths) - widths)[complete]
+
+        used = [src_at, dst_at, bytes_at, port_at, action_at]
+        fits = ((ends - starts)[first[:, None] + used] <= MAX_FIELD_BYTES).all(axis=1)
+        if status_at is not None:
+            # NODATA and SKIPDATA records carry "-" fields and are left out, not skipped
+            recorded = _column(raw, starts, ends, first + status_at) == b"OK"
+        else:
+            recorded = np.ones(len(first), dtype=bool)
+        size, port = _column(raw, starts, ends, first + bytes_at), _column(raw, starts, ends, first + port_at)
+        valid = fits & _numeric(size) & _numeric(port)
+        self.skipped += int(np.count_nonzero(recorded & ~valid))
+        keep = recorded & valid
+        if not keep.any():
+            return
+
+        size = _counts(size[keep])
+        port = np.clip(_counts(port[keep]), 0, 65535)
+        rejected = _column(raw, starts, ends, first[keep] + action_at) == b"REJECT"
+        endpoints = np.concatenate([
+            _column(raw, starts, ends, first[keep] + src_at),
+            _column(raw, starts, ends, first[keep] + dst_at),
+        ])
+        unique, codes = np.unique(endpoints, return_inverse=True)
+        addresses = [address.decode() for address in unique.tolist()]
+        codes = codes.reshape(-1).astype(np.int64)
+        src, dst = codes[:len(size)], codes[len(size):]
+
+        self.records += len(size)
+        self.total_bytes += int(size.sum())
+
+        # Top talkers and conversations via the address codes and bincount
+        by_source = np.bincount(src, weights=size, minlength=len(addresses))
+        for code in np.nonzero(by_source)[0]:
+            self.talkers[addresses[code]] += int(by_source[code])
+        self._add_pairs(self.pairs, addresses, src, dst, size)
+
+        self.rejected_ports += np.bincount(port[rejected], minlength=65536)
+
+        # Accepted traffic leaving private subnets for internet addresses
+        address_ints = _ipv4_ints(unique)
+        src_int = address_ints[src]
+        dst_int = address_ints[dst]
+        egress = (
+            ~rejected
+            & _in_intervals(src_int, self._private)
+            & (dst_int >= 0)
+            & ~_in_intervals(dst_int, self._non_internet)
+        )
+        if egress.any():
+            self.egress_bytes += int(size[egress].sum())
+            self._add_pairs(self.egress_pairs, addresses, src[egress], dst[egress], size[egress])
+
+    def _add_pairs(self, counter, addresses, src, dst, size):
+        keys = src * len(addresses) + dst
+        pair_keys, pair_inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(pair_inverse, weights=size)
+        pair_src, pair_dst = np.divmod(pair_keys, len(addresses))
+        for s, d, total in zip(pair_src.tolist(), pair_dst.tolist(), sums.tolist()):
+            counter[(addresses[s], addresses[d])] += int(total)
+        if len(counter) > PAIR_LIMIT:
+            # Memory stays bounded by dropping the lighter half; the report says totals are approximate
+            kept = counter.most_common(PAIR_LIMIT // 2)
+            counter.clear()
+            counter.update(dict(kept))
+            self.pairs_pruned = True
+
+
+def iter_line_batches(stream):
+    while True:
+        lines = list(islice(stream, BATCH_LINES))
+        if not lines:
+            return
+        yield lines
+
+
+def analyze_stream(aggregates, raw, name, fields):
+    binary = gzip.GzipFile(fileobj=raw) if name.endswith(".gz") else raw
+    text = io.TextIOWrapper(binary, encoding="utf-8")
+    first_line = text.readline()
+    tokens = first_line.split()
+    # Files delivered to S3 start with a header naming the fields; it overrides the configured format
+    if tokens and all(field in tokens for field in REQUIRED_FIELDS):
+        fields = tokens
+        first_line = ""
+    if not all(field in fields for field in REQUIRED_FIELDS):
+        aggregates.skipped += 1
+        return
+    if first_line:
+        aggregates.add_batch([first_line], fields)
+    for batch in iter_line_batches(text):
+        aggregates.add_batch(batch, fields)
+    aggregates.files += 1
+
+
+def analyze_local(aggregates, root, fields):
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if filename.endswith(".log.gz") or filename.endswith(".log") or filename.endswith(".txt"):
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as raw:
+                    analyze_stream(aggregates, raw, path, fields)
+
+
+def _child_prefixes(s3, bucket, prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        for common in page.get("CommonPrefixes", []):
+            yield common["Prefix"]
+
+
+def s3_destination(flow_log):
+    # arn:aws:s3:::bucket/optional/prefix
+    arn = flow_log.get("LogDestination", "")
+    path = arn.split(":::", 1)[-1]
+    bucket, _, prefix = path.partition("/")
+    return bucket, prefix.strip("/")
+
+
+def analyze_s3(aggregates, s3, flow_log, days=1):
+    bucket, prefix = s3_destination(flow_log)
+    fields = parse_format(flow_log.get("LogFormat"))
+    root = f"{prefix}/AWSLogs/" if prefix else "AWSLogs/"
+    today = datetime.now(timezone.utc).date()
+    day_paths = [(today - timedelta(days=n)).strftime("%Y/%m/%d/") for n in range(days)]
+
+    paginator = s3.get_paginator("list_objects_v2")
+    for account_prefix in _child_prefixes(s3, bucket, root):
+        for region_prefix in _child_prefixes(s3, bucket, account_prefix + "vpcflowlogs/"):
+            for day_path in day_paths:
+                for page in paginator.paginate(Bucket=bucket, Prefix=region_prefix + day_path):
+                    for obj in page.get("Contents", []):
+                        key = obj["Key"]
+                        # Only files written by this flow log
+                        if flow_log["FlowLogId"] not in key or key.endswith(".parquet"):
+                            continue
+                        body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+                        try:
+                            analyze_stream(aggregates, body, key, fields)
+                        finally:
+                            body.close()
+
+
+def print_report(aggregates):
+    print(f"   Flow log analysis: {aggregates.records} record(s), {fmt_bytes(aggregates.total_bytes)} "
+          f"from {aggregates.files} file(s)")
+    if aggregates.skipped:
+        print(f"   Skipped {aggregates.skipped} malformed line(s) or unsupported file(s).")
+
+    if aggregates.talkers:
+        print("   Top talkers (bytes sent):")
+        for address, size in aggregates.talkers.most_common(TOP_N):
+            print(f"     - {address}: {fmt_bytes(size)}")
+
+    if aggregates.pairs:
+        print("   Top conversations:")
+        if aggregates.pairs_pruned:
+            print(f"    [INFO] Approximate: more than {PAIR_LIMIT} distinct pairs were seen, so only the heaviest "
+                  f"{PAIR_LIMIT // 2} were kept each time the limit was reached; totals are lower bounds.")
+        for (src, dst), size in aggregates.pairs.most_common(TOP_N):
+            print(f"     - {src} → {dst}: {fmt_bytes(size)}")
+
+    ports = np.argsort(aggregates.rejected_ports)[::-1][:TOP_N]
+    rejected = [(int(p), int(aggregates.rejected_ports[p])) for p in ports if aggregates.rejected_ports[p]]
+    if rejected:
+        print("   Rejected traffic by destination port:")
+        for port, count in rejected:
+            print(f"     - port {port}: {count} flow(s)")
+
+    if aggregates.egress_bytes:
+        print(f"   [WARN] {fmt_bytes(aggregates.egress_bytes)} sent from private subnets to internet addresses:")
+        for (src, dst), size in aggregates.egress_pairs.most_common(TOP_N):
+            print(f"     - {src} → {dst}: {fmt_bytes(size)}")
@@ -1,39 +1,59 @@
-import boto3
-import os
-from dotenv import load_dotenv
-from datetime import datetime, timezone, timedelta
-
-load_dotenv()
+import time
+from datetime import datetime, timezone
+from modules import aws_session, checkpoint, inventory
+from modules.iam_policy_engine import PermissionEngine, compile_policy
+
+# Actions that allow privilege escalation when granted on "*"
+SENSITIVE_ACTIONS = [
+    "iam:PassRole",
+    "iam:CreatePolicyVersion",
+    "iam:AttachUserPolicy",
+    "iam:AttachRolePolicy",
+    "iam:PutUserPolicy",
+    "iam:PutRolePolicy",
+    "iam:CreateAccessKey",
+    "iam:UpdateAssumeRolePolicy",
+    "sts:AssumeRole",
+]
 
 def policy_allows_admin(policy):
-    # Simple heuristic: look for "*" in Action and Resource to detect admin privileges
-    statements = policy.get("Statement", [])
-    if not isinstance(statements, list):
-        statements = [statements]
-    for stmt in statements:
-        if stmt.get("Effect") != "Allow":
-            continue
-        actions = stmt.get("Action", [])
-        resources = stmt.get("Resource", [])
-        if not isinstance(actions, list):
-            actions = [actions]
-        if not isinstance(resources, list):
-            resources = [resources]
-        if "*" in actions and "*" in resources:
-            return True
-    return False
+    # An Allow of every action on every resource, without NotAction or NotResource,
+    # that no Deny of every action on every resource takes back
+    compiled = compile_policy(policy)
+    return compiled.grants_all and not compiled.denies_all
+
+def report_privileges(engine):
+    roles = [p for p in engine.principals.values() if p.kind == "role"]
+    print(f"\n  Evaluated effective permissions for {len(engine.principals)} principal(s) ({len(roles)} role(s)).")
+
+    admins = engine.admins()
+    if admins:
+        print(f"  [WARN] {len(admins)} principal(s) with administrator access:")
+        for p in admins:
+            exceptions = engine.admin_exceptions(p)
+            print(f"    - {p.kind}: {p.name}" + (f" (except denied: {', '.join(exceptions)})" if exceptions else ""))
+    else:
+        print("  No principals with administrator access.")
+
+    # Who can perform privilege-escalation actions on any resource
+    for action in SENSITIVE_ACTIONS:
+        principals = [p for p in engine.who_can(action, "*") if not engine.is_admin(p)]
+        if principals:
+            names = ", ".join(f"{p.kind}:{p.name}" for p in principals)
+            print(f"  [WARN] {action} on * allowed for non-admin principal(s): {names}")
+
+def record_principals(engine):
+    started = time.time()
+    for principal in engine.principals.values():
+        inventory.record(inventory.iam_principal(principal, engine.is_admin(principal)))
+    for kind in ("user", "role"):
+        inventory.prune(f"iam:{kind}", started, region="")
 
 def run_check():
     print("\n[INFO] Starting IAM diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        iam = session.client("iam")
+        iam = aws_session.client("iam")
 
         # Check root MFA
         try:
@@ -57,36 +77,45 @@ def run_check():
         except Exception as e:
             print(f"  Could not retrieve password policy: {e}")
 
+        # Effective permissions for every user and role (through groups, inline and managed policies)
+        engine = None
+        try:
+            engine = PermissionEngine().load(iam)
+            record_principals(engine)
+        except Exception as e:
+            print(f"  Could not load account authorization details: {e}")
+
         # Get all users
         paginator = iam.get_paginator('list_users')
-        ninety_days_ago = datetime.now(timezone.utc) - timedelta(days=90)
         found_users = False
 
-        for page in paginator.paginate():
+        for page in checkpoint.paginate(paginator, "users"):
             users = page['Users']
             for user in users:
                 found_users = True
                 username = user['UserName']
                 print(f"\n  User: {username}")
 
-                # Check inline policies
-                inline_policies = iam.list_user_policies(UserName=username)["PolicyNames"]
-                if not inline_policies:
-                    print("   No inline policies.")
+                # Inline and managed policies come from the authorization details already loaded
+                principal = engine.principals.get(user["Arn"]) if engine else None
+                if principal is None:
+                    print("   Policies: not available (account authorization details could not be loaded)")
                 else:
-                    print(f"   Inline policies: {inline_policies}")
-
-                # Check managed policies
-                managed_policies = iam.list_attached_user_policies(UserName=username)["AttachedPolicies"]
-                managed_policy_names = [p["PolicyName"] for p in managed_policies]
-                if managed_policy_names:
-                    print(f"   Attached managed policies: {managed_policy_names}")
-                else:
-                    print("   No managed policies attached.")
-
-                # Warn if any admin policies attached
-                if "AdministratorAccess" in managed_policy_names:
-                    print("    [WARN] User has AdministratorAccess managed policy attached!")
+                    if not principal.inline_names:
+                        print("   No inline policies.")
+                    else:
+                        print(f"   Inline policies: {principal.inline_names}")
+                    if principal.managed_names:
+                        print(f"   Attached managed policies: {principal.managed_names}")
+                    else:
+                        print("   No managed policies attached.")
+
+                    # Warn if the user's effective permissions are administrative
+                    if engine.is_admin(principal):
+                        print("    [WARN] User has administrator access (via inline, managed or group policies)!")
+                        exceptions = engine.admin_exceptions(principal)
+                        if exceptions:
+                            print(f"    Denied despite administrator access: {', '.join(exceptions)}")
 
                 # Check access keys
                 keys = iam.list_access_keys(UserName=username)["AccessKeyMetadata"]
@@ -103,7 +132,7 @@ def run_check():
 
                 # Check if user has console login
                 try:
-                    login_profile = iam.get_login_profile(UserName=username)
+                    iam.get_login_profile(UserName=username)
                     has_console_access = True
                 except iam.exceptions.NoSuchEntityException:
                     has_console_access = False
@@ -129,8 +158,11 @@ def run_check():
                 if not has_console_access and keys:
                     print("    [WARN] User has no console login but has active access keys - review for security.")
 
-        if not found_users:
+        if not found_users and not checkpoint.resumed():
             print("  No IAM users found.")
 
+        if engine:
+            report_privileges(engine)
+
     except Exception as e:
         print(f"[ERROR] Failed to run IAM diagnostics: {e}")
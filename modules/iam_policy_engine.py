@@ -0,0 +1,251 @@
+# modules/iam_policy_engine.py
+import hashlib
+import json
+import re
+from urllib.parse import unquote
+
+# Evaluation over-approximates access: Allow statements with a Condition are
+# treated as granting, while conditional Deny statements are not treated as a
+# definite deny. That is the safe direction for an audit.
+
+ALLOW = "Allow"
+DENY = "Deny"
+
+# Action patterns that grant every action in every service
+ALL_ACTIONS = ("*", "*:*")
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _wildcard_regex(patterns, ignore_case):
+    # IAM wildcards: "*" matches any sequence, "?" matches a single character
+    parts = []
+    for pattern in patterns:
+        parts.append("".join(
+            ".*" if ch == "*" else "." if ch == "?" else re.escape(ch)
+            for ch in str(pattern)
+        ))
+    flags = re.IGNORECASE | re.DOTALL if ignore_case else re.DOTALL
+    return re.compile("(?:" + "|".join(parts) + r")\Z", flags)
+
+
+def _load_document(document):
+    # IAM may hand back URL-encoded JSON strings instead of parsed documents
+    if isinstance(document, str):
+        document = json.loads(unquote(document))
+    return document or {}
+
+
+def document_hash(document):
+    canonical = json.dumps(_load_document(document), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompiledStatement:
+    def __init__(self, stmt):
+        self.effect = stmt.get("Effect", ALLOW)
+        self.sid = stmt.get("Sid")
+        self.conditional = bool(stmt.get("Condition"))
+
+        if "NotAction" in stmt:
+            self.not_action = True
+            actions = _as_list(stmt["NotAction"])
+        else:
+            self.not_action = False
+            actions = _as_list(stmt.get("Action"))
+        self.actions = [str(a) for a in actions]
+        self.action_re = _wildcard_regex(actions, ignore_case=True)
+
+        if "NotResource" in stmt:
+            self.not_resource = True
+            resources = _as_list(stmt["NotResource"])
+        else:
+            self.not_resource = False
+            # Identity policies always carry a Resource; treat a missing one as "*"
+            resources = _as_list(stmt.get("Resource", "*"))
+        self.resource_re = _wildcard_regex(resources, ignore_case=False)
+
+        # Every action on every resource, decided from the patterns themselves: a
+        # NotAction or NotResource always leaves something out
+        self.all_access = (
+            not self.not_action and not self.not_resource
+            and any(a in ALL_ACTIONS for a in actions) and "*" in resources
+        )
+
+    def applies(self, action, resource):
+        if bool(self.action_re.match(action)) == self.not_action:
+            return False
+        return bool(self.resource_re.match(resource)) != self.not_resource
+
+
+class CompiledPolicy:
+    def __init__(self, doc_hash, document):
+        self.hash = doc_hash
+        statements = _as_list(document.get("Statement"))
+        compiled = [CompiledStatement(stmt) for stmt in statements if isinstance(stmt, dict)]
+        self.allows = [s for s in compiled if s.effect == ALLOW]
+        # Conditional denies cannot be proven to apply, so they never win
+        self.denies = [s for s in compiled if s.effect == DENY and not s.conditional]
+        self.grants_all = any(s.all_access for s in self.allows)
+        self.denies_all = any(s.all_access for s in self.denies)
+        self._decisions = {}
+
+    def evaluate(self, action, resource="*"):
+        # Returns DENY, ALLOW or None (no statement applies)
+        key = (action, resource)
+        decision = self._decisions.get(key, False)
+        if decision is not False:
+            return decision
+
+        decision = None
+        if any(s.applies(action, resource) for s in self.denies):
+            decision = DENY
+        elif any(s.applies(action, resource) for s in self.allows):
+            decision = ALLOW
+        self._decisions[key] = decision
+        return decision
+
+
+_compiled_policies = {}
+
+
+def compile_policy(document):
+    # Memoized by document hash so identical documents are parsed only once
+    document = _load_document(document)
+    doc_hash = document_hash(document)
+    policy = _compiled_policies.get(doc_hash)
+    if policy is None:
+        policy = CompiledPolicy(doc_hash, document)
+        _compiled_policies[doc_hash] = policy
+    return policy
+
+
+def evaluate_policies(policies, action, resource="*"):
+    allowed = False
+    for policy in policies:
+        decision = policy.evaluate(action, resource)
+        if decision == DENY:
+            return DENY
+        if decision == ALLOW:
+            allowed = True
+    return ALLOW if allowed else None
+
+
+class Principal:
+    def __init__(self, kind, name, arn, policies, inline_names=(), managed_names=()):
+        self.kind = kind
+        self.name = name
+        self.arn = arn
+        # Policies attached directly to the principal, as listed by IAM
+        self.inline_names = list(inline_names)
+        self.managed_names = list(managed_names)
+        # Distinct compiled policies, ordered so equal sets share one key
+        unique = {p.hash: p for p in policies}
+        self.policy_key = tuple(sorted(unique))
+        self.policies = [unique[h] for h in self.policy_key]
+
+
+class PermissionEngine:
+    def __init__(self):
+        self.principals = {}
+        self._policy_sets = {}
+        self._set_decisions = {}
+
+    def load(self, iam):
+        # One paginated call returns users, groups, roles and managed policy versions
+        managed = {}
+        groups = {}
+        users = []
+        roles = []
+
+        paginator = iam.get_paginator("get_account_authorization_details")
+        for page in paginator.paginate(Filter=["User", "Group", "Role", "LocalManagedPolicy", "AWSManagedPolicy"]):
+            for policy in page.get("Policies", []):
+                for version in policy.get("PolicyVersionList", []):
+                    if version.get("IsDefaultVersion"):
+                        managed[policy["Arn"]] = compile_policy(version["Document"])
+            for group in page.get("GroupDetailList", []):
+                groups[group["GroupName"]] = group
+            users.extend(page.get("UserDetailList", []))
+            roles.extend(page.get("RoleDetailList", []))
+
+        def attached(detail, inline_key):
+            policies = [compile_policy(p["PolicyDocument"]) for p in detail.get(inline_key, [])]
+            for ref in detail.get("AttachedManagedPolicies", []):
+                if ref["PolicyArn"] in managed:
+                    policies.append(managed[ref["PolicyArn"]])
+            return policies
+
+        group_policies = {name: attached(group, "GroupPolicyList") for name, group in groups.items()}
+
+        def names(detail, inline_key):
+            return (
+                [p["PolicyName"] for p in detail.get(inline_key, [])],
+                [ref["PolicyName"] for ref in detail.get("AttachedManagedPolicies", [])],
+            )
+
+        for user in users:
+            policies = attached(user, "UserPolicyList")
+            for group_name in user.get("GroupList", []):
+                policies.extend(group_policies.get(group_name, []))
+            self.add_principal(Principal("user", user["UserName"], user["Arn"], policies, *names(user, "UserPolicyList")))
+
+        for role in roles:
+            policies = attached(role, "RolePolicyList")
+            self.add_principal(Principal("role", role["RoleName"], role["Arn"], policies, *names(role, "RolePolicyList")))
+
+        return self
+
+    def add_principal(self, principal):
+        self.principals[principal.arn] = principal
+        self._policy_sets.setdefault(principal.policy_key, []).append(principal)
+
+    def _decide(self, principal, action, resource):
+        key = (principal.policy_key, action, resource)
+        if key not in self._set_decisions:
+            self._set_decisions[key] = evaluate_policies(principal.policies, action, resource)
+        return self._set_decisions[key]
+
+    def is_allowed(self, principal, action, resource="*"):
+        return self._decide(principal, action, resource) == ALLOW
+
+    def is_admin(self, principal):
+        # "*" is a pattern, not an action name, so admin is decided by comparing
+        # patterns: some Allow must grant everything and no Deny may take it all
+        # back. Narrower denies leave the principal an admin (see admin_exceptions).
+        key = (principal.policy_key, "admin")
+        if key not in self._set_decisions:
+            self._set_decisions[key] = (
+                any(p.grants_all for p in principal.policies)
+                and not any(p.denies_all for p in principal.policies)
+            )
+        return self._set_decisions[key]
+
+    def admin_exceptions(self, principal):
+        # Action patterns carved out of an admin's access by unconditional denies
+        return sorted({
+            f"all but {action}" if statement.not_action else action
+            for policy in principal.policies for statement in policy.denies for action in statement.actions
+        })
+
+    def admins(self):
+        found = []
+        for members in self._policy_sets.values():
+            if self.is_admin(members[0]):
+                found.extend(members)
+        return sorted(found, key=lambda p: (p.kind, p.name))
+
+    def who_can(self, action, resource="*"):
+        # Principals sharing an identical policy set are evaluated once
+        found = []
+        for members in self._policy_sets.values():
+            if self._decide(members[0], action, resource) == ALLOW:
+                found.extend(members)
+        return sorted(found, key=lambda p: (p.kind, p.name))
+
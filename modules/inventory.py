@@ -0,0 +1,390 @@
+# modules/inventory.py
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from modules import aws_session
+
+DEFAULT_PATH = ".toolkit_inventory.db"
+
+# Pending records are written in one transaction once this many accumulate
+FLUSH_EVERY = 500
+
+# Flags recorded by checkers and used by the cross-service queries
+ADMIN = "admin"
+INTERNET_OPEN = "internet-open"
+PUBLIC = "public"
+
+ATTACHED_TO = "attached-to"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    arn TEXT PRIMARY KEY,
+    resource_type TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    name TEXT,
+    region TEXT NOT NULL,
+    vpc_id TEXT,
+    role_arn TEXT,
+    state TEXT,
+    encrypted INTEGER,
+    attributes TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resources_by_type ON resources (resource_type, region);
+CREATE INDEX IF NOT EXISTS resources_by_id ON resources (resource_id);
+CREATE INDEX IF NOT EXISTS resources_by_vpc ON resources (vpc_id);
+CREATE INDEX IF NOT EXISTS resources_by_role ON resources (role_arn);
+
+CREATE TABLE IF NOT EXISTS resource_subnets (
+    arn TEXT NOT NULL,
+    subnet_id TEXT NOT NULL,
+    PRIMARY KEY (arn, subnet_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resource_subnets_by_subnet ON resource_subnets (subnet_id);
+
+CREATE TABLE IF NOT EXISTS resource_security_groups (
+    arn TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    PRIMARY KEY (arn, group_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resource_security_groups_by_group ON resource_security_groups (group_id);
+
+CREATE TABLE IF NOT EXISTS resource_links (
+    arn TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    target TEXT NOT NULL,
+    PRIMARY KEY (arn, relation, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resource_links_by_target ON resource_links (target, relation);
+
+CREATE TABLE IF NOT EXISTS resource_flags (
+    arn TEXT NOT NULL,
+    flag TEXT NOT NULL,
+    PRIMARY KEY (arn, flag)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resource_flags_by_flag ON resource_flags (flag);
+"""
+
+CHILD_TABLES = ("resource_subnets", "resource_security_groups", "resource_links", "resource_flags")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def make_record(resource_type, arn, resource_id, name=None, region=None, vpc_id=None, role_arn=None,
+                state=None, encrypted=None, subnets=(), security_groups=(), links=(), flags=(), **attributes):
+    # One normalized, compact row per resource; list-valued relations go to the indexed side tables
+    return {
+        "arn": arn,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "name": name,
+        "region": aws_session.region() if region is None else region,
+        "vpc_id": vpc_id,
+        "role_arn": role_arn,
+        "state": state,
+        "encrypted": None if encrypted is None else int(bool(encrypted)),
+        "subnets": sorted(set(filter(None, subnets))),
+        "security_groups": sorted(set(filter(None, security_groups))),
+        "links": sorted(set(links)),
+        "flags": sorted(set(flags)),
+        "attributes": {k: v for k, v in attributes.items() if v is not None},
+    }
+
+
+def ec2_arn(resource, resource_id, owner_id=None, region=None):
+    region = region or aws_session.region()
+    return f"arn:aws:ec2:{region}:{owner_id or aws_session.account_id()}:{resource}/{resource_id}"
+
+
+class InventoryStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def put(self, record):
+        with self._lock:
+            self._pending.append(record)
+            if len(self._pending) >= FLUSH_EVERY:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            records, self._pending = self._pending, []
+            now = time.time()
+            arns = [(r["arn"],) for r in records]
+            with self._conn:
+                for table in CHILD_TABLES:
+                    self._conn.executemany(f"DELETE FROM {table} WHERE arn = ?", arns)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO resources (arn, resource_type, resource_id, name, region, vpc_id, "
+                    "role_arn, state, encrypted, attributes, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(r["arn"], r["resource_type"], r["resource_id"], r["name"], r["region"], r["vpc_id"],
+                      r["role_arn"], r["state"], r["encrypted"], json.dumps(r["attributes"], default=str), now)
+                     for r in records],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO resource_subnets VALUES (?, ?)",
+                    [(r["arn"], s) for r in records for s in r["subnets"]],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO resource_security_groups VALUES (?, ?)",
+                    [(r["arn"], g) for r in records for g in r["security_groups"]],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO resource_links VALUES (?, ?, ?)",
+                    [(r["arn"], relation, target) for r in records for relation, target in r["links"]],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO resource_flags VALUES (?, ?)",
+                    [(r["arn"], f) for r in records for f in r["flags"]],
+                )
+
+    def prune(self, resource_type, since, region=None):
+        # Drops resources of one type that a complete listing started at `since` did not see again.
+        # Only this account's resources are listed, so other accounts' records (AWS Config
+        # aggregator) are kept.
+        region = aws_session.region() if region is None else region
+        account = f":{aws_session.account_id()}:"
+        with self._lock:
+            self.flush()
+            with self._conn:
+                stale = [row[0] for row in self._conn.execute(
+                    "SELECT arn FROM resources WHERE resource_type = ? AND region = ? AND seen_at < ? AND instr(arn, ?) > 0",
+                    (resource_type, region, since, account))]
+                params = [(arn,) for arn in stale]
+                for table in CHILD_TABLES + ("resources",):
+                    self._conn.executemany(f"DELETE FROM {table} WHERE arn = ?", params)
+            return len(stale)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            self.flush()
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    # Index lookups
+
+    def get(self, arn):
+        rows = self.query("SELECT * FROM resources WHERE arn = ?", (arn,))
+        return rows[0] if rows else None
+
+    def by_type(self, resource_type):
+        return self.query("SELECT * FROM resources WHERE resource_type = ?", (resource_type,))
+
+    def by_vpc(self, vpc_id):
+        return self.query("SELECT * FROM resources WHERE vpc_id = ?", (vpc_id,))
+
+    def by_role(self, role_arn):
+        return self.query("SELECT * FROM resources WHERE role_arn = ?", (role_arn,))
+
+    def by_subnet(self, subnet_id):
+        return self.query(
+            "SELECT r.* FROM resource_subnets s JOIN resources r ON r.arn = s.arn WHERE s.subnet_id = ?",
+            (subnet_id,))
+
+    def by_security_group(self, group_id):
+        return self.query(
+            "SELECT r.* FROM resource_security_groups g JOIN resources r ON r.arn = g.arn WHERE g.group_id = ?",
+            (group_id,))
+
+    def counts(self):
+        return self.query(
+            "SELECT resource_type, COUNT(*) AS count FROM resources GROUP BY resource_type ORDER BY resource_type")
+
+    # Cross-service joins
+
+    def workloads_with_admin_roles(self):
+        return self.query(
+            "SELECT r.resource_type, r.name, r.arn, r.role_arn FROM resources r "
+            "JOIN resource_flags f ON f.arn = r.role_arn AND f.flag = ? "
+            "WHERE r.resource_type NOT LIKE 'iam:%' ORDER BY r.resource_type, r.name",
+            (ADMIN,))
+
+    def resources_in_open_security_groups(self):
+        return self.query(
+            "SELECT r.resource_type, r.name, r.arn, g.group_id FROM resource_security_groups g "
+            "JOIN resources r ON r.arn = g.arn "
+            "JOIN resources sg ON sg.resource_id = g.group_id AND sg.resource_type = 'ec2:security-group' "
+            "JOIN resource_flags f ON f.arn = sg.arn AND f.flag = ? "
+            "ORDER BY r.resource_type, r.name",
+            (INTERNET_OPEN,))
+
+    def unencrypted_volumes_on_running_instances(self):
+        return self.query(
+            "SELECT v.resource_id AS volume_id, i.resource_id AS instance_id, i.name AS instance_name "
+            "FROM resources v JOIN resource_links l ON l.arn = v.arn AND l.relation = ? "
+            "JOIN resources i ON i.arn = l.target "
+            "WHERE v.resource_type = 'ec2:volume' AND v.encrypted = 0 AND i.state = 'running' "
+            "ORDER BY i.resource_id",
+            (ATTACHED_TO,))
+
+
+def store():
+    # One store per process, shared by every checker; INVENTORY_DB=:memory: keeps nothing on disk.
+    # Records still pending below FLUSH_EVERY are written when the process exits.
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = InventoryStore(os.getenv("INVENTORY_DB") or DEFAULT_PATH)
+            atexit.register(_store.close)
+        return _store
+
+
+def record(resource):
+    store().put(resource)
+
+
+def prune(resource_type, since, region=None):
+    return store().prune(resource_type, since, region)
+
+
+# Normalizers for the API shapes the checkers already fetch
+
+def _tag_name(tags):
+    for tag in tags or []:
+        if tag.get("Key") == "Name":
+            return tag.get("Value")
+    return None
+
+
+def instance_profile_roles(profiles):
+    # Instance profile ARN -> ARN of the role it passes to instances (a profile holds at most one)
+    return {profile["Arn"]: profile["Roles"][0]["Arn"] for profile in profiles if profile.get("Roles")}
+
+
+def ec2_instance(instance, owner_id=None, region=None, role_arn=None):
+    instance_id = instance["InstanceId"]
+    return make_record(
+        "ec2:instance",
+        ec2_arn("instance", instance_id, owner_id, region),
+        instance_id,
+        region=region,
+        name=_tag_name(instance.get("Tags")),
+        vpc_id=instance.get("VpcId"),
+        role_arn=role_arn,
+        state=instance.get("State", {}).get("Name"),
+        subnets=[instance.get("SubnetId")],
+        security_groups=[g["GroupId"] for g in instance.get("SecurityGroups", [])],
+        flags=[PUBLIC] if instance.get("PublicIpAddress") else [],
+        instance_type=instance.get("InstanceType"),
+        instance_profile=instance.get("IamInstanceProfile", {}).get("Arn"),
+    )
+
+
+def ebs_volume(volume, owner_id=None, region=None):
+    volume_id = volume["VolumeId"]
+    return make_record(
+        "ec2:volume",
+        ec2_arn("volume", volume_id, owner_id, region),
+        volume_id,
+        region=region,
+        name=_tag_name(volume.get("Tags")),
+        state=volume.get("State"),
+        encrypted=volume.get("Encrypted", False),
+        links=[(ATTACHED_TO, ec2_arn("instance", a["InstanceId"], owner_id, region))
+               for a in volume.get("Attachments", []) if a.get("InstanceId")],
+        volume_type=volume.get("VolumeType"),
+        size_gib=volume.get("Size"),
+        kms_key_id=volume.get("KmsKeyId"),
+    )
+
+
+def security_group(group, internet_open, region=None):
+    group_id = group["GroupId"]
+    return make_record(
+        "ec2:security-group",
+        ec2_arn("security-group", group_id, group.get("OwnerId"), region),
+        group_id,
+        region=region,
+        name=group.get("GroupName"),
+        vpc_id=group.get("VpcId"),
+        flags=[INTERNET_OPEN] if internet_open else [],
+    )
+
+
+def lambda_function(fn):
+    vpc_config = fn.get("VpcConfig") or {}
+    return make_record(
+        "lambda:function",
+        fn["FunctionArn"],
+        fn["FunctionName"],
+        name=fn["FunctionName"],
+        vpc_id=vpc_config.get("VpcId") or None,
+        role_arn=fn.get("Role"),
+        state=fn.get("State"),
+        subnets=vpc_config.get("SubnetIds", []),
+        security_groups=vpc_config.get("SecurityGroupIds", []),
+        runtime=fn.get("Runtime"),
+        package_type=fn.get("PackageType"),
+        kms_key_arn=fn.get("KMSKeyArn"),
+    )
+
+
+def eks_cluster(cluster):
+    vpc_config = cluster.get("resourcesVpcConfig", {})
+    return make_record(
+        "eks:cluster",
+        cluster["arn"],
+        cluster["name"],
+        name=cluster["name"],
+        vpc_id=vpc_config.get("vpcId"),
+        role_arn=cluster.get("roleArn"),
+        state=cluster.get("status"),
+        subnets=vpc_config.get("subnetIds", []),
+        security_groups=vpc_config.get("securityGroupIds", []) + [vpc_config.get("clusterSecurityGroupId")],
+        flags=[PUBLIC] if vpc_config.get("endpointPublicAccess") else [],
+        version=cluster.get("version"),
+    )
+
+
+def rds_instance(db):
+    subnet_group = db.get("DBSubnetGroup", {})
+    return make_record(
+        "rds:db",
+        db["DBInstanceArn"],
+        db["DBInstanceIdentifier"],
+        name=db["DBInstanceIdentifier"],
+        vpc_id=subnet_group.get("VpcId"),
+        state=db.get("DBInstanceStatus"),
+        encrypted=db.get("StorageEncrypted", False),
+        subnets=[s["SubnetIdentifier"] for s in subnet_group.get("Subnets", [])],
+        security_groups=[g["VpcSecurityGroupId"] for g in db.get("VpcSecurityGroups", [])],
+        flags=[PUBLIC] if db.get("PubliclyAccessible") else [],
+        engine=db.get("Engine"),
+        kms_key_id=db.get("KmsKeyId"),
+    )
+
+
+def record_security_groups(exposure):
+    # Every group seen by an ExposureIndex, flagged when any rule admits the internet
+    for group_id, group in exposure.groups.items():
+        record(security_group(group, bool(exposure.internet_rules_for_groups([group_id]))))
+
+
+def iam_principal(principal, admin):
+    # IAM is global, so its records are stored with an empty region
+    return make_record(
+        f"iam:{principal.kind}",
+        principal.arn,
+        principal.name,
+        name=principal.name,
+        region="",
+        flags=[ADMIN] if admin else [],
+    )
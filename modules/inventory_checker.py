@@ -0,0 +1,45 @@
+# modules/inventory_checker.py
+from modules import inventory
+
+def run_check():
+    print("\n[INFO] Starting cross-service diagnostics (local inventory)...")
+
+    try:
+        store = inventory.store()
+
+        counts = store.counts()
+        if not counts:
+            print("  Inventory is empty. Run the service checkers (or Run ALL) first.")
+            return
+
+        print(f"  Inventory: {store.path}")
+        for row in counts:
+            print(f"   {row['resource_type']}: {row['count']}")
+
+        admin_workloads = store.workloads_with_admin_roles()
+        if admin_workloads:
+            print(f"\n  [WARN] {len(admin_workloads)} workload(s) run with an administrator IAM role:")
+            for row in admin_workloads:
+                print(f"    - {row['resource_type']} {row['name']} → {row['role_arn']}")
+        else:
+            print("\n  No workloads with administrator roles found.")
+
+        exposed = store.resources_in_open_security_groups()
+        if exposed:
+            print(f"\n  [WARN] {len(exposed)} resource/security group pair(s) with ingress open to the internet:")
+            for row in exposed:
+                print(f"    - {row['resource_type']} {row['name'] or row['arn']} in {row['group_id']}")
+        else:
+            print("\n  No resources in internet-open security groups found.")
+
+        volumes = store.unencrypted_volumes_on_running_instances()
+        if volumes:
+            print(f"\n  [WARN] {len(volumes)} unencrypted volume(s) attached to running instances:")
+            for row in volumes:
+                label = f"{row['instance_id']} ({row['instance_name']})" if row["instance_name"] else row["instance_id"]
+                print(f"    - {row['volume_id']} on {label}")
+        else:
+            print("\n  No unencrypted volumes on running instances found.")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to run cross-service diagnostics: {e}")
@@ -0,0 +1,184 @@
+# modules/kms_posture.py
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import aws_session
+from modules.rule_engine import Finding
+
+# arn:aws:kms:<region>:<account>:key/<id> or :alias/<name>
+KMS_ARN = re.compile(r"^arn:aws[a-z-]*:kms:(?P<region>[a-z0-9-]+):(?P<account>\d{12}):(?P<kind>key|alias)/(?P<name>.+)$")
+ACCOUNT_IN_PRINCIPAL = re.compile(r"^(?:arn:aws[a-z-]*:(?:iam|sts)::)?(\d{12})(?::|$)")
+
+DEFAULT_WORKERS = 8
+DEFAULT_CACHE_TTL = 900
+
+# Key posture per (region, key id), shared by every checker in a run
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_ttl():
+    return int(os.getenv("KMS_CACHE_TTL", str(DEFAULT_CACHE_TTL)))
+
+
+def parse_reference(reference):
+    # Key id, key ARN, alias name or alias ARN -> (region, "key"|"alias", id or alias name)
+    match = KMS_ARN.match(reference)
+    if match:
+        name = match["name"] if match["kind"] == "key" else f"alias/{match['name']}"
+        return match["region"], match["kind"], name
+    if reference.startswith("alias/"):
+        return aws_session.region(), "alias", reference
+    return aws_session.region(), "key", reference
+
+
+def external_principals(policy, own_account):
+    # Accounts (or "*") other than the key's own that an Allow statement grants to
+    principals = set()
+    for statement in policy.get("Statement", []):
+        if statement.get("Effect") != "Allow":
+            continue
+        principal = statement.get("Principal", {})
+        values = principal if isinstance(principal, str) else principal.get("AWS", [])
+        for value in [values] if isinstance(values, str) else values:
+            if value == "*":
+                principals.add("* (with conditions)" if statement.get("Condition") else "*")
+                continue
+            match = ACCOUNT_IN_PRINCIPAL.match(value)
+            if match and match.group(1) != own_account:
+                principals.add(match.group(1))
+    return sorted(principals)
+
+
+class KeyPosture:
+    def __init__(self, arn, metadata=None, rotation=None, external=(), error=None, policy_error=None):
+        self.arn = arn
+        self.metadata = metadata or {}
+        self.rotation = rotation
+        self.external = list(external)
+        self.error = error
+        self.policy_error = policy_error
+
+    @property
+    def customer_managed(self):
+        return self.metadata.get("KeyManager") == "CUSTOMER"
+
+    def findings(self):
+        if self.error:
+            return [Finding(None, "INFO", f"KMS key {self.arn}: could not be inspected ({self.error})")]
+        found = []
+        state = self.metadata.get("KeyState")
+        if state == "PendingDeletion":
+            found.append(Finding(None, "ERROR", f"KMS key {self.arn} is scheduled for deletion on {self.metadata.get('DeletionDate')}"))
+        elif state and state != "Enabled":
+            found.append(Finding(None, "ERROR", f"KMS key {self.arn} is {state}"))
+        if not self.customer_managed:
+            found.append(Finding(None, "INFO", f"KMS key {self.arn} is AWS managed (no control over key policy or rotation)"))
+        elif self.rotation is False:
+            found.append(Finding(None, "WARN", f"KMS key {self.arn}: automatic rotation is not enabled"))
+        if self.policy_error:
+            found.append(Finding(None, "INFO", f"KMS key {self.arn}: key policy could not be inspected ({self.policy_error})"))
+        elif self.external:
+            found.append(Finding(None, "WARN", f"KMS key {self.arn}: key policy allows other accounts ({', '.join(self.external)})"))
+        return found
+
+
+class KeyPostureIndex:
+    # Key references are collected first; aliases are resolved with one
+    # list_aliases listing per region and every distinct key is inspected once.
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv("KMS_WORKERS", str(DEFAULT_WORKERS)))
+        self.references = {}
+        self.keys = {}
+        self.results = {}
+        self.unresolved = {}
+
+    def add(self, reference):
+        if reference and reference not in self.references:
+            self.references[reference] = parse_reference(reference)
+
+    def _resolve_aliases(self):
+        regions = {region for region, kind, _ in self.references.values() if kind == "alias"}
+        targets = {}
+        for region in regions:
+            kms = aws_session.client("kms", region_name=region)
+            try:
+                for page in kms.get_paginator("list_aliases").paginate():
+                    for alias in page["Aliases"]:
+                        if alias.get("TargetKeyId"):
+                            targets[(region, alias["AliasName"])] = alias["TargetKeyId"]
+            except Exception as e:
+                for reference, (alias_region, kind, _) in self.references.items():
+                    if kind == "alias" and alias_region == region:
+                        self.unresolved[reference] = str(e)
+
+        for reference, (region, kind, name) in self.references.items():
+            if kind == "key":
+                self.keys[reference] = (region, name)
+            elif (region, name) in targets:
+                self.keys[reference] = (region, targets[(region, name)])
+            else:
+                self.unresolved.setdefault(reference, "alias not found")
+
+    def _fetch(self, key):
+        region, key_id = key
+        now = time.time()
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached and now - cached[0] < _cache_ttl():
+            return cached[1]
+
+        kms = aws_session.client("kms", region_name=region)
+        try:
+            metadata = kms.describe_key(KeyId=key_id)["KeyMetadata"]
+            rotation = None
+            external = []
+            policy_error = None
+            if metadata.get("KeyManager") == "CUSTOMER":
+                # Rotation only applies to symmetric keys with KMS-generated material
+                if metadata.get("KeySpec", "SYMMETRIC_DEFAULT") == "SYMMETRIC_DEFAULT" and metadata.get("Origin") == "AWS_KMS":
+                    rotation = kms.get_key_rotation_status(KeyId=key_id).get("KeyRotationEnabled", False)
+                # Key policies often deny reads to everyone but the key's admins;
+                # the state and rotation checks still stand without it
+                try:
+                    policy = json.loads(kms.get_key_policy(KeyId=key_id, PolicyName="default")["Policy"])
+                    external = external_principals(policy, metadata.get("AWSAccountId"))
+                except Exception as e:
+                    policy_error = str(e)
+            result = KeyPosture(metadata["Arn"], metadata, rotation, external, policy_error=policy_error)
+        except Exception as e:
+            # Errors are not cached, so the next run tries again
+            return KeyPosture(key_id, error=str(e))
+
+        if not result.policy_error:
+            with _cache_lock:
+                _cache[key] = (now, result)
+        return result
+
+    def resolve(self):
+        self._resolve_aliases()
+        distinct = sorted(set(self.keys.values()))
+        if distinct:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                self.results = dict(zip(distinct, pool.map(self._fetch, distinct)))
+        return self
+
+    def posture(self, reference):
+        key = self.keys.get(reference)
+        return self.results.get(key) if key else None
+
+    def findings(self, reference):
+        # Findings for the key a resource references, ready for rule_engine.print_findings
+        if not reference:
+            return []
+        if reference in self.unresolved:
+            return [Finding(None, "INFO", f"KMS key {reference}: could not be resolved ({self.unresolved[reference]})")]
+        posture = self.posture(reference)
+        return posture.findings() if posture else []
+
+    def stats(self):
+        return len(self.references), len(self.results)
@@ -1,27 +1,33 @@
-import boto3
-import os
-from dotenv import load_dotenv
+import time
+from modules import aws_session, checkpoint, inventory, prefetch, rule_engine, secret_scanner
+from modules.ecr_image_scanner import ImageVulnerabilityIndex, print_report
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("lambda.functions",)
 
 def run_check():
     print("\n[INFO] Starting Lambda diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+        lambda_client = aws_session.client("lambda")
+        started = time.time()
 
-        lambda_client = session.client("lambda")
-
-        paginator = lambda_client.get_paginator("list_functions")
-        page_iterator = paginator.paginate()
+        # The listing is shared with the metrics checker; each batch is one resumable checkpoint step
+        functions = prefetch.get("lambda.functions")
 
         function_count = 0
-        for page in page_iterator:
-            for fn in page["Functions"]:
+        images = ImageVulnerabilityIndex()
+        # Image functions seen by batches replayed from the checkpoint
+        for name, image in checkpoint.notes("functions"):
+            images.add(image, name)
+        for batch in checkpoint.each_batch(functions, "functions", key=lambda fn: fn["FunctionArn"]):
+            # Rules are evaluated over each batch of functions at once
+            findings = rule_engine.evaluate("lambda:function", batch)
+            secrets = secret_scanner.scan_batch([
+                secret_scanner.env_document(fn.get("Environment", {}).get("Variables", {}))
+                for fn in batch
+            ])
+            for fn, fn_findings, fn_secrets in zip(batch, findings, secrets):
                 function_count += 1
                 name = fn["FunctionName"]
                 runtime = fn.get("Runtime", "Unknown")
@@ -31,16 +37,16 @@ def run_check():
                 role = fn["Role"]
                 env_vars = fn.get("Environment", {}).get("Variables", {})
                 vpc_config = fn.get("VpcConfig", {})
-                dlq = fn.get("DeadLetterConfig", {}).get("TargetArn", "None")
-                signing_config = fn.get("CodeSigningConfigArn", None)
+                dlq = fn.get("DeadLetterConfig", {}).get("TargetArn")
+                inventory.record(inventory.lambda_function(fn))
 
                 print(f"\n  [Function] {name}")
                 print(f"   Runtime: {runtime} | Timeout: {timeout}s | Memory: {memory}MB")
                 print(f"   Last Modified: {last_modified}")
                 print(f"   IAM Role: {role}")
                 
-                if "AWS_ACCESS_KEY_ID" in str(env_vars) or "SECRET" in str(env_vars):
-                    print("   [WARN] Potential secret in environment variables.")
+                if fn_secrets:
+                    print(f"   [WARN] Potential secret(s) in environment variables: {secret_scanner.describe(fn_secrets)}")
                 else:
                     print(f"   Env Vars: {len(env_vars)} variable(s) configured.")
 
@@ -49,10 +55,8 @@ def run_check():
                 else:
                     print("   VPC Configured: No")
 
-                if dlq != "None":
+                if dlq:
                     print(f"   Dead Letter Queue: {dlq}")
-                else:
-                    print("   DLQ: Not configured")
 
                 # Concurrency settings
                 try:
@@ -62,10 +66,17 @@ def run_check():
                 except:
                     print("   Reserved Concurrency: Not set")
 
-                if signing_config:
-                    print("   Code Signing Config: ENABLED")
-                else:
-                    print("   Code Signing Config: Not enabled")
+                # DLQ, code signing, runtime and timeout rules
+                rule_engine.print_findings(fn_findings)
+
+                # Container image functions are checked against ECR scan results after the listing
+                if fn.get("PackageType") == "Image":
+                    code = lambda_client.get_function(FunctionName=name).get("Code", {})
+                    image = code.get("ResolvedImageUri") or code.get("ImageUri")
+                    if image:
+                        print(f"   Container Image: {image}")
+                        images.add(image, name)
+                        checkpoint.note("functions", [name, image])
 
                 # Triggers
                 ev_sources = lambda_client.list_event_source_mappings(FunctionName=name).get("EventSourceMappings", [])
@@ -76,8 +87,16 @@ def run_check():
                 else:
                     print("   Triggers: None found")
 
-        if function_count == 0:
+        if function_count == 0 and not checkpoint.resumed():
             print("  No Lambda functions found.")
 
+        if images.owners or images.other_images:
+            print("\n  Container image scan results (per function):")
+            print_report(images.resolve(), indent="   ")
+
+        # Functions from replayed batches were recorded by the interrupted run
+        if not checkpoint.resumed():
+            inventory.prune("lambda:function", started)
+
     except Exception as e:
         print(f"[ERROR] Failed to run Lambda diagnostics: {e}")
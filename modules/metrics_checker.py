@@ -0,0 +1,200 @@
+# modules/metrics_checker.py
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from modules import aws_session, prefetch
+
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("ec2.reservations", "rds.db_instances", "lambda.functions")
+
+# get_metric_data accepts at most 500 queries per request
+MAX_QUERIES_PER_CALL = 500
+DEFAULT_WORKERS = 8
+
+# Namespace, dimension name and (metric, statistic) pairs pulled per resource type
+METRICS = {
+    "ec2": ("AWS/EC2", "InstanceId", [
+        ("CPUUtilization", "Average"),
+        ("CPUUtilization", "Maximum"),
+    ]),
+    "rds": ("AWS/RDS", "DBInstanceIdentifier", [
+        ("CPUUtilization", "Average"),
+        ("DatabaseConnections", "Maximum"),
+        ("FreeStorageSpace", "Minimum"),
+    ]),
+    "lambda": ("AWS/Lambda", "FunctionName", [
+        ("Invocations", "Sum"),
+        ("Errors", "Sum"),
+        ("Throttles", "Sum"),
+        ("Duration", "Maximum"),
+    ]),
+}
+
+IDLE_CPU_PERCENT = 5
+SATURATED_CPU_PERCENT = 90
+LOW_STORAGE_RATIO = 0.1
+ERROR_RATE = 0.05
+TIMEOUT_RATIO = 0.9
+
+
+def discover_resources():
+    resources = []
+
+    for reservation in prefetch.get("ec2.reservations"):
+        for instance in reservation["Instances"]:
+            if instance.get("State", {}).get("Name") == "running":
+                resources.append(("ec2", instance["InstanceId"], {}))
+
+    for db in prefetch.get("rds.db_instances"):
+        allocated_bytes = db.get("AllocatedStorage", 0) * 1024 ** 3
+        resources.append(("rds", db["DBInstanceIdentifier"], {"allocated_bytes": allocated_bytes}))
+
+    for fn in prefetch.get("lambda.functions"):
+        resources.append(("lambda", fn["FunctionName"], {"timeout_ms": fn.get("Timeout", 3) * 1000}))
+
+    return resources
+
+
+def build_queries(resources, period):
+    # Query ids map back to (resource index, metric, statistic)
+    queries = []
+    lookup = {}
+    for idx, (kind, resource_id, _) in enumerate(resources):
+        namespace, dimension, metrics = METRICS[kind]
+        for metric, stat in metrics:
+            query_id = f"m{len(queries)}"
+            lookup[query_id] = (idx, metric, stat)
+            queries.append({
+                "Id": query_id,
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": namespace,
+                        "MetricName": metric,
+                        "Dimensions": [{"Name": dimension, "Value": resource_id}],
+                    },
+                    "Period": period,
+                    "Stat": stat,
+                },
+                "ReturnData": True,
+            })
+    return queries, lookup
+
+
+def _fetch_batch(cw, batch, start, end):
+    results = []
+    paginator = cw.get_paginator("get_metric_data")
+    for page in paginator.paginate(MetricDataQueries=batch, StartTime=start, EndTime=end):
+        results.extend(page.get("MetricDataResults", []))
+    return results
+
+
+def fetch_metrics(cw, queries, start, end, workers=None):
+    # A series can be split across pages, so values are accumulated per query id
+    workers = workers or int(os.getenv("METRICS_WORKERS", str(DEFAULT_WORKERS)))
+    batches = [queries[i:i + MAX_QUERIES_PER_CALL] for i in range(0, len(queries), MAX_QUERIES_PER_CALL)]
+    values = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(lambda batch: _fetch_batch(cw, batch, start, end), batches):
+            for result in results:
+                values[result["Id"]].extend(result.get("Values", []))
+    return values, len(batches)
+
+
+def reduce_values(stat, values):
+    if not values:
+        return None
+    if stat == "Sum":
+        return sum(values)
+    if stat == "Maximum":
+        return max(values)
+    if stat == "Minimum":
+        return min(values)
+    return sum(values) / len(values)
+
+
+def diagnose(kind, stats, meta):
+    findings = []
+    if kind == "ec2":
+        avg_cpu = stats.get(("CPUUtilization", "Average"))
+        max_cpu = stats.get(("CPUUtilization", "Maximum"))
+        if avg_cpu is not None and avg_cpu < IDLE_CPU_PERCENT:
+            findings.append(("IDLE", f"average CPU {avg_cpu:.1f}%"))
+        if max_cpu is not None and max_cpu >= SATURATED_CPU_PERCENT:
+            findings.append(("SATURATED", f"peak CPU {max_cpu:.1f}%"))
+
+    elif kind == "rds":
+        connections = stats.get(("DatabaseConnections", "Maximum"))
+        free_storage = stats.get(("FreeStorageSpace", "Minimum"))
+        avg_cpu = stats.get(("CPUUtilization", "Average"))
+        if connections == 0:
+            findings.append(("IDLE", "no database connections"))
+        if avg_cpu is not None and avg_cpu >= SATURATED_CPU_PERCENT:
+            findings.append(("SATURATED", f"average CPU {avg_cpu:.1f}%"))
+        allocated = meta.get("allocated_bytes")
+        if free_storage is not None and allocated and free_storage < allocated * LOW_STORAGE_RATIO:
+            findings.append(("SATURATED", f"free storage {free_storage / 1024 ** 3:.1f} GiB"))
+
+    elif kind == "lambda":
+        invocations = stats.get(("Invocations", "Sum")) or 0
+        errors = stats.get(("Errors", "Sum")) or 0
+        throttles = stats.get(("Throttles", "Sum")) or 0
+        max_duration = stats.get(("Duration", "Maximum"))
+        if invocations == 0:
+            findings.append(("IDLE", "no invocations"))
+        elif errors / invocations >= ERROR_RATE:
+            findings.append(("ERRORING", f"{int(errors)} error(s) in {int(invocations)} invocation(s)"))
+        if throttles:
+            findings.append(("SATURATED", f"{int(throttles)} throttle(s)"))
+        timeout_ms = meta.get("timeout_ms")
+        if max_duration is not None and timeout_ms and max_duration >= timeout_ms * TIMEOUT_RATIO:
+            findings.append(("SATURATED", f"max duration {max_duration:.0f} ms near timeout"))
+
+    return findings
+
+
+def run_check():
+    print("\n[INFO] Starting utilization diagnostics...")
+
+    try:
+        window_hours = int(os.getenv("METRICS_WINDOW_HOURS", "24"))
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(hours=window_hours)
+        # One datapoint per hour keeps each series small regardless of window
+        period = 3600
+
+        resources = discover_resources()
+        if not resources:
+            print("  No EC2, RDS or Lambda resources found.")
+            return
+
+        print(f"  {len(resources)} resource(s) found; window: last {window_hours} hour(s).")
+
+        queries, lookup = build_queries(resources, period)
+        cw = aws_session.client("cloudwatch")
+
+        values, batch_count = fetch_metrics(cw, queries, start, end)
+        print(f"  Retrieved {len(queries)} metric series in {batch_count} batched request(s).")
+
+        stats = defaultdict(dict)
+        for query_id, series in values.items():
+            idx, metric, stat = lookup[query_id]
+            value = reduce_values(stat, series)
+            if value is not None:
+                stats[idx][(metric, stat)] = value
+
+        flagged = 0
+        for idx, (kind, resource_id, meta) in enumerate(resources):
+            findings = diagnose(kind, stats.get(idx, {}), meta)
+            if not findings:
+                continue
+            flagged += 1
+            print(f"\n  [{kind.upper()}] {resource_id}")
+            for label, detail in findings:
+                print(f"   [WARN] {label}: {detail}")
+
+        if not flagged:
+            print("  No idle, saturated or erroring resources detected.")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to run utilization diagnostics: {e}")
@@ -0,0 +1,192 @@
+# modules/prefetch.py
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from modules import aws_session, config_inventory
+from modules.ebs_lineage import LineageIndex
+from modules.sg_exposure import ExposureIndex
+from modules.vpc_topology import VpcTopology
+
+DEFAULT_WORKERS = 8
+
+_active = None
+
+
+def _pages(service, operation, key, config_type=None, **kwargs):
+    def fetch():
+        # Served from one AWS Config query when enabled and the type is recorded
+        if config_type:
+            items = config_inventory.dataset(config_type)
+            if items is not None:
+                return items
+        paginator = aws_session.client(service).get_paginator(operation)
+        return tuple(item for page in paginator.paginate(**kwargs) for item in page[key])
+    return fetch
+
+
+def _exposure(groups, interfaces):
+    index = ExposureIndex()
+    for group in groups:
+        index.add_group(group)
+    for eni in interfaces:
+        index.add_interface(eni)
+    return index.build()
+
+
+def _topology(subnets, route_tables):
+    topology = VpcTopology()
+    for subnet in subnets:
+        topology.add_subnet(subnet)
+    for rt in route_tables:
+        topology.add_route_table(rt)
+    return topology
+
+
+def _lineage(volumes, snapshots, images, reservations):
+    lineage = LineageIndex()
+    for volume in volumes:
+        lineage.add_volume(volume)
+    for snapshot in snapshots:
+        lineage.add_snapshot(snapshot)
+    for image in images:
+        lineage.add_image(image)
+    for reservation in reservations:
+        for instance in reservation["Instances"]:
+            lineage.add_instance(instance)
+    return lineage
+
+
+# name -> (dependencies, builder). API datasets have no dependencies; derived
+# indexes are built from the datasets they list, in the order given.
+DATASETS = {
+    "ec2.reservations": ((), _pages("ec2", "describe_instances", "Reservations", "AWS::EC2::Instance")),
+    "ec2.volumes": ((), _pages("ec2", "describe_volumes", "Volumes", "AWS::EC2::Volume")),
+    "ec2.snapshots": ((), _pages("ec2", "describe_snapshots", "Snapshots", OwnerIds=["self"])),
+    "ec2.images": ((), _pages("ec2", "describe_images", "Images", Owners=["self"])),
+    "ec2.security_groups": ((), _pages("ec2", "describe_security_groups", "SecurityGroups", "AWS::EC2::SecurityGroup")),
+    "ec2.network_interfaces": ((), _pages("ec2", "describe_network_interfaces", "NetworkInterfaces", "AWS::EC2::NetworkInterface")),
+    "ec2.subnets": ((), _pages("ec2", "describe_subnets", "Subnets", "AWS::EC2::Subnet")),
+    "ec2.route_tables": ((), _pages("ec2", "describe_route_tables", "RouteTables", "AWS::EC2::RouteTable")),
+    "ec2.vpcs": ((), _pages("ec2", "describe_vpcs", "Vpcs", "AWS::EC2::VPC")),
+    "ec2.internet_gateways": ((), _pages("ec2", "describe_internet_gateways", "InternetGateways", "AWS::EC2::InternetGateway")),
+    "ec2.flow_logs": ((), _pages("ec2", "describe_flow_logs", "FlowLogs")),
+    "rds.db_instances": ((), _pages("rds", "describe_db_instances", "DBInstances", "AWS::RDS::DBInstance")),
+    "lambda.functions": ((), _pages("lambda", "list_functions", "Functions", "AWS::Lambda::Function")),
+    "iam.instance_profiles": ((), _pages("iam", "list_instance_profiles", "InstanceProfiles")),
+    "sg.exposure": (("ec2.security_groups", "ec2.network_interfaces"), _exposure),
+    "vpc.topology": (("ec2.subnets", "ec2.route_tables"), _topology),
+    "ebs.lineage": (("ec2.volumes", "ec2.snapshots", "ec2.images", "ec2.reservations"), _lineage),
+}
+
+
+def dependencies(names):
+    # Transitive closure, dependencies before dependents
+    ordered = []
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name not in DATASETS:
+            raise KeyError(f"unknown dataset: {name}")
+        for dep in DATASETS[name][0]:
+            visit(dep)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+class Prefetcher:
+    # Fetches each dataset at most once for the region and credentials of this
+    # run. Derived datasets start as soon as their last dependency resolves, so
+    # no worker ever blocks waiting on another.
+    def __init__(self, workers=None):
+        self.workers = workers or int(os.getenv("PREFETCH_WORKERS", str(DEFAULT_WORKERS)))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, name):
+        # Called with the lock held; dependencies are already submitted
+        deps, builder = DATASETS[name]
+        if not deps:
+            self._futures[name] = self._pool.submit(builder)
+            return
+
+        future = Future()
+        self._futures[name] = future
+        dep_futures = [self._futures[d] for d in deps]
+        remaining = [len(dep_futures)]
+        counter_lock = threading.Lock()
+
+        def build():
+            try:
+                future.set_result(builder(*[f.result() for f in dep_futures]))
+            except Exception as e:
+                future.set_exception(e)
+
+        def on_done(_):
+            with counter_lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                if any(f.exception() for f in dep_futures):
+                    future.set_exception(next(f.exception() for f in dep_futures if f.exception()))
+                else:
+                    try:
+                        self._pool.submit(build)
+                    except RuntimeError as e:
+                        # The run finished before this dataset was needed
+                        future.set_exception(e)
+
+        for dep_future in dep_futures:
+            dep_future.add_done_callback(on_done)
+
+    def prefetch(self, names):
+        with self._lock:
+            for name in dependencies(names):
+                if name not in self._futures:
+                    self._submit(name)
+
+    def get(self, name):
+        self.prefetch([name])
+        return self._futures[name].result()
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+@contextmanager
+def shared(names=()):
+    # Within this block every get() for the same dataset returns one shared,
+    # read-only value; callers must not mutate it.
+    global _active
+    prefetcher = Prefetcher()
+    previous, _active = _active, prefetcher
+    try:
+        prefetcher.prefetch(names)
+        yield prefetcher
+    finally:
+        _active = previous
+        prefetcher.close()
+
+
+def get(name):
+    if _active is not None:
+        return _active.get(name)
+    # Outside a shared run each call builds its own copy
+    deps, builder = DATASETS[name]
+    return builder(*[get(dep) for dep in deps])
+
+
+def declared(check):
+    # Checkers list the datasets they read in a module-level DATASETS tuple;
+    # lazily loaded checkers (modules/registry.py) expose it as .datasets
+    datasets = getattr(check, "datasets", None)
+    if datasets is not None:
+        return datasets
+    return getattr(sys.modules.get(check.__module__), "DATASETS", ())
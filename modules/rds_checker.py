@@ -1,77 +1,216 @@
 # modules/rds_checker.py
-import boto3
 import os
-from dotenv import load_dotenv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules import aws_session, inventory, prefetch, rule_engine
+from modules.kms_posture import KeyPostureIndex
+from modules.vpc_topology import PUBLIC
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("rds.db_instances", "vpc.topology")
 
-def run_check():
-    print("\n[INFO] Starting RDS diagnostics...")
+POSTGRES = {"postgres", "aurora-postgresql"}
+MYSQL = {"mysql", "mariadb"}
+AURORA_MYSQL = {"aurora", "aurora-mysql"}
+SQLSERVER = {"sqlserver-ee", "sqlserver-se", "sqlserver-ex", "sqlserver-web"}
 
-    try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+# (engines, parameter, accepted values, warning). A parameter missing from a
+# group is not checked there, e.g. Aurora sets SSL in the cluster group only.
+PARAMETER_CHECKS = [
+    (POSTGRES | SQLSERVER, "rds.force_ssl", {"1", "on", "true"}, "SSL connections are not enforced (rds.force_ssl)"),
+    (MYSQL | AURORA_MYSQL, "require_secure_transport", {"1", "on"}, "SSL connections are not enforced (require_secure_transport)"),
+    (POSTGRES, "log_connections", {"1", "on"}, "Connection logging is disabled (log_connections)"),
+    (MYSQL, "slow_query_log", {"1", "on"}, "Slow query log is disabled (slow_query_log)"),
+    (AURORA_MYSQL, "server_audit_logging", {"1", "on"}, "Audit logging is disabled (server_audit_logging)"),
+]
 
-        rds = session.client("rds")
-        instances = rds.describe_db_instances().get("DBInstances", [])
+class ParameterGroupCache:
+    # Hundreds of databases typically share a handful of parameter groups, so
+    # each group is paged once per run and its checks are evaluated once per engine.
+    def __init__(self, rds):
+        self.rds = rds
+        self._parameters = {}
+        self._findings = {}
 
-        if not instances:
-            print("  No RDS instances found.")
+    def parameters(self, name, cluster=False):
+        key = (cluster, name)
+        if key not in self._parameters:
+            if cluster:
+                pages = self.rds.get_paginator("describe_db_cluster_parameters").paginate(DBClusterParameterGroupName=name)
+            else:
+                pages = self.rds.get_paginator("describe_db_parameters").paginate(DBParameterGroupName=name)
+            self._parameters[key] = {
+                p["ParameterName"]: p.get("ParameterValue") for page in pages for p in page["Parameters"]
+            }
+        return self._parameters[key]
+
+    def findings(self, name, engine, cluster=False):
+        key = (cluster, name, engine)
+        if key not in self._findings:
+            params = self.parameters(name, cluster)
+            warnings = []
+            for engines, parameter, accepted, warning in PARAMETER_CHECKS:
+                if engine not in engines or parameter not in params:
+                    continue
+                value = params[parameter]
+                # Unset values fall back to an engine default we cannot see here
+                if value is not None and str(value).lower() not in accepted:
+                    warnings.append(f"{warning}, value: {value}")
+            self._findings[key] = warnings
+        return self._findings[key]
+
+    def print_findings(self, name, engine, cluster=False):
+        try:
+            warnings = self.findings(name, engine, cluster)
+        except Exception as e:
+            print(f"   Could not read parameter group {name}: {e}")
             return
+        for warning in warnings:
+            print(f"   [WARN] Parameter group {name}: {warning}")
 
-        print(f"  {len(instances)} RDS instance(s) found.")
+def paginate_all(rds, operation, key, **kwargs):
+    return [item for page in rds.get_paginator(operation).paginate(**kwargs) for item in page[key]]
 
-        for db in instances:
-            db_id = db["DBInstanceIdentifier"]
-            status = db["DBInstanceStatus"]
-            engine = db["Engine"]
-            print(f"\n  Instance: {db_id}")
-            print(f"   Status: {status}")
-            print(f"   Engine: {engine}")
+def add_snapshot_sharing(snapshots, cluster, workers):
+    # Attribute lookups are one call per snapshot, so they run concurrently
+    rds = aws_session.client("rds", max_pool_connections=workers)
 
-            # Encryption check
-            if db.get("StorageEncrypted"):
-                print("   Storage Encryption: ENABLED")
+    def restore_accounts(snapshot):
+        try:
+            if cluster:
+                result = rds.describe_db_cluster_snapshot_attributes(
+                    DBClusterSnapshotIdentifier=snapshot["DBClusterSnapshotIdentifier"]
+                )["DBClusterSnapshotAttributesResult"]["DBClusterSnapshotAttributes"]
             else:
-                print("   [WARN] Storage Encryption: DISABLED")
+                result = rds.describe_db_snapshot_attributes(
+                    DBSnapshotIdentifier=snapshot["DBSnapshotIdentifier"]
+                )["DBSnapshotAttributesResult"]["DBSnapshotAttributes"]
+        except Exception:
+            return None
+        for attribute in result:
+            if attribute["AttributeName"] == "restore":
+                return attribute.get("AttributeValues", [])
+        return []
 
-            # Public accessibility
-            if db.get("PubliclyAccessible"):
-                print("   [WARN] Publicly Accessible: YES")
-            else:
-                print("   Publicly Accessible: NO")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for snapshot, shared in zip(snapshots, pool.map(restore_accounts, snapshots)):
+            snapshot["SharedWith"] = shared
 
-            # Multi-AZ
-            if db.get("MultiAZ"):
-                print("   Multi-AZ Deployment: ENABLED")
-            else:
-                print("   [INFO] Multi-AZ Deployment: DISABLED")
+def check_instances(instances, parameter_groups, keys):
+    print(f"  {len(instances)} RDS instance(s) found.")
 
-            # Backup retention
-            retention = db.get("BackupRetentionPeriod", 0)
-            print(f"   Backup Retention: {retention} day(s)")
+    # Route-table classification of DB subnets
+    topology = prefetch.get("vpc.topology")
 
-            # Auto minor version upgrade
-            if db.get("AutoMinorVersionUpgrade"):
-                print("   Auto Minor Version Upgrade: ENABLED")
-            else:
-                print("   Auto Minor Version Upgrade: DISABLED")
+    # Every rule in rules/ is evaluated over all instances in one pass
+    findings = rule_engine.evaluate("rds:db", instances)
 
-            # Deletion protection
-            if db.get("DeletionProtection"):
-                print("   Deletion Protection: ENABLED")
-            else:
-                print("   [WARN] Deletion Protection: DISABLED")
+    for db, db_findings in zip(instances, findings):
+        db_id = db["DBInstanceIdentifier"]
+        status = db["DBInstanceStatus"]
+        engine = db["Engine"]
+        inventory.record(inventory.rds_instance(db))
+        print(f"\n  Instance: {db_id}")
+        print(f"   Status: {status}")
+        print(f"   Engine: {engine}")
+        if db.get("DBClusterIdentifier"):
+            print(f"   Cluster: {db['DBClusterIdentifier']}")
 
-            # Monitoring interval
-            interval = db.get("MonitoringInterval", 0)
-            if interval >= 1:
-                print(f"   Enhanced Monitoring Interval: {interval} seconds")
-            else:
-                print("   Enhanced Monitoring: DISABLED")
+        retention = db.get("BackupRetentionPeriod", 0)
+        print(f"   Backup Retention: {retention} day(s)")
+
+        # Subnet placement from the route-table classification
+        subnet_ids = [s["SubnetIdentifier"] for s in db.get("DBSubnetGroup", {}).get("Subnets", [])]
+        placement = topology.placement(subnet_ids)
+        if placement:
+            print(f"   Subnet Placement: {placement}")
+        if db.get("PubliclyAccessible") and placement == PUBLIC:
+            print("   [WARN] DB subnet group includes public subnets (route to an Internet Gateway).")
+
+        # Encryption, public access, Multi-AZ, backups, deletion protection, monitoring
+        rule_engine.print_findings(db_findings)
+        # Cluster members report the cluster key, which is checked with the cluster
+        if not db.get("DBClusterIdentifier"):
+            rule_engine.print_findings(keys.findings(db.get("KmsKeyId")))
+
+        for group in db.get("DBParameterGroups", []):
+            parameter_groups.print_findings(group["DBParameterGroupName"], engine)
+
+def check_clusters(clusters, parameter_groups, keys):
+    print(f"\n  {len(clusters)} DB cluster(s) found.")
+    findings = rule_engine.evaluate("rds:cluster", clusters)
+
+    for cluster, cluster_findings in zip(clusters, findings):
+        engine = cluster["Engine"]
+        members = cluster.get("DBClusterMembers", [])
+        writers = sum(1 for m in members if m.get("IsClusterWriter"))
+        print(f"\n  Cluster: {cluster['DBClusterIdentifier']}")
+        print(f"   Status: {cluster['Status']}")
+        print(f"   Engine: {engine} {cluster.get('EngineVersion', '')}".rstrip())
+        print(f"   Members: {len(members)} ({writers} writer, {len(members) - writers} reader)")
+        print(f"   Backup Retention: {cluster.get('BackupRetentionPeriod', 0)} day(s)")
+
+        rule_engine.print_findings(cluster_findings)
+        rule_engine.print_findings(keys.findings(cluster.get("KmsKeyId")))
+
+        group = cluster.get("DBClusterParameterGroup")
+        if group:
+            parameter_groups.print_findings(group, engine, cluster=True)
+
+def check_snapshots(snapshots, cluster_snapshots, workers):
+    print(f"\n  {len(snapshots)} manual DB snapshot(s), {len(cluster_snapshots)} manual cluster snapshot(s) found.")
+
+    add_snapshot_sharing(snapshots, cluster=False, workers=workers)
+    add_snapshot_sharing(cluster_snapshots, cluster=True, workers=workers)
+
+    flagged = 0
+    for resource_type, items, id_key in (
+        ("rds:snapshot", snapshots, "DBSnapshotIdentifier"),
+        ("rds:cluster-snapshot", cluster_snapshots, "DBClusterSnapshotIdentifier"),
+    ):
+        for snapshot, snapshot_findings in zip(items, rule_engine.evaluate(resource_type, items)):
+            if snapshot["SharedWith"] is None:
+                snapshot_findings = snapshot_findings + [rule_engine.Finding(None, "INFO", "Could not read snapshot attributes")]
+            if not snapshot_findings:
+                continue
+            flagged += 1
+            print(f"\n  Snapshot: {snapshot[id_key]} (created {snapshot.get('SnapshotCreateTime', 'unknown')})")
+            rule_engine.print_findings(snapshot_findings)
+
+    if (snapshots or cluster_snapshots) and not flagged:
+        print("   No public or unencrypted manual snapshots.")
+
+def run_check():
+    print("\n[INFO] Starting RDS diagnostics...")
+
+    try:
+        rds = aws_session.client("rds")
+        started = time.time()
+        parameter_groups = ParameterGroupCache(rds)
+        workers = int(os.getenv("RDS_SNAPSHOT_WORKERS", "8"))
+
+        instances = prefetch.get("rds.db_instances")
+        clusters = paginate_all(rds, "describe_db_clusters", "DBClusters")
+        snapshots = paginate_all(rds, "describe_db_snapshots", "DBSnapshots", SnapshotType="manual")
+        cluster_snapshots = paginate_all(rds, "describe_db_cluster_snapshots", "DBClusterSnapshots", SnapshotType="manual")
+
+        # Storage keys of instances and clusters, each distinct key inspected once
+        keys = KeyPostureIndex()
+        for resource in list(instances) + clusters:
+            keys.add(resource.get("KmsKeyId"))
+        keys.resolve()
+
+        if instances:
+            check_instances(instances, parameter_groups, keys)
+        else:
+            print("  No RDS instances found.")
+        inventory.prune("rds:db", started)
+
+        if clusters:
+            check_clusters(clusters, parameter_groups, keys)
+
+        if snapshots or cluster_snapshots:
+            check_snapshots(snapshots, cluster_snapshots, workers)
 
     except Exception as e:
         print(f"[ERROR] Failed to run RDS diagnostics: {e}")
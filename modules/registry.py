@@ -0,0 +1,47 @@
+# modules/registry.py
+import importlib
+import sys
+import time
+
+# Seconds spent importing each module loaded through load(), in load order
+import_times = {}
+
+
+def load(module_name):
+    # Imports a module once and records what the first import cost
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_times[module_name] = time.perf_counter() - started
+    return module
+
+
+class LazyCheck:
+    # Stands in for a checker's run_check; the module is imported on first call,
+    # so the menu and single-service runs only load what they use.
+    def __init__(self, module_name):
+        self.module_name = f"modules.{module_name}"
+
+    def module(self):
+        return load(self.module_name)
+
+    @property
+    def datasets(self):
+        return getattr(self.module(), "DATASETS", ())
+
+    def __call__(self):
+        return self.module().run_check()
+
+    def __repr__(self):
+        return f"LazyCheck({self.module_name!r})"
+
+
+def print_import_report(startup):
+    print(f"\n[INFO] Startup (menu ready): {startup * 1000:.1f} ms")
+    if not import_times:
+        return
+    print("  Module import cost (first import, including dependencies not loaded before it):")
+    for module_name, seconds in sorted(import_times.items(), key=lambda item: item[1], reverse=True):
+        print(f"   {seconds * 1000:8.1f} ms  {module_name}")
+    print(f"   {sum(import_times.values()) * 1000:8.1f} ms  total")
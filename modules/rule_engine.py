@@ -0,0 +1,191 @@
+# modules/rule_engine.py
+import json
+import operator
+import os
+import re
+from collections import defaultdict, namedtuple
+
+DEFAULT_RULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules")
+SEVERITIES = ("INFO", "WARN", "ERROR")
+
+Finding = namedtuple("Finding", "rule_id severity message")
+
+_MISSING = object()
+_PLACEHOLDER = re.compile(r"\{([A-Za-z0-9_.\-]+)\}")
+_ruleset = None
+
+
+def _compare(op):
+    # Thresholds never match a missing or non-comparable value
+    def test(value, expected):
+        try:
+            return value is not _MISSING and value is not None and op(value, expected)
+        except TypeError:
+            return False
+    return test
+
+
+def _present(value):
+    return value is not _MISSING and value is not None
+
+
+OPERATORS = {
+    "eq": lambda v, x: (None if v is _MISSING else v) == x,
+    "ne": lambda v, x: (None if v is _MISSING else v) != x,
+    "lt": _compare(operator.lt),
+    "le": _compare(operator.le),
+    "gt": _compare(operator.gt),
+    "ge": _compare(operator.ge),
+    "in": lambda v, x: _present(v) and v in x,
+    "not_in": lambda v, x: not (_present(v) and v in x),
+    "contains": lambda v, x: _present(v) and x in v,
+    "matches": lambda v, x: isinstance(v, str) and x.search(v) is not None,
+    "exists": lambda v, x: _present(v),
+    "missing": lambda v, x: not _present(v),
+    "truthy": lambda v, x: _present(v) and bool(v),
+    "falsy": lambda v, x: not (_present(v) and bool(v)),
+}
+
+
+def field_getter(path):
+    # "DBSubnetGroup.Subnets.0.SubnetIdentifier" -> function(record) -> value or _MISSING
+    parts = [int(p) if p.isdigit() else p for p in path.split(".")]
+
+    def get(record):
+        value = record
+        for part in parts:
+            try:
+                value = value[part]
+            except (KeyError, IndexError, TypeError):
+                return _MISSING
+        return value
+    return get
+
+
+class Condition:
+    def __init__(self, spec, where):
+        if "field" not in spec or spec.get("op") not in OPERATORS:
+            raise ValueError(f"{where}: condition needs a field and one of {', '.join(OPERATORS)}")
+        self.field = spec["field"]
+        self.test = OPERATORS[spec["op"]]
+        value = spec.get("value")
+        if spec["op"] == "matches":
+            value = re.compile(value)
+        elif spec["op"] in ("in", "not_in"):
+            value = frozenset(value)
+        self.value = value
+
+
+class Rule:
+    def __init__(self, spec, source):
+        where = f"{source}: rule {spec.get('id', '?')}"
+        for key in ("id", "resource", "message"):
+            if key not in spec:
+                raise ValueError(f"{where}: missing '{key}'")
+        self.id = spec["id"]
+        self.resource = spec["resource"]
+        self.severity = spec.get("severity", "WARN").upper()
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"{where}: severity must be one of {', '.join(SEVERITIES)}")
+        self.message = spec["message"]
+        self.enabled = spec.get("enabled", True)
+        self.conditions = [Condition(c, where) for c in spec.get("when", [])]
+        self._placeholders = {name: field_getter(name) for name in _PLACEHOLDER.findall(self.message)}
+
+    def render(self, record):
+        def substitute(match):
+            value = self._placeholders[match.group(1)](record)
+            return "?" if value is _MISSING else str(value)
+        return _PLACEHOLDER.sub(substitute, self.message)
+
+
+class RuleSet:
+    # Rules are grouped by resource type. Each distinct field is read once per
+    # record, and each rule narrows the candidate rows one condition at a time.
+    def __init__(self, rules=()):
+        self.rules = defaultdict(list)
+        self._getters = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule):
+        if not rule.enabled:
+            return
+        self.rules[rule.resource].append(rule)
+        for condition in rule.conditions:
+            if condition.field not in self._getters:
+                self._getters[condition.field] = field_getter(condition.field)
+
+    def evaluate(self, resource_type, records):
+        # Returns one list of findings per record, in input order
+        findings = [[] for _ in records]
+        rules = self.rules.get(resource_type)
+        if not rules or not records:
+            return findings
+
+        columns = {}
+        for rule in rules:
+            for condition in rule.conditions:
+                if condition.field not in columns:
+                    getter = self._getters[condition.field]
+                    columns[condition.field] = [getter(record) for record in records]
+
+        for rule in rules:
+            candidates = range(len(records))
+            for condition in rule.conditions:
+                column = columns[condition.field]
+                candidates = [i for i in candidates if condition.test(column[i], condition.value)]
+                if not candidates:
+                    break
+            if rule._placeholders:
+                for i in candidates:
+                    findings[i].append(Finding(rule.id, rule.severity, rule.render(records[i])))
+            else:
+                # A constant message is shared by every matching record
+                finding = Finding(rule.id, rule.severity, rule.message)
+                for i in candidates:
+                    findings[i].append(finding)
+        return findings
+
+
+def load_rules(directory=None, disabled=None):
+    directory = directory or os.getenv("RULES_DIR") or DEFAULT_RULES_DIR
+    if disabled is None:
+        disabled = {r.strip() for r in os.getenv("RULES_DISABLED", "").split(",") if r.strip()}
+
+    ruleset = RuleSet()
+    if not os.path.isdir(directory):
+        return ruleset
+    seen = set()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as fh:
+            specs = json.load(fh).get("rules", [])
+        for spec in specs:
+            rule = Rule(spec, filename)
+            if rule.id in seen:
+                raise ValueError(f"{filename}: duplicate rule id {rule.id}")
+            seen.add(rule.id)
+            if rule.id in disabled:
+                rule.enabled = False
+            ruleset.add(rule)
+    return ruleset
+
+
+def ruleset():
+    # Rule files are parsed and compiled once per process
+    global _ruleset
+    if _ruleset is None:
+        _ruleset = load_rules()
+    return _ruleset
+
+
+def evaluate(resource_type, records):
+    return ruleset().evaluate(resource_type, records)
+
+
+def print_findings(findings, indent="   "):
+    for finding in findings:
+        print(f"{indent}[{finding.severity}] {finding.message}")
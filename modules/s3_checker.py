@@ -1,21 +1,11 @@
-import boto3
-import os
 import json
-from dotenv import load_dotenv
-
-load_dotenv()
+from modules import aws_session, checkpoint, s3_object_scanner
 
 def run_check():
     print("[INFO] Starting S3 diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        s3 = session.client("s3")
+        s3 = aws_session.client("s3")
         buckets = s3.list_buckets()["Buckets"]
 
         if not buckets:
@@ -24,7 +14,13 @@ def run_check():
 
         print(f"[INFO] {len(buckets)} bucket(s) found.")
 
-        for bucket in buckets:
+        # Opt-in object-level scan for selected buckets
+        object_scan = s3_object_scanner.scan_settings()
+        if object_scan["targets"]:
+            # Listing and probe threads share one client, so size its connection pool to match
+            scan_client = aws_session.client("s3", max_pool_connections=object_scan["workers"] * 2)
+
+        for bucket in checkpoint.each(buckets, "buckets", key=lambda b: b["Name"]):
             name = bucket["Name"]
             print(f"\n[INFO] Checking bucket: {name}")
 
@@ -106,5 +102,20 @@ def run_check():
                 else:
                     print(f"   Could not retrieve lifecycle configuration: {e.response['Error']['Message']}")
 
+            # Object-level exposure scan
+            if name in object_scan["targets"]:
+                rate = object_scan["targets"][name]
+                try:
+                    summary = s3_object_scanner.scan_bucket(
+                        scan_client, name,
+                        sample_rate=rate,
+                        time_budget=object_scan["time_budget"],
+                        workers=object_scan["workers"],
+                        shard_keys=object_scan["shard_keys"],
+                    )
+                    s3_object_scanner.print_summary(summary, rate)
+                except Exception as e:
+                    print(f"   Could not scan objects: {e}")
+
     except Exception as e:
         print(f"[ERROR] Failed to run S3 diagnostics: {e}")
@@ -0,0 +1,315 @@
+# modules/s3_object_scanner.py
+import hashlib
+import heapq
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.common import fmt_bytes
+
+PUBLIC_GRANTEES = (
+    "http://acs.amazonaws.com/groups/global/AllUsers",
+    "http://acs.amazonaws.com/groups/global/AuthenticatedUsers",
+)
+
+# A level with more "/" entries than these pages hold is split on its next character instead
+SPLIT_CHARACTERS = [chr(c) for c in range(0x20, 0x7F)]
+# Sorts after any key that starts with the last split character
+AFTER_LAST_CHARACTER = SPLIT_CHARACTERS[-1] + "\U0010ffff"
+
+LARGEST_OBJECTS = 10
+PREFIX_DISCOVERY_PAGES = 5
+MAX_PREFIX_DEPTH = 4
+MAX_SHARDS = 512
+
+PAGE_SIZE = 1000
+# Ranges bounded by an end key are expected to be small; short pages keep the read past the end short
+RANGE_PAGE_SIZE = 100
+# Keys a shard lists at sample rate 1.0; lower rates list proportionally fewer
+DEFAULT_SHARD_KEYS = 10_000_000
+
+
+def parse_scan_targets(value, default_rate):
+    # "bucket-a,bucket-b:0.001" -> {"bucket-a": default_rate, "bucket-b": 0.001}
+    targets = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, rate = item.partition(":")
+        targets[name.strip()] = float(rate) if rate else default_rate
+    return targets
+
+
+def scan_settings():
+    default_rate = float(os.getenv("S3_OBJECT_SCAN_SAMPLE_RATE", "0.01"))
+    return {
+        "targets": parse_scan_targets(os.getenv("S3_OBJECT_SCAN_BUCKETS"), default_rate),
+        "time_budget": float(os.getenv("S3_OBJECT_SCAN_TIME_BUDGET", "300")),
+        "workers": int(os.getenv("S3_OBJECT_SCAN_WORKERS", "16")),
+        "shard_keys": int(os.getenv("S3_OBJECT_SCAN_SHARD_KEYS", str(DEFAULT_SHARD_KEYS))),
+    }
+
+
+def listing_cap(rate, shard_keys):
+    # Keys listed per shard, in proportion to the sample rate; None lists every key
+    if shard_keys <= 0:
+        return None
+    return max(PAGE_SIZE, int(shard_keys * min(rate, 1)))
+
+
+def _sampled(key, rate):
+    # Deterministic per key so repeated scans probe the same objects
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    digest = hashlib.md5(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") < rate * 0xFFFFFFFF
+
+
+class ShardStats:
+    def __init__(self):
+        self.objects = 0
+        self.bytes = 0
+        self.class_counts = Counter()
+        self.class_bytes = Counter()
+        self.largest = []
+        self.sampled = 0
+        self.sampled_bytes = 0
+        self.unencrypted = 0
+        self.unencrypted_bytes = 0
+        self.public = []
+        self.errors = 0
+        self.truncated = False
+        self.capped = 0
+        self.cap = None
+        self.shards = 0
+
+    def add_object(self, obj):
+        size = obj.get("Size", 0)
+        storage_class = obj.get("StorageClass", "STANDARD")
+        self.objects += 1
+        self.bytes += size
+        self.class_counts[storage_class] += 1
+        self.class_bytes[storage_class] += size
+        # Bounded min-heap keeps only the largest objects seen so far
+        if len(self.largest) < LARGEST_OBJECTS:
+            heapq.heappush(self.largest, (size, obj["Key"]))
+        elif size > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (size, obj["Key"]))
+
+    def add_probe(self, size, probe):
+        if probe is None:
+            self.errors += 1
+            return
+        encrypted, public, key = probe
+        self.sampled += 1
+        self.sampled_bytes += size
+        if not encrypted:
+            self.unencrypted += 1
+            self.unencrypted_bytes += size
+        if public:
+            self.public.append(key)
+
+    def merge(self, other):
+        self.objects += other.objects
+        self.bytes += other.bytes
+        self.class_counts.update(other.class_counts)
+        self.class_bytes.update(other.class_bytes)
+        for item in other.largest:
+            if len(self.largest) < LARGEST_OBJECTS:
+                heapq.heappush(self.largest, item)
+            elif item[0] > self.largest[0][0]:
+                heapq.heapreplace(self.largest, item)
+        self.sampled += other.sampled
+        self.sampled_bytes += other.sampled_bytes
+        self.unencrypted += other.unencrypted
+        self.unencrypted_bytes += other.unencrypted_bytes
+        self.public.extend(other.public)
+        self.errors += other.errors
+        self.truncated = self.truncated or other.truncated
+        self.capped += other.capped
+
+
+def _probe_object(s3, bucket, key):
+    try:
+        head = s3.head_object(Bucket=bucket, Key=key)
+        encrypted = bool(head.get("ServerSideEncryption"))
+        acl = s3.get_object_acl(Bucket=bucket, Key=key)
+        public = any(
+            grant.get("Grantee", {}).get("URI") in PUBLIC_GRANTEES
+            for grant in acl.get("Grants", [])
+        )
+        return encrypted, public, key
+    except Exception:
+        return None
+
+
+class Shard:
+    # One listing: every key under prefix, or only those directly under it when
+    # delimiter is set, optionally narrowed to keys after start_after and before end.
+    def __init__(self, prefix, delimiter=None, start_after=None, end=None):
+        self.prefix = prefix
+        self.delimiter = delimiter
+        self.start_after = start_after
+        self.end = end
+
+    @property
+    def page_size(self):
+        return RANGE_PAGE_SIZE if self.end is not None else PAGE_SIZE
+
+    def params(self, bucket):
+        params = {"Bucket": bucket}
+        if self.prefix:
+            params["Prefix"] = self.prefix
+        if self.delimiter:
+            params["Delimiter"] = self.delimiter
+        if self.start_after is not None:
+            params["StartAfter"] = self.start_after
+        return params
+
+    def __repr__(self):
+        return f"Shard({self.prefix!r}, delimiter={self.delimiter!r}, start_after={self.start_after!r}, end={self.end!r})"
+
+
+def _list_level(s3, bucket, prefix):
+    # "/" prefixes directly under prefix, and whether there were too many to enumerate
+    children = []
+    pages = s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix, Delimiter="/")
+    for page_no, page in enumerate(pages):
+        children.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+        if page_no + 1 >= PREFIX_DISCOVERY_PAGES and page.get("IsTruncated"):
+            return children, True
+    return children, False
+
+
+def _character_shards(prefix):
+    # One exact prefix per printable ASCII character after prefix, plus the rare
+    # keys that sort before or after all of them (prefix itself, control
+    # characters, non-ASCII) as two short ranges.
+    shards = [Shard(prefix, end=prefix + SPLIT_CHARACTERS[0])]
+    shards.extend(Shard(prefix + c) for c in SPLIT_CHARACTERS)
+    shards.append(Shard(prefix, start_after=prefix + AFTER_LAST_CHARACTER))
+    return shards
+
+
+def _plan_shards(s3, bucket, pool):
+    # "/" levels are explored breadth-first, one level at a time in parallel. A
+    # level that can be enumerated contributes its direct objects as one shard
+    # and is split into its child prefixes; past MAX_PREFIX_DEPTH or MAX_SHARDS a
+    # prefix is listed whole. Every shard is bounded by S3 itself (Prefix), so no
+    # listing reads into its neighbour's keys.
+    shards = []
+    level = [""]
+    depth = 0
+    while level:
+        next_level = []
+        for prefix, (children, too_many) in zip(level, pool.map(lambda p: _list_level(s3, bucket, p), level)):
+            if too_many:
+                shards.extend(_character_shards(prefix))
+            elif children and depth < MAX_PREFIX_DEPTH and len(shards) + len(next_level) + len(children) < MAX_SHARDS:
+                shards.append(Shard(prefix, delimiter="/"))
+                next_level.extend(children)
+            else:
+                shards.append(Shard(prefix))
+        level = next_level
+        depth += 1
+    return shards
+
+
+def _scan_shard(s3, bucket, shard, rate, deadline, probe_pool, cap=None):
+    stats = ShardStats()
+    params = shard.params(bucket)
+
+    while True:
+        if time.monotonic() > deadline:
+            stats.truncated = True
+            break
+
+        # The last page asks only for the keys still allowed under the cap
+        page_size = shard.page_size if cap is None else min(shard.page_size, cap - stats.objects)
+        page = s3.list_objects_v2(MaxKeys=page_size, **params)
+
+        to_probe = []
+        finished = False
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if shard.end is not None and key >= shard.end:
+                finished = True
+                break
+            stats.add_object(obj)
+            if _sampled(key, rate):
+                to_probe.append((key, obj.get("Size", 0)))
+
+        # Only one page of probes is in flight per shard, so memory stays flat
+        probes = probe_pool.map(lambda item: _probe_object(s3, bucket, item[0]), to_probe)
+        for (key, size), probe in zip(to_probe, probes):
+            stats.add_probe(size, probe)
+
+        if finished or not page.get("IsTruncated"):
+            break
+        if cap is not None and stats.objects >= cap:
+            stats.capped = 1
+            break
+        params["ContinuationToken"] = page["NextContinuationToken"]
+
+    return stats
+
+
+def scan_bucket(s3, bucket, sample_rate=0.01, time_budget=300, workers=16, shard_keys=DEFAULT_SHARD_KEYS):
+    deadline = time.monotonic() + time_budget
+    cap = listing_cap(sample_rate, shard_keys)
+
+    summary = ShardStats()
+    with ThreadPoolExecutor(max_workers=workers) as list_pool, \
+            ThreadPoolExecutor(max_workers=workers) as probe_pool:
+        shards = _plan_shards(s3, bucket, list_pool)
+        futures = [
+            list_pool.submit(_scan_shard, s3, bucket, shard, sample_rate, deadline, probe_pool, cap)
+            for shard in shards
+        ]
+        for future in futures:
+            summary.merge(future.result())
+
+    summary.shards = len(shards)
+    summary.cap = cap
+    return summary
+
+
+def print_summary(summary, sample_rate):
+    print(f"   Object scan: {summary.objects} object(s), {fmt_bytes(summary.bytes)} across {summary.shards} shard(s)")
+    if summary.truncated:
+        print("    [WARN] Time budget reached before the listing finished; figures are partial.")
+    if summary.capped:
+        print(f"    [INFO] {summary.capped} shard(s) stopped listing after {summary.cap} key(s) (in proportion to the sample rate); "
+              "counts and sizes cover the listed keys only.")
+
+    for storage_class, count in summary.class_counts.most_common():
+        print(f"     → {storage_class}: {count} object(s), {fmt_bytes(summary.class_bytes[storage_class])}")
+
+    if summary.sampled:
+        # Extrapolate sampled findings to the whole listing
+        ratio = summary.objects / summary.sampled
+        est_count = int(summary.unencrypted * ratio)
+        est_bytes = int(summary.unencrypted_bytes * ratio)
+        print(f"   Sampled {summary.sampled} object(s) (rate {sample_rate}):")
+        if summary.unencrypted:
+            print(f"    [WARN] {summary.unencrypted} unencrypted object(s) ({fmt_bytes(summary.unencrypted_bytes)}) in sample; "
+                  f"estimated {est_count} object(s), {fmt_bytes(est_bytes)} in bucket")
+        else:
+            print("     No unencrypted objects in sample.")
+        if summary.public:
+            print(f"    [WARN] {len(summary.public)} object(s) with public ACL grants:")
+            for key in summary.public[:10]:
+                print(f"     - {key}")
+        else:
+            print("     No objects with public ACL grants in sample.")
+    if summary.errors:
+        print(f"   Could not inspect {summary.errors} sampled object(s).")
+
+    if summary.largest:
+        print("   Largest objects:")
+        for size, key in sorted(summary.largest, reverse=True):
+            print(f"     - {key} ({fmt_bytes(size)})")
@@ -0,0 +1,211 @@
+# modules/secret_scanner.py
+import atexit
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# (label, pattern). All patterns are compiled into one alternation, so each
+# value is scanned once no matter how many credential formats are known.
+PATTERNS = [
+    ("AWS access key id", r"\b(?:AKIA|ASIA|ABIA|ACCA)[0-9A-Z]{16}\b"),
+    ("AWS secret access key", r"(?i:aws.{0,20}secret.{0,20}?['\"=:\s]+)[A-Za-z0-9/+]{40}\b"),
+    ("Private key", r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----"),
+    ("GitHub token", r"\b(?:gh[pousr]_[A-Za-z0-9]{36,255}|github_pat_[A-Za-z0-9_]{82})\b"),
+    ("GitLab token", r"\bglpat-[A-Za-z0-9_-]{20}\b"),
+    ("Slack token", r"\bxox[abposr]-[A-Za-z0-9-]{10,}"),
+    ("Slack webhook", r"https://hooks\.slack\.com/services/T[A-Za-z0-9_]+/B[A-Za-z0-9_]+/[A-Za-z0-9_]+"),
+    ("Stripe secret key", r"\b[rs]k_live_[0-9a-zA-Z]{24,}\b"),
+    ("Google API key", r"\bAIza[0-9A-Za-z_-]{35}\b"),
+    ("SendGrid API key", r"\bSG\.[A-Za-z0-9_-]{22}\.[A-Za-z0-9_-]{43}\b"),
+    ("Twilio API key", r"\bSK[0-9a-fA-F]{32}\b"),
+    ("npm token", r"\bnpm_[A-Za-z0-9]{36}\b"),
+    ("PyPI token", r"\bpypi-AgEIcHlwaS5vcmc[A-Za-z0-9_-]{50,}"),
+    ("OpenAI-style API key", r"\bsk-(?:proj-|ant-)?[A-Za-z0-9_-]{32,}"),
+    ("Azure storage account key", r"AccountKey=[A-Za-z0-9+/]{86}=="),
+    ("JSON web token", r"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}"),
+    ("Password in connection URI", r"\b[a-z][a-z0-9+.-]{1,20}://[^\s:/@'\"]+:[^\s:/@'\"]{3,}@[^\s/'\"]+"),
+]
+
+_COMBINED = re.compile("|".join(f"(?P<p{i}>{pattern})" for i, (_, pattern) in enumerate(PATTERNS)))
+_LABELS = {f"p{i}": label for i, (label, _) in enumerate(PATTERNS)}
+
+# Names that suggest a secret; their literal values are checked for entropy
+SENSITIVE_NAME = re.compile(r"(?i)(secret|passw(or)?d|\bpwd\b|_pwd|token|api_?key|private_?key|credential|auth_?key|access_?key)")
+# user data lines of the form NAME=value / export NAME="value" / NAME: value
+ASSIGNMENT = re.compile(r"""^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.-]*)\s*[=:]\s*['"]?([^'"\s#]+)""", re.M)
+# Values that point at a secret store rather than holding one
+REFERENCE = re.compile(r"^(arn:aws[a-z-]*:|\{\{resolve:|ssm:|secretsmanager:|\$\{|\$\(|/aws/reference/)")
+TOKEN_CHARS = re.compile(r"^[A-Za-z0-9+/=_\-.]+$")
+
+SENSITIVE_MIN_LENGTH = 8
+SENSITIVE_MIN_ENTROPY = 3.0
+ANONYMOUS_MIN_LENGTH = 32
+ANONYMOUS_MIN_ENTROPY = 4.5
+
+# Above this many distinct documents, scanning moves to worker processes
+PARALLEL_THRESHOLD = 200
+CACHE_SIZE = 10000
+
+SecretFinding = namedtuple("SecretFinding", "kind where preview")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def entropy(value):
+    counts = Counter(value)
+    length = len(value)
+    return -sum(c / length * math.log2(c / length) for c in counts.values())
+
+
+def redact(value):
+    value = str(value)
+    if len(value) <= 8:
+        return "*" * len(value)
+    return f"{value[:4]}…{value[-2:]} ({len(value)} chars)"
+
+
+def _scan_value(where, value, name=None):
+    found = []
+    for match in _COMBINED.finditer(value):
+        found.append(SecretFinding(_LABELS[match.lastgroup], where, redact(match.group(0))))
+    if found:
+        return found
+
+    candidate = value.strip()
+    if REFERENCE.match(candidate):
+        return found
+    if name and SENSITIVE_NAME.search(name):
+        if len(candidate) >= SENSITIVE_MIN_LENGTH and entropy(candidate) >= SENSITIVE_MIN_ENTROPY:
+            found.append(SecretFinding("Literal value in secret-named variable", where, redact(candidate)))
+    elif (len(candidate) >= ANONYMOUS_MIN_LENGTH and TOKEN_CHARS.match(candidate)
+          and entropy(candidate) >= ANONYMOUS_MIN_ENTROPY):
+        found.append(SecretFinding("High-entropy string", where, redact(candidate)))
+    return found
+
+
+def scan_document(document):
+    # document: ("env", [[name, value], ...]) or ("text", "...")
+    kind, content = document
+    findings = []
+    if kind == "env":
+        for name, value in content:
+            findings.extend(_scan_value(name, str(value), name))
+        return findings
+
+    flagged_lines = set()
+    for match in _COMBINED.finditer(content):
+        line = content.count("\n", 0, match.start()) + 1
+        flagged_lines.add(line)
+        findings.append(SecretFinding(_LABELS[match.lastgroup], f"line {line}", redact(match.group(0))))
+    for match in ASSIGNMENT.finditer(content):
+        name, value = match.groups()
+        line = content.count("\n", 0, match.start()) + 1
+        if line not in flagged_lines and SENSITIVE_NAME.search(name):
+            findings.extend(_scan_value(f"line {line} ({name})", value, name))
+    return findings
+
+
+def _hash(document):
+    return hashlib.sha256(json.dumps(document, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def env_document(variables):
+    # Lambda {"NAME": "value"} or ECS [{"name": ..., "value": ...}]
+    if isinstance(variables, dict):
+        pairs = variables.items()
+    else:
+        pairs = ((entry.get("name"), entry.get("value", "")) for entry in variables or [])
+    return ("env", sorted([str(name), str(value)] for name, value in pairs))
+
+
+def text_document(text):
+    return ("text", text or "")
+
+
+def decode_user_data(encoded):
+    # userData comes back base64 encoded and is sometimes gzip compressed
+    try:
+        raw = base64.b64decode(encoded)
+    except (binascii.Error, ValueError):
+        return encoded
+    if raw[:2] == b"\x1f\x8b":
+        try:
+            raw = gzip.decompress(raw)
+        except OSError:
+            pass
+    return raw.decode("utf-8", errors="replace")
+
+
+def _worker_pool(workers=None):
+    # Started on first use and reused by every later batch. Workers are spawned,
+    # not forked: the daemon runs checkers alongside its HTTP and scheduler threads.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = workers or int(os.getenv("SECRET_SCAN_WORKERS", "0")) or None
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _scan_parallel(docs, workers=None):
+    global _pool
+    try:
+        return list(_worker_pool(workers).map(scan_document, docs, chunksize=64))
+    except BrokenProcessPool:
+        # A worker died; the next large batch starts a fresh pool
+        with _pool_lock:
+            _pool = None
+        return [scan_document(d) for d in docs]
+
+
+def scan_batch(documents, workers=None):
+    # Identical documents are scanned once, and results are cached by content hash
+    hashes = [_hash(d) for d in documents]
+    results = {}
+    with _cache_lock:
+        for h in set(hashes):
+            if h in _cache:
+                # A hit makes the entry the most recently used
+                _cache.move_to_end(h)
+                results[h] = _cache[h]
+    pending = {}
+    for h, document in zip(hashes, documents):
+        if h not in results and h not in pending:
+            pending[h] = document
+
+    if pending:
+        keys = list(pending)
+        docs = [pending[k] for k in keys]
+        if len(docs) >= PARALLEL_THRESHOLD:
+            scanned = _scan_parallel(docs, workers)
+        else:
+            scanned = [scan_document(d) for d in docs]
+        scanned = [[SecretFinding(*f) for f in found] for found in scanned]
+        with _cache_lock:
+            for key, found in zip(keys, scanned):
+                results[key] = found
+                _cache[key] = found
+                _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return [results[h] for h in hashes]
+
+
+def describe(findings):
+    return ", ".join(f"{f.where}: {f.kind} [{f.preview}]" for f in findings)
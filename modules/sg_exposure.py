@@ -0,0 +1,210 @@
+# modules/sg_exposure.py
+import ipaddress
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, deque
+
+from modules.common import NON_INTERNET_CIDRS
+
+PROTOCOL_NAMES = {"-1": "all", "6": "tcp", "17": "udp", "1": "icmp", "58": "icmpv6"}
+
+# A public CIDR at least this broad is treated as open to the internet
+# (0.0.0.0/0, ::/0, 0.0.0.0/1, 52.0.0.0/8, ...). Narrow allowlists are not.
+INTERNET_PREFIX = {4: 8, 6: 32}
+
+ADMIN_PORTS = {22: "SSH", 3389: "RDP"}
+
+NON_INTERNET_NETWORKS = [ipaddress.ip_network(n) for n in NON_INTERNET_CIDRS]
+
+
+def _is_internet(network):
+    if network.prefixlen > INTERNET_PREFIX[network.version]:
+        return False
+    return not any(
+        network.version == private.version and network.subnet_of(private)
+        for private in NON_INTERNET_NETWORKS
+    )
+
+
+class Rule:
+    __slots__ = ("id", "group_id", "vpc_id", "protocol", "from_port", "to_port",
+                 "source_kind", "source", "version", "lo", "hi", "internet")
+
+    def __init__(self, rule_id, group, protocol, from_port, to_port, source_kind, source):
+        self.id = rule_id
+        self.group_id = group["GroupId"]
+        self.vpc_id = group.get("VpcId")
+        self.protocol = protocol
+        self.from_port = from_port
+        self.to_port = to_port
+        self.source_kind = source_kind
+        self.source = source
+        self.version = None
+        self.lo = self.hi = None
+        self.internet = False
+
+        if source_kind == "cidr":
+            network = ipaddress.ip_network(source, strict=False)
+            self.version = network.version
+            self.lo = int(network.network_address)
+            self.hi = int(network.broadcast_address)
+            self.internet = _is_internet(network)
+
+    def ports(self):
+        if self.protocol == "all" or (self.from_port, self.to_port) == (0, 65535):
+            return "All"
+        if self.from_port == self.to_port:
+            return str(self.from_port)
+        return f"{self.from_port}-{self.to_port}"
+
+
+class IntervalIndex:
+    # Elementary-segment index over port ranges: any port maps to the ids of
+    # the rules covering it with one bisect, instead of scanning every rule.
+    def __init__(self, intervals):
+        bounds = sorted({lo for lo, _, _ in intervals} | {hi + 1 for _, hi, _ in intervals})
+        members = [set() for _ in bounds]
+        for lo, hi, item in intervals:
+            for k in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                members[k].add(item)
+        self.bounds = bounds
+        self.members = [frozenset(m) for m in members]
+
+    def lookup(self, point):
+        i = bisect_right(self.bounds, point) - 1
+        return self.members[i] if i >= 0 else frozenset()
+
+
+def _port_range(perm, protocol):
+    if protocol == "all":
+        return 0, 65535
+    from_port = perm.get("FromPort")
+    to_port = perm.get("ToPort")
+    if from_port is None or from_port == -1:
+        return 0, 65535
+    return from_port, to_port if to_port not in (None, -1) else from_port
+
+
+class ExposureIndex:
+    def __init__(self):
+        self.groups = {}
+        self.rules = []
+        self.enis = {}
+        self.enis_by_group = defaultdict(list)
+        self._port_index = {}
+        self._internet_index = {}
+        self._sg_edges = defaultdict(list)
+        self._internet_by_group = defaultdict(list)
+        self._internet_by_vpc = defaultdict(list)
+
+    def add_group(self, group):
+        self.groups[group["GroupId"]] = group
+        for perm in group.get("IpPermissions", []):
+            raw = str(perm.get("IpProtocol", "-1")).lower()
+            protocol = PROTOCOL_NAMES.get(raw, raw)
+            from_port, to_port = _port_range(perm, protocol)
+
+            sources = [("cidr", r["CidrIp"]) for r in perm.get("IpRanges", [])]
+            sources += [("cidr", r["CidrIpv6"]) for r in perm.get("Ipv6Ranges", [])]
+            sources += [("sg", p["GroupId"]) for p in perm.get("UserIdGroupPairs", []) if p.get("GroupId")]
+            sources += [("prefix-list", p["PrefixListId"]) for p in perm.get("PrefixListIds", [])]
+
+            for kind, source in sources:
+                rule = Rule(len(self.rules), group, protocol, from_port, to_port, kind, source)
+                self.rules.append(rule)
+
+    def add_interface(self, eni):
+        record = {
+            "id": eni["NetworkInterfaceId"],
+            "vpc_id": eni.get("VpcId"),
+            "subnet_id": eni.get("SubnetId"),
+            "instance_id": eni.get("Attachment", {}).get("InstanceId"),
+            "public_ip": eni.get("Association", {}).get("PublicIp"),
+            "ipv6": [a["Ipv6Address"] for a in eni.get("Ipv6Addresses", [])],
+            "groups": [g["GroupId"] for g in eni.get("Groups", [])],
+            "description": eni.get("Description", ""),
+        }
+        self.enis[record["id"]] = record
+        for group_id in record["groups"]:
+            self.enis_by_group[group_id].append(record)
+
+    def build(self):
+        by_protocol = defaultdict(list)
+        internet = defaultdict(list)
+        for rule in self.rules:
+            interval = (rule.from_port, rule.to_port, rule.id)
+            by_protocol[rule.protocol].append(interval)
+            if rule.internet:
+                internet[rule.protocol].append(interval)
+                self._internet_by_group[rule.group_id].append(rule)
+                self._internet_by_vpc[rule.vpc_id].append(rule)
+            if rule.source_kind == "sg":
+                self._sg_edges[rule.source].append(rule)
+
+        self._port_index = {p: IntervalIndex(i) for p, i in by_protocol.items()}
+        self._internet_index = {p: IntervalIndex(i) for p, i in internet.items()}
+        return self
+
+    def _lookup(self, index, port, protocol):
+        ids = set()
+        for key in (protocol, "all"):
+            if key in index:
+                ids |= index[key].lookup(port)
+        return [self.rules[i] for i in ids]
+
+    def internet_rules(self, port, protocol="tcp"):
+        return self._lookup(self._internet_index, port, protocol)
+
+    def groups_open_to_internet(self, port, protocol="tcp"):
+        return {rule.group_id for rule in self.internet_rules(port, protocol)}
+
+    def groups_open_to_address(self, address, port, protocol="tcp"):
+        address = ipaddress.ip_address(address)
+        value = int(address)
+        return {
+            rule.group_id
+            for rule in self._lookup(self._port_index, port, protocol)
+            if rule.version == address.version and rule.lo <= value <= rule.hi
+        }
+
+    def internet_exposures(self, vpc_id=None):
+        if vpc_id is None:
+            return [rule for rule in self.rules if rule.internet]
+        return list(self._internet_by_vpc.get(vpc_id, []))
+
+    def internet_rules_for_groups(self, group_ids):
+        rules = []
+        for group_id in group_ids:
+            rules.extend(self._internet_by_group.get(group_id, []))
+        return rules
+
+    def groups_reachable_from_group(self, group_id, port=None, protocol="tcp"):
+        # Groups whose rules admit traffic from members of group_id
+        reachable = set()
+        for rule in self._sg_edges.get(group_id, []):
+            if port is None or rule.protocol == "all" or (
+                rule.protocol == protocol and rule.from_port <= port <= rule.to_port
+            ):
+                reachable.add(rule.group_id)
+        return reachable
+
+    def lateral_reach(self, start_groups, port=None, protocol="tcp"):
+        # Breadth-first walk of SG-to-SG references starting from start_groups
+        seen = set(start_groups)
+        queue = deque(start_groups)
+        while queue:
+            for nxt in self.groups_reachable_from_group(queue.popleft(), port, protocol):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen - set(start_groups)
+
+    def describe_rule(self, rule):
+        name = self.groups.get(rule.group_id, {}).get("GroupName", "")
+        return f"SG {rule.group_id} ({name}) {rule.protocol} ports {rule.ports()} from {rule.source}"
+
+    def exposed_enis(self, group_ids):
+        found = {}
+        for group_id in group_ids:
+            for eni in self.enis_by_group.get(group_id, []):
+                found[eni["id"]] = eni
+        return list(found.values())
@@ -0,0 +1,116 @@
+# modules/tag_checker.py
+import os
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from modules import aws_session
+
+# get_resources returns at most 100 resources per page
+PAGE_SIZE = 100
+TOP_N = 10
+
+RESOURCE_KIND = re.compile(r"([^/:]+)[/:]")
+
+
+def parse_policy(spec):
+    # "owner,env=prod|staging,cost-center" -> {"owner": None, "env": {"prod", "staging"}, ...}
+    policy = {}
+    for entry in spec.split(","):
+        key, _, allowed = entry.strip().partition("=")
+        if key:
+            policy[key.strip()] = {v.strip() for v in allowed.split("|") if v.strip()} or None
+    return policy
+
+
+def service_of(arn):
+    # arn:partition:service:region:account:resource
+    parts = arn.split(":", 5)
+    if len(parts) < 6:
+        return "unknown"
+    # "instance/i-0abc", "function:name" and "log-group:/aws/x" name a type; "my-bucket" does not
+    kind = RESOURCE_KIND.match(parts[5])
+    return f"{parts[2]}:{kind.group(1)}" if kind else parts[2]
+
+
+def evaluate(resources, policy):
+    # Returns {arn: [problems]} for every resource that breaks the policy
+    violations = {}
+    for resource in resources:
+        tags = {tag["Key"]: tag["Value"] for tag in resource.get("Tags", [])}
+        problems = []
+        for key, allowed in policy.items():
+            value = tags.get(key)
+            if value is None or not value.strip():
+                problems.append(f"missing {key}")
+            elif allowed and value not in allowed:
+                problems.append(f"{key}={value}")
+        if problems:
+            violations[resource["ResourceARN"]] = problems
+    return violations
+
+
+def scan_region(region, policy, resource_types):
+    # One paginated stream covers every tagged resource type in the region
+    client = aws_session.client("resourcegroupstaggingapi", region_name=region)
+    kwargs = {"ResourcesPerPage": PAGE_SIZE}
+    if resource_types:
+        kwargs["ResourceTypeFilters"] = resource_types
+    resources = [
+        resource for page in client.get_paginator("get_resources").paginate(**kwargs)
+        for resource in page["ResourceTagMappingList"]
+    ]
+    return resources, evaluate(resources, policy)
+
+
+def print_region(region, resources, violations):
+    print(f"\n  Region: {region} - {len(resources)} tagged resource(s), {len(violations)} non-compliant")
+    if not violations:
+        return
+
+    totals = Counter(service_of(r["ResourceARN"]) for r in resources)
+    failing = defaultdict(list)
+    missing = defaultdict(Counter)
+    for arn, problems in violations.items():
+        service = service_of(arn)
+        failing[service].append(arn)
+        for problem in problems:
+            missing[service][problem] += 1
+
+    for service in sorted(failing, key=lambda s: len(failing[s]), reverse=True):
+        summary = ", ".join(f"{problem}: {count}" for problem, count in missing[service].most_common())
+        print(f"   [WARN] {service}: {len(failing[service])}/{totals[service]} non-compliant ({summary})")
+        for arn in sorted(failing[service])[:TOP_N]:
+            print(f"     - {arn}: {', '.join(violations[arn])}")
+        if len(failing[service]) > TOP_N:
+            print(f"     ... and {len(failing[service]) - TOP_N} more")
+
+
+def run_check():
+    print("\n[INFO] Starting tag compliance diagnostics...")
+
+    try:
+        policy = parse_policy(os.getenv("REQUIRED_TAGS", ""))
+        if not policy:
+            print("  No required tags configured. Set REQUIRED_TAGS, e.g. REQUIRED_TAGS=owner,env=prod|staging|dev,cost-center")
+            return
+
+        regions = [r.strip() for r in os.getenv("TAG_REGIONS", "").split(",") if r.strip()] or [aws_session.region()]
+        resource_types = [t.strip() for t in os.getenv("TAG_RESOURCE_TYPES", "").split(",") if t.strip()]
+        print(f"  Required tags: {', '.join(k + ('=' + '|'.join(sorted(v)) if v else '') for k, v in policy.items())}")
+
+        # Regions are scanned concurrently; results are printed in the order given
+        with ThreadPoolExecutor(max_workers=len(regions)) as pool:
+            futures = [(region, pool.submit(scan_region, region, policy, resource_types)) for region in regions]
+            for region, future in futures:
+                try:
+                    resources, violations = future.result()
+                except Exception as e:
+                    print(f"\n  Region: {region}\n   [ERROR] Failed to list tagged resources: {e}")
+                    continue
+                print_region(region, resources, violations)
+
+        print("\n   [INFO] The tagging API only lists resources that have (or once had) tags; "
+              "resources that were never tagged are not included.")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to run tag compliance diagnostics: {e}")
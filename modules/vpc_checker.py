@@ -1,23 +1,48 @@
 # modules/vpc_checker.py
-import boto3
 import os
-from dotenv import load_dotenv
+import time
+from modules import aws_session, inventory, prefetch
+from modules.vpc_topology import PUBLIC, route_destination, route_target
 
-load_dotenv()
+# Shared with other checkers during Run ALL (see modules/prefetch.py)
+DATASETS = ("ec2.vpcs", "ec2.internet_gateways", "ec2.flow_logs", "sg.exposure", "vpc.topology")
+
+def analyze_flow_logs(topology, vpc_id, flow_logs, source):
+    # numpy is only needed for flow log analysis, so it is imported on demand
+    from modules import flow_log_analyzer
+
+    try:
+        private_cidrs = [
+            info.cidr for info in topology.vpc(vpc_id).values()
+            if info.classification != PUBLIC and info.cidr
+        ]
+        aggregates = flow_log_analyzer.FlowAggregates(private_cidrs)
+
+        if source.lower() == "s3":
+            days = int(os.getenv("FLOW_LOG_DAYS", "1"))
+            s3 = aws_session.client("s3")
+            for fl in flow_logs:
+                if fl.get("LogDestinationType") == "s3":
+                    flow_log_analyzer.analyze_s3(aggregates, s3, fl, days)
+        else:
+            fields = flow_log_analyzer.parse_format(os.getenv("FLOW_LOG_FORMAT") or flow_logs[0].get("LogFormat"))
+            # A per-VPC subdirectory is used when the local mirror has one
+            root = os.path.join(source, vpc_id)
+            if not os.path.isdir(root):
+                root = source
+            flow_log_analyzer.analyze_local(aggregates, root, fields)
+
+        flow_log_analyzer.print_report(aggregates)
+    except Exception as e:
+        print(f"   Could not analyze flow logs: {e}")
 
 def run_check():
     print("\n[INFO] Starting VPC diagnostics...")
 
     try:
-        session = boto3.Session(
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
+        started = time.time()
 
-        ec2 = session.client("ec2")
-
-        vpcs = ec2.describe_vpcs()["Vpcs"]
+        vpcs = prefetch.get("ec2.vpcs")
         if not vpcs:
             print("  No VPCs found in the region.")
             return
@@ -25,7 +50,7 @@ def run_check():
         print(f"  {len(vpcs)} VPC(s) found.")
 
         # Get all IGWs for quick lookup
-        igws = ec2.describe_internet_gateways()["InternetGateways"]
+        igws = prefetch.get("ec2.internet_gateways")
         igw_map = {}
         for igw in igws:
             for attachment in igw.get("Attachments", []):
@@ -33,8 +58,17 @@ def run_check():
                     igw_map[attachment["VpcId"]] = igw["InternetGatewayId"]
 
         # Get all flow logs for quick lookup
-        flow_logs = ec2.describe_flow_logs()["FlowLogs"]
+        flow_logs = prefetch.get("ec2.flow_logs")
         flow_logs_vpc_ids = {fl["ResourceId"] for fl in flow_logs if fl["ResourceType"] == "VPC"}
+        flow_log_source = os.getenv("FLOW_LOG_SOURCE")
+
+        # Index all security group rules and ENIs in the region once
+        exposure = prefetch.get("sg.exposure")
+        inventory.record_security_groups(exposure)
+        inventory.prune("ec2:security-group", started)
+
+        # Subnet -> route table -> target graph for every VPC in the region
+        topology = prefetch.get("vpc.topology")
 
         for vpc in vpcs:
             vpc_id = vpc["VpcId"]
@@ -57,53 +91,59 @@ def run_check():
             else:
                 print("   Flow Logs: NOT enabled")
 
-            # Subnets info
-            subnets = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])["Subnets"]
+            # Subnets info, classified by their effective route table
+            subnets = topology.vpc(vpc_id)
             print(f"   {len(subnets)} subnet(s) found:")
-            for subnet in subnets:
-                subnet_id = subnet["SubnetId"]
-                subnet_cidr = subnet["CidrBlock"]
-                az = subnet["AvailabilityZone"]
-                public = subnet.get("MapPublicIpOnLaunch", False)
-                print(f"     - Subnet {subnet_id} (AZ: {az}, CIDR: {subnet_cidr}, Public IP on launch: {public})")
+            for info in subnets.values():
+                rt_note = f"{info.route_table_id} (main, implicit)" if info.implicit else info.route_table_id
+                print(f"     - Subnet {info.subnet_id} (AZ: {info.az}, CIDR: {info.cidr}, Public IP on launch: {info.map_public_ip})")
+                print(f"       → Classification: {info.classification}, Route Table: {rt_note}")
+                if info.map_public_ip and info.classification != PUBLIC:
+                    print("       [INFO] Auto-assigns public IPs but has no route to an Internet Gateway.")
 
             # Route tables
-            rts = ec2.describe_route_tables(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])["RouteTables"]
+            rts = topology.route_tables_for_vpc(vpc_id)
             print(f"   {len(rts)} route table(s) found:")
             for rt in rts:
                 rt_id = rt["RouteTableId"]
                 main = any(assoc.get("Main") for assoc in rt.get("Associations", []))
                 print(f"     - Route Table {rt_id} {'(Main)' if main else ''}:")
                 for route in rt.get("Routes", []):
-                    dest = route.get("DestinationCidrBlock", route.get("DestinationIpv6CidrBlock", ""))
-                    target = (
-                        route.get("GatewayId")
-                        or route.get("NatGatewayId")
-                        or route.get("InstanceId")
-                        or route.get("VpcPeeringConnectionId")
-                        or "local"
-                    )
-                    print(f"       → Destination: {dest}  Target: {target}")
-
-            # Security groups wide open ingress check
-            sgs = ec2.describe_security_groups(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])["SecurityGroups"]
-            open_ports = []
-            for sg in sgs:
-                sg_id = sg["GroupId"]
-                for perm in sg.get("IpPermissions", []):
-                    for ip_range in perm.get("IpRanges", []):
-                        cidr = ip_range.get("CidrIp")
-                        if cidr == "0.0.0.0/0":
-                            from_port = perm.get("FromPort", "All")
-                            to_port = perm.get("ToPort", "All")
-                            open_ports.append((sg_id, from_port, to_port))
-            if open_ports:
-                print("   [WARN] Security Groups with wide open ingress (0.0.0.0/0):")
-                for sg_id, from_port, to_port in open_ports:
-                    print(f"     - SG {sg_id} open ports: {from_port} - {to_port}")
+                    dest = route_destination(route)
+                    target = route_target(route)
+                    state = " (blackhole)" if route.get("State") == "blackhole" else ""
+                    print(f"       → Destination: {dest}  Target: {target}{state}")
+
+            # Security groups open to the internet (IPv4/IPv6, broad ranges, any port range)
+            open_rules = exposure.internet_exposures(vpc_id)
+            if open_rules:
+                print("   [WARN] Security Group rules open to the internet:")
+                for rule in open_rules:
+                    print(f"     - {exposure.describe_rule(rule)}")
+
+                exposed_groups = {rule.group_id for rule in open_rules}
+                reachable = [
+                    eni for eni in exposure.exposed_enis(exposed_groups)
+                    if (eni["public_ip"] or eni["ipv6"]) and topology.classify(eni["subnet_id"]) == PUBLIC
+                ]
+                if reachable:
+                    print(f"   [WARN] {len(reachable)} network interface(s) in public subnets reachable through those groups:")
+                    for eni in reachable:
+                        target = eni["instance_id"] or eni["description"] or "unattached"
+                        print(f"     - ENI {eni['id']} ({target}) public IP: {eni['public_ip'] or ', '.join(eni['ipv6'])}")
+
+                # Groups that trust an exposed group through SG references
+                lateral = exposure.lateral_reach(exposed_groups)
+                if lateral:
+                    print(f"   [INFO] Security Groups reachable through SG references from exposed groups: {', '.join(sorted(lateral))}")
             else:
                 print("   No Security Groups with wide open ingress detected.")
 
+            # Optional: analyze flow log records (FLOW_LOG_SOURCE=s3 or a local directory)
+            if flow_log_source and vpc_id in flow_logs_vpc_ids:
+                vpc_flow_logs = [fl for fl in flow_logs if fl["ResourceId"] == vpc_id]
+                analyze_flow_logs(topology, vpc_id, vpc_flow_logs, flow_log_source)
+
     except Exception as e:
         print(f"[ERROR] Failed to run VPC diagnostics: {e}")
         
\ No newline at end of file
@@ -0,0 +1,147 @@
+# modules/vpc_topology.py
+from collections import defaultdict
+
+PUBLIC = "public"
+PRIVATE_NAT = "private-nat"
+PRIVATE_TRANSIT = "private-transit"
+ISOLATED = "isolated"
+
+DEFAULT_ROUTES = ("0.0.0.0/0", "::/0")
+
+# Route target id prefixes -> target kind
+TARGET_KINDS = (
+    ("igw-", "igw"),
+    ("eigw-", "egress-only-igw"),
+    ("nat-", "nat"),
+    ("tgw-", "transit-gateway"),
+    ("vgw-", "vpn-gateway"),
+    ("pcx-", "peering"),
+    ("vpce-", "endpoint"),
+    ("eni-", "network-interface"),
+    ("i-", "instance"),
+    ("local", "local"),
+)
+
+ROUTE_TARGET_KEYS = (
+    "GatewayId", "EgressOnlyInternetGatewayId", "NatGatewayId", "TransitGatewayId",
+    "VpcPeeringConnectionId", "InstanceId", "NetworkInterfaceId", "LocalGatewayId",
+    "CarrierGatewayId", "CoreNetworkArn",
+)
+
+
+def target_kind(target_id):
+    for prefix, kind in TARGET_KINDS:
+        if target_id.startswith(prefix):
+            return kind
+    return "other"
+
+
+def route_target(route):
+    for key in ROUTE_TARGET_KEYS:
+        if route.get(key):
+            return route[key]
+    return "local"
+
+
+def route_destination(route):
+    return (
+        route.get("DestinationCidrBlock")
+        or route.get("DestinationIpv6CidrBlock")
+        or route.get("DestinationPrefixListId", "")
+    )
+
+
+def classify_routes(routes):
+    # The default route decides how a subnet reaches the internet
+    kinds = set()
+    for route in routes:
+        if route.get("State") == "blackhole":
+            continue
+        if route_destination(route) in DEFAULT_ROUTES:
+            kinds.add(target_kind(route_target(route)))
+
+    if "igw" in kinds:
+        return PUBLIC
+    # Egress-only gateways are the IPv6 equivalent of a NAT
+    if kinds & {"nat", "instance", "network-interface", "egress-only-igw"}:
+        return PRIVATE_NAT
+    if kinds & {"transit-gateway", "vpn-gateway", "peering"}:
+        return PRIVATE_TRANSIT
+    return ISOLATED
+
+
+class SubnetInfo:
+    def __init__(self, subnet, route_table, implicit):
+        self.subnet_id = subnet["SubnetId"]
+        self.vpc_id = subnet["VpcId"]
+        self.cidr = subnet.get("CidrBlock")
+        self.az = subnet.get("AvailabilityZone")
+        self.map_public_ip = subnet.get("MapPublicIpOnLaunch", False)
+        self.route_table_id = route_table["RouteTableId"] if route_table else None
+        self.implicit = implicit
+        routes = route_table.get("Routes", []) if route_table else []
+        self.classification = classify_routes(routes)
+        self.targets = sorted({target_kind(route_target(r)) for r in routes} - {"local"})
+
+
+class VpcTopology:
+    def __init__(self):
+        self.subnets = {}
+        self.route_tables = {}
+        self._subnets_by_vpc = defaultdict(list)
+        self._tables_by_vpc = defaultdict(list)
+        self._explicit = {}
+        self._main = {}
+        self._classified = {}
+
+    def add_subnet(self, subnet):
+        self.subnets[subnet["SubnetId"]] = subnet
+        self._subnets_by_vpc[subnet["VpcId"]].append(subnet)
+
+    def add_route_table(self, rt):
+        self.route_tables[rt["RouteTableId"]] = rt
+        self._tables_by_vpc[rt["VpcId"]].append(rt)
+        for assoc in rt.get("Associations", []):
+            if assoc.get("Main"):
+                self._main[rt["VpcId"]] = rt
+            elif assoc.get("SubnetId"):
+                self._explicit[assoc["SubnetId"]] = rt
+
+    def vpc(self, vpc_id):
+        # Classification is computed once per VPC and cached
+        if vpc_id not in self._classified:
+            main = self._main.get(vpc_id)
+            infos = {}
+            for subnet in self._subnets_by_vpc.get(vpc_id, []):
+                rt = self._explicit.get(subnet["SubnetId"])
+                infos[subnet["SubnetId"]] = SubnetInfo(subnet, rt or main, implicit=rt is None)
+            self._classified[vpc_id] = infos
+        return self._classified[vpc_id]
+
+    def route_tables_for_vpc(self, vpc_id):
+        return self._tables_by_vpc.get(vpc_id, [])
+
+    def main_route_table(self, vpc_id):
+        return self._main.get(vpc_id)
+
+    def subnet(self, subnet_id):
+        subnet = self.subnets.get(subnet_id)
+        if subnet is None:
+            return None
+        return self.vpc(subnet["VpcId"]).get(subnet_id)
+
+    def classify(self, subnet_id):
+        info = self.subnet(subnet_id)
+        return info.classification if info else None
+
+    def placement(self, subnet_ids):
+        # Most exposed classification across a resource's subnets
+        order = (PUBLIC, PRIVATE_NAT, PRIVATE_TRANSIT, ISOLATED)
+        classes = {self.classify(s) for s in subnet_ids} - {None}
+        for classification in order:
+            if classification in classes:
+                return classification
+        return None
+
+    def describe_subnets(self, subnet_ids):
+        return ", ".join(f"{s} ({self.classify(s) or 'unknown'})" for s in subnet_ids)
@@ -0,0 +1,24 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from modules import aws_session
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    # aws_session.client(service) returns a Stubber-backed client; no request leaves the process
+    stubs = {}
+
+    def make(service):
+        client = boto3.client(service, region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        stubs[service] = Stubber(client)
+        stubs[service].activate()
+        return stubs[service]
+
+    monkeypatch.setattr(aws_session, "client", lambda service, *args, **kwargs: stubs[service].client)
+    monkeypatch.setattr(aws_session, "region", lambda: "us-east-1")
+    monkeypatch.setattr(aws_session, "account_id", lambda: "111111111111")
+    yield make
+    for stub in stubs.values():
+        stub.deactivate()
@@ -0,0 +1,145 @@
+import pytest
+
+from modules import checkpoint
+from modules.checkpoint import Checkpoint
+
+
+class FakePaginator:
+    # Serves items in pages of two, with botocore's MaxItems/StartingToken contract
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def paginate(self, PaginationConfig):
+        return FakePageIterator(self, PaginationConfig)
+
+
+class FakePageIterator:
+    def __init__(self, paginator, config):
+        self.paginator = paginator
+        self.start = int(config.get("StartingToken") or 0)
+        self.stop = min(self.start + config["MaxItems"], len(paginator.items))
+        self.resume_token = None
+
+    def __iter__(self):
+        for offset in range(self.start, self.stop, 2):
+            self.paginator.calls += 1
+            yield {"Items": self.paginator.items[offset:min(offset + 2, self.stop)]}
+        if self.stop < len(self.paginator.items):
+            self.resume_token = str(self.stop)
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "BATCH_ITEMS", 4)
+    return str(tmp_path / "checkpoint.jsonl")
+
+
+def listing(paginator, seen, fail_at=None):
+    def check():
+        for name in checkpoint.notes("items"):
+            seen.append(("replayed", name))
+        for page in checkpoint.paginate(paginator, "items"):
+            for item in page["Items"]:
+                if item == fail_at:
+                    raise KeyboardInterrupt
+                print(f"item {item}")
+                seen.append(("listed", item))
+                checkpoint.note("items", item)
+    return check
+
+
+def test_resume_replays_completed_batches_and_their_notes(journal, capsys):
+    items = list(range(10))
+    first = Checkpoint(journal, region="us-east-1")
+    with pytest.raises(KeyboardInterrupt):
+        first.run("Lambda", listing(FakePaginator(items), [], fail_at=5))
+    first.close()
+    capsys.readouterr()
+
+    seen = []
+    paginator = FakePaginator(items)
+    second = Checkpoint(journal, resume=True, region="us-east-1")
+    second.run("Lambda", listing(paginator, seen))
+    second.close()
+
+    output = capsys.readouterr().out
+    # Items 0-3 were journaled; the interrupted batch (4, 5) runs again
+    assert [item for kind, item in seen if kind == "replayed"] == [0, 1, 2, 3]
+    assert [item for kind, item in seen if kind == "listed"] == [4, 5, 6, 7, 8, 9]
+    assert paginator.calls == 3
+    assert "1 completed batch(es) replayed" in output
+    assert all(f"item {n}\n" in output for n in range(10))
+
+
+def test_completed_checkers_are_replayed_and_failures_rerun(journal, capsys):
+    runs = []
+    first = Checkpoint(journal, region="us-east-1")
+    first.run("S3", lambda: print("bucket report"))
+    first.run("EC2", lambda: print(f"{checkpoint.FAILURE_MARKER} EC2 diagnostics: boom"))
+    first.close()
+
+    second = Checkpoint(journal, resume=True, region="us-east-1")
+    second.run("S3", lambda: runs.append("S3"))
+    second.run("EC2", lambda: runs.append("EC2"))
+    second.close()
+
+    assert runs == ["EC2"]
+    assert capsys.readouterr().out.count("bucket report") == 2
+    assert not Checkpoint(journal, resume=True, region="eu-west-1").is_complete("S3")
+
+
+def test_each_skips_items_finished_before_the_interruption(journal):
+    def buckets(seen, fail_at=None):
+        def check():
+            for name in checkpoint.each(["a", "b", "c"], "buckets"):
+                if name == fail_at:
+                    raise KeyboardInterrupt
+                seen.append(name)
+        return check
+
+    first = Checkpoint(journal, region="us-east-1")
+    with pytest.raises(KeyboardInterrupt):
+        first.run("S3", buckets([], fail_at="c"))
+    first.close()
+
+    seen = []
+    second = Checkpoint(journal, resume=True, region="us-east-1")
+    second.run("S3", buckets(seen))
+    second.close()
+
+    assert seen == ["c"]
+
+
+def test_batches_are_re_formed_when_the_listing_changes(journal):
+    def functions(listing, seen, fail_at=None):
+        def check():
+            for batch in checkpoint.each_batch(listing, "functions"):
+                if fail_at in batch:
+                    raise KeyboardInterrupt
+                seen.extend(batch)
+        return check
+
+    first_seen = []
+    first = Checkpoint(journal, region="us-east-1")
+    with pytest.raises(KeyboardInterrupt):
+        first.run("Lambda", functions(list("abcdefghij"), first_seen, fail_at="f"))
+    first.close()
+
+    # "new" sorts first and "c" was deleted, shifting every later batch boundary
+    seen = []
+    second = Checkpoint(journal, resume=True, region="us-east-1")
+    second.run("Lambda", functions(["new"] + list("abdefghij"), seen))
+    second.close()
+
+    assert first_seen == list("abcd")
+    assert seen == ["new", "e", "f", "g", "h", "i", "j"]
+
+
+def test_helpers_pass_through_without_an_active_checkpoint():
+    checkpoint.note("items", 1)
+
+    assert checkpoint.notes("items") == []
+    assert list(checkpoint.each([1, 2])) == [1, 2]
+    assert [len(batch) for batch in checkpoint.each_batch(range(250))] == [100, 100, 50]
+    assert not checkpoint.resumed()
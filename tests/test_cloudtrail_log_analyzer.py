@@ -0,0 +1,55 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from modules.cloudtrail_log_analyzer import ColumnBatch, TrailAggregates, analyze_local, iter_records
+
+RECORDS = [
+    {"eventSource": "s3.amazonaws.com", "eventName": "GetObject", "userIdentity": {"arn": "arn:aws:iam::1:user/a"},
+     "sourceIPAddress": "198.51.100.1", "awsRegion": "us-east-1"},
+    {"eventSource": "iam.amazonaws.com", "eventName": "ListUsers", "userIdentity": {"type": "Root"},
+     "errorCode": "AccessDenied", "sourceIPAddress": "203.0.113.9", "awsRegion": "us-east-1"},
+    {"eventSource": "s3.amazonaws.com", "eventName": "GetObject", "userIdentity": {"arn": "arn:aws:iam::1:user/a"},
+     "sourceIPAddress": "198.51.100.1", "awsRegion": "us-east-1"},
+]
+
+
+def test_records_are_decoded_across_chunk_boundaries():
+    text = json.dumps({"Records": RECORDS}, indent=2)
+
+    assert list(iter_records(io.StringIO(text), chunk_size=7)) == RECORDS
+    assert list(iter_records(io.StringIO('{"Records": []}'), chunk_size=3)) == []
+    with pytest.raises(ValueError):
+        list(iter_records(io.StringIO(text[:-40]), chunk_size=16))
+
+
+def test_aggregates_count_columns_and_denied_calls():
+    batch = ColumnBatch("file")
+    for record in RECORDS:
+        batch.add(record)
+    aggregates = TrailAggregates()
+    aggregates.add(batch)
+
+    assert aggregates.records == 3
+    assert aggregates.callers["arn:aws:iam::1:user/a"] == 2
+    assert aggregates.events["s3.amazonaws.com:GetObject"] == 2
+    assert aggregates.denied_by_ip == {"203.0.113.9": 1}
+    assert "" not in aggregates.errors
+
+
+def test_local_files_are_parsed_in_spawned_workers(tmp_path):
+    day = tmp_path / "AWSLogs" / "1" / "CloudTrail" / "us-east-1" / "2026" / "01" / "02"
+    day.mkdir(parents=True)
+    for n in range(3):
+        with gzip.open(day / f"log-{n}.json.gz", "wt", encoding="utf-8") as f:
+            json.dump({"Records": RECORDS}, f)
+    digest = tmp_path / "AWSLogs" / "1" / "CloudTrail-Digest"
+    digest.mkdir()
+    (digest / "digest.json.gz").write_bytes(b"not a log file")
+
+    aggregates = analyze_local(str(tmp_path), workers=2)
+
+    assert aggregates.files == 3
+    assert aggregates.records == 9
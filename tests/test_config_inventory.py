@@ -0,0 +1,100 @@
+import json
+
+from modules import config_inventory
+from modules.config_inventory import ConfigSnapshot, _pascal, _security_group, recorded_types
+
+ACCOUNT = "111111111111"
+
+
+def recorder(stub, group):
+    stub.add_response("describe_configuration_recorder_status", {"ConfigurationRecordersStatus": [
+        {"name": "default", "recording": True},
+    ]})
+    stub.add_response("describe_configuration_recorders", {"ConfigurationRecorders": [
+        {"name": "default", "recordingGroup": group},
+    ]})
+
+
+def row(resource_type, configuration, region="us-east-1"):
+    return json.dumps({"resourceId": "id", "resourceType": resource_type, "accountId": ACCOUNT,
+                       "awsRegion": region, "configuration": configuration})
+
+
+def test_config_items_take_describe_call_shapes():
+    item = _pascal({"instanceId": "i-1", "tags": [{"key": "env"}], "variables": {"apiKey": "x"}})
+    assert item == {"InstanceId": "i-1", "Tags": [{"Key": "env"}], "Variables": {"apiKey": "x"}}
+
+    group = _security_group(_pascal({"ipPermissions": [
+        {"ipRanges": ["10.0.0.0/8"]},
+        {"ipRanges": ["0.0.0.0/0"], "ipv4Ranges": [{"cidrIp": "0.0.0.0/0", "description": "web"}]},
+    ]}))
+    assert [perm["IpRanges"] for perm in group["IpPermissions"]] == [
+        [{"CidrIp": "10.0.0.0/8"}], [{"CidrIp": "0.0.0.0/0", "Description": "web"}],
+    ]
+
+
+def test_recorded_types_follow_the_recording_strategy(stub_client):
+    config = stub_client("config")
+    recorder(config, {"allSupported": False, "resourceTypes": [],
+                      "exclusionByResourceTypes": {"resourceTypes": ["AWS::EC2::Volume"]},
+                      "recordingStrategy": {"useOnly": "EXCLUSION_BY_RESOURCE_TYPES"}})
+    recorder(config, {"allSupported": False, "resourceTypes": ["AWS::EC2::VPC", "AWS::S3::Bucket"],
+                      "recordingStrategy": {"useOnly": "INCLUSION_BY_RESOURCE_TYPES"}})
+    config.add_response("describe_configuration_recorder_status", {"ConfigurationRecordersStatus": [
+        {"name": "default", "recording": False},
+    ]})
+
+    assert recorded_types() == set(config_inventory.RESOURCE_TYPES) - {"AWS::EC2::Volume"}
+    assert recorded_types() == {"AWS::EC2::VPC"}
+    assert recorded_types() == set()
+
+
+def test_lambda_vpcs_come_from_recorded_subnets(stub_client):
+    config = stub_client("config")
+    recorder(config, {"allSupported": True})
+    config.add_response("select_resource_config", {"Results": [
+        row("AWS::EC2::Instance", {"instanceId": "i-1"}),
+        row("AWS::EC2::Subnet", {"subnetId": "subnet-a", "vpcId": "vpc-1"}),
+        row("AWS::Lambda::Function", {"functionName": "in-vpc", "vpcConfig": {"subnetIds": ["subnet-a"]}}),
+        row("AWS::Lambda::Function", {"functionName": "plain"}),
+        row("AWS::Lambda::Function", {"functionName": "elsewhere", "vpcConfig": {"subnetIds": ["subnet-b"]}}, "eu-west-1"),
+    ]})
+
+    snapshot = ConfigSnapshot().load()
+
+    functions = snapshot.dataset("AWS::Lambda::Function", ACCOUNT, "us-east-1")
+    assert [fn.get("VpcConfig", {}).get("VpcId") for fn in functions] == ["vpc-1", None]
+    # A subnet outside the snapshot leaves the VPC unknown, so the Lambda API is used there
+    assert snapshot.dataset("AWS::Lambda::Function", ACCOUNT, "eu-west-1") is None
+    assert snapshot.dataset("AWS::EC2::Instance", ACCOUNT, "us-east-1") == (
+        {"OwnerId": ACCOUNT, "Instances": [{"InstanceId": "i-1"}]},
+    )
+    assert snapshot.dataset("AWS::EC2::Volume", ACCOUNT, "us-east-1") == ()
+
+
+def test_aggregators_only_serve_types_with_results(stub_client):
+    config = stub_client("config")
+    config.add_response("select_aggregate_resource_config", {"Results": [
+        row("AWS::EC2::VPC", {"vpcId": "vpc-1"}),
+    ], "NextToken": "next"})
+    config.add_response("select_aggregate_resource_config", {"Results": []})
+
+    snapshot = ConfigSnapshot("org").load()
+
+    assert snapshot.dataset("AWS::EC2::VPC", ACCOUNT, "us-east-1") == ({"VpcId": "vpc-1"},)
+    assert snapshot.dataset("AWS::EC2::Volume", ACCOUNT, "us-east-1") is None
+
+
+def test_aggregators_fall_back_for_sources_without_results(stub_client):
+    config = stub_client("config")
+    config.add_response("select_aggregate_resource_config", {"Results": [
+        row("AWS::EC2::Instance", {"instanceId": "i-1"}, "eu-west-1"),
+    ]})
+
+    snapshot = ConfigSnapshot("org").load()
+
+    assert snapshot.dataset("AWS::EC2::Instance", ACCOUNT, "eu-west-1") == (
+        {"OwnerId": ACCOUNT, "Instances": [{"InstanceId": "i-1"}]},
+    )
+    assert snapshot.dataset("AWS::EC2::Instance", ACCOUNT, "us-east-1") is None
+    assert snapshot.dataset("AWS::EC2::Instance", "222222222222", "eu-west-1") is None
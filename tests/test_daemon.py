@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from modules.daemon import ResultStore, Scheduler, _handler, checker_key
+
+
+def failing():
+    raise RuntimeError("boom")
+
+
+CHECKERS = [
+    ("API Gateway", lambda: print("   [WARN] Stage has no logging")),
+    ("EC2", lambda: print("[ERROR] Failed to run EC2 diagnostics: denied")),
+    ("S3", failing),
+]
+
+
+def test_checker_keys_are_url_and_environment_safe():
+    assert checker_key("API Gateway") == "api_gateway"
+    assert checker_key("Cross-service findings") == "cross_service_findings"
+
+
+def test_intervals_default_and_per_checker_override(monkeypatch):
+    monkeypatch.setenv("DAEMON_INTERVAL", "600")
+    monkeypatch.setenv("DAEMON_INTERVAL_API_GATEWAY", "60")
+    scheduler = Scheduler(CHECKERS, ResultStore([name for name, _ in CHECKERS]))
+
+    assert scheduler.intervals == {"API Gateway": 60, "EC2": 600, "S3": 600}
+
+
+def test_run_one_records_status_warnings_and_output(capsys):
+    store = ResultStore([name for name, _ in CHECKERS])
+    scheduler = Scheduler(CHECKERS, store)
+    for name, check in CHECKERS:
+        scheduler.run_one(name, check)
+
+    results = store.snapshot()
+    assert results["api_gateway"]["status"] == "ok"
+    assert results["api_gateway"]["warnings"] == ["[WARN] Stage has no logging"]
+    assert results["ec2"]["status"] == "error"
+    assert results["s3"]["status"] == "error"
+    assert "[ERROR] boom" in results["s3"]["output"]
+    assert results["s3"]["last_scan_age_seconds"] >= 0
+    assert "finished_ts" not in results["s3"]
+
+
+@pytest.fixture
+def server():
+    store = ResultStore(["API Gateway"])
+    store.update("API Gateway", status="ok", finished_ts=time.time())
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _handler(store, time.time()))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url):
+    with urlopen(url, timeout=5) as response:
+        return json.load(response)
+
+
+def test_results_endpoints(server):
+    assert get(f"{server}/health")["status"] == "ok"
+    assert get(f"{server}/results")["checkers"]["api_gateway"]["status"] == "ok"
+    assert get(f"{server}/results/API%20Gateway")["name"] == "API Gateway"
+    with pytest.raises(HTTPError) as missing:
+        get(f"{server}/results/nope")
+    assert missing.value.code == 404
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+from modules.ebs_lineage import LineageIndex
+
+
+def snapshot(snapshot_id, volume_id, size, description="", day=1):
+    return {"SnapshotId": snapshot_id, "VolumeId": volume_id, "VolumeSize": size, "Description": description,
+            "StartTime": datetime(2026, 1, day, tzinfo=timezone.utc)}
+
+
+def lineage():
+    index = LineageIndex()
+    index.add_volume({"VolumeId": "vol-live"})
+    for s in (
+        snapshot("snap-live-1", "vol-live", 8, day=1),
+        snapshot("snap-live-2", "vol-live", 8, day=5),
+        snapshot("snap-gone", "vol-deleted", 20),
+        snapshot("snap-ami-used", "vol-deleted", 30, "Created by CreateImage(i-0abc) for ami-0a1"),
+        snapshot("snap-ami-idle", "vol-ffffffff", 40),
+        snapshot("snap-ami-dereg", "vol-deleted", 50, "Created by CreateImage(i-0abc) for ami-0c3"),
+    ):
+        index.add_snapshot(s)
+    for image_id, snapshot_id in (("ami-0a1", "snap-ami-used"), ("ami-0b2", "snap-ami-idle")):
+        index.add_image({"ImageId": image_id, "BlockDeviceMappings": [{"Ebs": {"SnapshotId": snapshot_id}}]})
+    index.add_instance({"ImageId": "ami-0a1", "State": {"Name": "stopped"}})
+    index.add_instance({"ImageId": "ami-0b2", "State": {"Name": "terminated"}})
+    return index
+
+
+def test_snapshots_are_grouped_by_what_keeps_them_alive():
+    result = lineage().analyze()
+
+    assert result["unused_amis"] == {"ami-0b2": {"snap-ami-idle"}}
+    assert result["deregistered_amis"] == {"ami-0c3": {"snap-ami-dereg"}}
+    # Snapshots backing a registered AMI are not reported as orphaned
+    assert result["deleted_volumes"] == {"vol-deleted": {"snap-gone"}}
+
+
+def test_latest_snapshot_per_volume_and_sizes():
+    index = lineage()
+
+    assert index.latest_snapshot["vol-live"].day == 5
+    assert "vol-ffffffff" not in index.latest_snapshot
+    assert index.gib({"snap-gone", "snap-ami-dereg", "snap-missing"}) == 70
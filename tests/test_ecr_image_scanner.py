@@ -0,0 +1,64 @@
+import pytest
+
+from modules import ecr_image_scanner
+from modules.ecr_image_scanner import ImageVulnerabilityIndex, parse_image
+
+REPO = "111111111111.dkr.ecr.us-east-1.amazonaws.com/app"
+DIGEST = "sha256:" + "a" * 64
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(ecr_image_scanner, "_findings_cache", {})
+
+
+def test_image_references_are_parsed():
+    assert parse_image(REPO)["tag"] == "latest"
+    assert parse_image(f"{REPO}:v1@{DIGEST}")["digest"] == DIGEST
+    assert parse_image("nginx:1.25") is None
+    assert parse_image("public.ecr.aws/docker/library/nginx:latest") is None
+
+
+def test_tags_resolve_in_one_batch_and_each_digest_is_fetched_once(stub_client):
+    ecr = stub_client("ecr")
+    ecr.add_response("batch_get_image", {
+        "images": [
+            {"imageId": {"imageTag": "v1", "imageDigest": DIGEST}},
+            {"imageId": {"imageTag": "stable", "imageDigest": DIGEST}},
+        ],
+        "failures": [{"imageId": {"imageTag": "gone"}, "failureCode": "ImageNotFound", "failureReason": "Requested image not found"}],
+    }, {
+        "registryId": "111111111111", "repositoryName": "app",
+        "imageIds": [{"imageTag": "gone"}, {"imageTag": "stable"}, {"imageTag": "v1"}],
+        "acceptedMediaTypes": ecr_image_scanner.MANIFEST_MEDIA_TYPES,
+    })
+    ecr.add_response("describe_image_scan_findings", {
+        "imageScanStatus": {"status": "COMPLETE"},
+        "imageScanFindings": {"findingSeverityCounts": {"HIGH": 2, "LOW": 1}},
+    })
+
+    index = ImageVulnerabilityIndex(workers=1)
+    index.add(f"{REPO}:v1", "api")
+    index.add(f"{REPO}:stable", "api")
+    index.add(f"{REPO}:gone", "worker")
+    index.add("nginx:latest", "worker")
+    index.resolve()
+    ecr.assert_no_pending_responses()
+
+    assert index.stats() == (3, 1)
+    assert index.owner_counts("api") == {"HIGH": 2, "LOW": 1}
+    assert index.image_result(f"{REPO}:gone") is None
+    assert index.unresolved[f"{REPO}:gone"] == "Requested image not found"
+    assert index.other_images == {"nginx:latest"}
+
+
+def test_unscanned_images_and_cached_results(stub_client):
+    ecr = stub_client("ecr")
+    ecr.add_client_error("describe_image_scan_findings", "ScanNotFoundException")
+
+    for _ in range(2):
+        index = ImageVulnerabilityIndex(workers=1)
+        index.add(f"{REPO}@{DIGEST}", "api")
+        index.resolve()
+        assert index.image_result(f"{REPO}@{DIGEST}").status == "NOT_SCANNED"
+    ecr.assert_no_pending_responses()
@@ -0,0 +1,70 @@
+from modules.ecs_tasks import ClusterTasks, _collect, classify, owner
+
+CLUSTER = "arn:aws:ecs:us-east-1:111111111111:cluster/prod"
+
+
+def stopped(reason="", stop_code="EssentialContainerExited", **container):
+    return {
+        "desiredStatus": "STOPPED", "lastStatus": "STOPPED", "stopCode": stop_code, "stoppedReason": reason,
+        "containers": [dict({"name": "app"}, **container)],
+    }
+
+
+def test_failure_signatures_are_matched_in_order():
+    assert classify(stopped(reason="OutOfMemoryError: Container killed")) == "Out of memory"
+    assert classify(stopped(stop_code="TaskFailedToStart", reason="CannotPullContainerError: pull image manifest")) == "Image pull failure"
+    assert classify(stopped(reason="Task failed ELB health checks")) == "Health check failure"
+
+
+def test_routine_stops_are_not_failures_even_with_exit_code_137():
+    assert classify(stopped(reason="Scaling activity initiated by (deployment ecs-svc/123)", exitCode=137)) is None
+    assert classify(stopped(reason="Essential container in task exited", exitCode=137)) == "Out of memory (exit code 137)"
+    assert classify(stopped(reason="Essential container in task exited", exitCode=2)) == "Container exited with code 2"
+
+
+def test_unmatched_reasons_group_without_ids():
+    first = classify(stopped(reason="Timeout waiting for network interface eni-0abc12345678 after 120 seconds", exitCode=0))
+    second = classify(stopped(reason="Timeout waiting for network interface eni-0def98765432 after 300 seconds", exitCode=0))
+
+    assert first == second
+
+
+def test_tasks_are_counted_per_owning_service():
+    result = ClusterTasks(CLUSTER)
+    result.add({"group": "service:web", "desiredStatus": "RUNNING", "lastStatus": "RUNNING", "healthStatus": "UNHEALTHY"})
+    result.add({"group": "service:web", "desiredStatus": "RUNNING", "lastStatus": "PROVISIONING"})
+    result.add(dict(stopped(reason="OutOfMemoryError"), group="service:web"))
+    result.add(dict(stopped(reason="Task stopped by user", exitCode=0), group="family:batch"))
+
+    web = result.for_service("web")
+    assert owner({"group": "family:batch"}) is None
+    assert (web.running, web.unhealthy, web.pending, web.stopped) == (1, 1, 1, 1)
+    assert web.failures == {"Out of memory": 1}
+    assert result.standalone.stopped == 1 and not result.standalone.failures
+    assert result.for_service("missing").running == 0
+
+
+def test_each_list_page_is_described_in_one_call(stub_client):
+    ecs = stub_client("ecs")
+    running = [f"{CLUSTER}/task/{n}" for n in range(2)]
+    ecs.add_response("list_tasks", {"taskArns": running},
+                     {"cluster": CLUSTER, "desiredStatus": "RUNNING", "maxResults": 100})
+    ecs.add_response("describe_tasks", {"tasks": [
+        {"group": "service:web", "desiredStatus": "RUNNING", "lastStatus": "RUNNING"} for _ in running
+    ]}, {"cluster": CLUSTER, "tasks": running})
+    ecs.add_response("list_tasks", {"taskArns": []},
+                     {"cluster": CLUSTER, "desiredStatus": "STOPPED", "maxResults": 100})
+
+    result = _collect(CLUSTER)
+    ecs.assert_no_pending_responses()
+
+    assert result.error is None
+    assert result.calls == 3
+    assert result.for_service("web").running == 2
+
+
+def test_listing_errors_are_kept_on_the_result(stub_client):
+    ecs = stub_client("ecs")
+    ecs.add_client_error("list_tasks", "ClusterNotFoundException", "cluster not found")
+
+    assert "cluster not found" in _collect(CLUSTER).error
@@ -0,0 +1,83 @@
+import gzip
+import io
+
+from modules import flow_log_analyzer
+from modules.flow_log_analyzer import FlowAggregates, analyze_stream, parse_format
+
+FIELDS = parse_format(None)
+
+
+def line(src, dst, port, size, action="ACCEPT", status="OK"):
+    return f"2 123456789012 eni-1 {src} {dst} 40000 {port} 6 10 {size} 1700000000 1700000060 {action} {status}\n"
+
+
+def test_lines_with_the_wrong_field_count_are_skipped_individually():
+    # One short and one long line keep the total token count divisible by the width
+    lines = [
+        line("10.0.0.1", "8.8.8.8", 443, 100),
+        "2 123456789012 eni-1 10.0.0.1 8.8.8.8 40000 443 6 10 100 1700000000 1700000060 ACCEPT\n",
+        "2 123456789012 eni-1 10.0.0.1 8.8.8.8 40000 443 6 10 100 1700000000 1700000060 ACCEPT OK extra\n",
+        line("10.0.0.1", "8.8.8.8", 443, "not-a-number"),
+    ]
+    aggregates = FlowAggregates()
+    aggregates.add_batch(lines, FIELDS)
+
+    assert aggregates.records == 1
+    assert aggregates.skipped == 3
+    assert aggregates.total_bytes == 100
+
+
+def test_aggregates_talkers_rejections_and_private_egress():
+    aggregates = FlowAggregates(private_cidrs=["10.0.0.0/16"])
+    aggregates.add_batch([
+        line("10.0.0.1", "8.8.8.8", 443, 1000),
+        line("10.0.0.1", "10.0.5.5", 5432, 500),
+        line("10.0.0.2", "100.64.1.1", 443, 300),
+        line("203.0.113.9", "10.0.0.1", 22, 40, action="REJECT"),
+        line("-", "-", "-", "-", action="-", status="NODATA"),
+    ], FIELDS)
+
+    assert aggregates.records == 4
+    assert aggregates.talkers["10.0.0.1"] == 1500
+    assert aggregates.pairs[("10.0.0.1", "10.0.5.5")] == 500
+    assert aggregates.rejected_ports[22] == 1
+    assert aggregates.egress_bytes == 1000
+    assert dict(aggregates.egress_pairs) == {("10.0.0.1", "8.8.8.8"): 1000}
+
+
+def test_header_line_overrides_configured_format(monkeypatch):
+    monkeypatch.setattr(flow_log_analyzer, "BATCH_LINES", 2)
+    text = "version srcaddr dstaddr dstport bytes action\n" + "".join(
+        f"2 10.0.0.{n} 8.8.8.8 443 10 ACCEPT\n" for n in range(5)
+    )
+    aggregates = FlowAggregates(private_cidrs=["10.0.0.0/8"])
+
+    analyze_stream(aggregates, io.BytesIO(gzip.compress(text.encode())), "file.log.gz", FIELDS)
+
+    assert aggregates.files == 1
+    assert aggregates.records == 5
+    assert aggregates.egress_bytes == 50
+
+
+def test_pairs_beyond_the_limit_are_pruned_and_flagged(monkeypatch):
+    monkeypatch.setattr(flow_log_analyzer, "PAIR_LIMIT", 4)
+    aggregates = FlowAggregates()
+    aggregates.add_batch([line(f"10.0.0.{n}", "8.8.8.8", 443, n) for n in range(1, 7)], FIELDS)
+
+    assert aggregates.pairs_pruned
+    assert set(aggregates.pairs) == {("10.0.0.6", "8.8.8.8"), ("10.0.0.5", "8.8.8.8")}
+    assert aggregates.total_bytes == 21
+
+
+def test_irregular_whitespace_and_oversized_numbers():
+    aggregates = FlowAggregates()
+    aggregates.add_batch([
+        "\t" + line("10.0.0.1", "8.8.8.8", 443, 100).replace(" ", "  ").replace("\n", "\r\n"),
+        "\n",
+        line("10.0.0.1", "8.8.8.8", 443, "9" * 30),
+        line("10.0.0.2", "8.8.8.8", 53, 7).rstrip("\n"),
+    ], FIELDS)
+
+    assert aggregates.records == 2
+    assert aggregates.skipped == 1
+    assert dict(aggregates.talkers) == {"10.0.0.1": 100, "10.0.0.2": 7}
@@ -0,0 +1,151 @@
+from modules.iam_policy_engine import PermissionEngine, Principal, compile_policy
+
+ADMINISTRATOR_ACCESS = {
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}],
+}
+
+POWER_USER_ACCESS = {
+    "Version": "2012-10-17",
+    "Statement": [
+        {"Effect": "Allow", "NotAction": ["iam:*", "organizations:*", "account:*"], "Resource": "*"},
+        {"Effect": "Allow", "Action": ["iam:CreateServiceLinkedRole", "iam:ListRoles"], "Resource": "*"},
+    ],
+}
+
+DENY_IAM = {
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Deny", "Action": "iam:*", "Resource": "*"}],
+}
+
+
+def principal(name, *documents):
+    return Principal("role", name, f"arn:aws:iam::111111111111:role/{name}", [compile_policy(d) for d in documents])
+
+
+def engine(*principals):
+    result = PermissionEngine()
+    for p in principals:
+        result.add_principal(p)
+    return result
+
+
+def test_administrator_access_is_admin():
+    admin = principal("admin", ADMINISTRATOR_ACCESS)
+    assert engine(admin).is_admin(admin)
+
+
+def test_power_user_access_is_not_admin():
+    power = principal("power", POWER_USER_ACCESS)
+    permissions = engine(power)
+    assert not permissions.is_admin(power)
+    assert permissions.is_allowed(power, "ec2:RunInstances")
+    assert not permissions.is_allowed(power, "iam:CreateUser")
+    assert permissions.is_allowed(power, "iam:ListRoles")
+
+
+def test_allow_all_with_deny_is_admin_with_exceptions():
+    restricted = principal("restricted", ADMINISTRATOR_ACCESS, DENY_IAM)
+    permissions = engine(restricted)
+    assert permissions.is_admin(restricted)
+    assert permissions.admin_exceptions(restricted) == ["iam:*"]
+    assert not permissions.is_allowed(restricted, "iam:PassRole")
+    assert permissions.is_allowed(restricted, "s3:GetObject")
+
+
+def test_narrow_deny_does_not_hide_an_admin():
+    document = {"Statement": [{"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "arn:aws:s3:::audit-logs"}]}
+    p = principal("admin", ADMINISTRATOR_ACCESS, document)
+    permissions = engine(p)
+    assert [a.name for a in permissions.admins()] == ["admin"]
+    assert permissions.admin_exceptions(p) == ["s3:DeleteBucket"]
+    assert not permissions.is_allowed(p, "s3:DeleteBucket", "arn:aws:s3:::audit-logs")
+
+
+def test_deny_of_everything_is_not_admin():
+    deny_all = {"Statement": [{"Effect": "Deny", "Action": "*", "Resource": "*"}]}
+    p = principal("quarantined", ADMINISTRATOR_ACCESS, deny_all)
+    assert not engine(p).is_admin(p)
+
+
+def test_conditional_deny_does_not_win():
+    document = {"Statement": [{"Effect": "Deny", "Action": "s3:*", "Resource": "*",
+                               "Condition": {"Bool": {"aws:MultiFactorAuthPresent": "false"}}}]}
+    p = principal("mfa", ADMINISTRATOR_ACCESS, document)
+    assert engine(p).is_admin(p)
+
+
+def test_not_resource_is_not_admin():
+    document = {"Statement": [{"Effect": "Allow", "Action": "*", "NotResource": "arn:aws:s3:::secret/*"}]}
+    p = principal("narrowed", document)
+    assert not engine(p).is_admin(p)
+
+
+def test_wildcards_and_resources():
+    document = {"Statement": [{"Effect": "Allow", "Action": "s3:Get*", "Resource": "arn:aws:s3:::logs/*"}]}
+    p = principal("reader", document)
+    permissions = engine(p)
+    assert permissions.is_allowed(p, "s3:GetObject", "arn:aws:s3:::logs/2024/a.gz")
+    assert permissions.is_allowed(p, "S3:getobject", "arn:aws:s3:::logs/x")
+    assert not permissions.is_allowed(p, "s3:PutObject", "arn:aws:s3:::logs/x")
+    assert not permissions.is_allowed(p, "s3:GetObject", "arn:aws:s3:::other/x")
+
+
+def test_identical_documents_compile_once_and_share_decisions():
+    a = principal("a", ADMINISTRATOR_ACCESS)
+    b = principal("b", dict(ADMINISTRATOR_ACCESS))
+    assert a.policies[0] is b.policies[0]
+    assert [p.name for p in engine(a, b).who_can("iam:CreateUser")] == ["a", "b"]
+
+
+def test_url_encoded_documents_are_decoded():
+    encoded = "%7B%22Statement%22%3A%5B%7B%22Effect%22%3A%22Allow%22%2C%22Action%22%3A%22*%22%2C%22Resource%22%3A%22*%22%7D%5D%7D"
+    p = principal("encoded", encoded)
+    assert engine(p).is_admin(p)
+
+
+def test_admins_lists_principals_granted_everything():
+    admin = principal("admin", ADMINISTRATOR_ACCESS)
+    power = principal("power", POWER_USER_ACCESS)
+    restricted = principal("restricted", ADMINISTRATOR_ACCESS, DENY_IAM)
+    assert [p.name for p in engine(admin, power, restricted).admins()] == ["admin", "restricted"]
+
+
+def test_policy_allows_admin():
+    from modules.iam_checker import policy_allows_admin
+
+    assert policy_allows_admin(ADMINISTRATOR_ACCESS)
+    assert not policy_allows_admin(POWER_USER_ACCESS)
+    assert policy_allows_admin({"Statement": ADMINISTRATOR_ACCESS["Statement"] + DENY_IAM["Statement"]})
+
+
+def test_load_reads_everything_from_authorization_details():
+    from botocore.stub import Stubber
+    from modules import aws_session
+
+    iam = aws_session.get_session().client("iam", region_name="us-east-1")
+    admin_arn = "arn:aws:iam::aws:policy/AdministratorAccess"
+    with Stubber(iam) as stub:
+        stub.add_response("get_account_authorization_details", {
+            "UserDetailList": [{
+                "UserName": "alice", "Arn": "arn:aws:iam::111111111111:user/alice",
+                "UserPolicyList": [{"PolicyName": "inline", "PolicyDocument": '{"Statement": []}'}],
+                "GroupList": ["admins"], "AttachedManagedPolicies": [],
+            }],
+            "GroupDetailList": [{
+                "GroupName": "admins", "Arn": "arn:aws:iam::111111111111:group/admins",
+                "AttachedManagedPolicies": [{"PolicyName": "AdministratorAccess", "PolicyArn": admin_arn}],
+            }],
+            "RoleDetailList": [],
+            "Policies": [{
+                "PolicyName": "AdministratorAccess", "Arn": admin_arn,
+                "PolicyVersionList": [{"IsDefaultVersion": True, "Document": '{"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}'}],
+            }],
+            "IsTruncated": False,
+        })
+        permissions = PermissionEngine().load(iam)
+
+    alice = permissions.principals["arn:aws:iam::111111111111:user/alice"]
+    assert alice.inline_names == ["inline"]
+    assert alice.managed_names == []
+    assert permissions.is_admin(alice)
@@ -0,0 +1,80 @@
+import pytest
+
+from modules import aws_session, inventory
+from modules.inventory import InventoryStore
+
+ACCOUNT = "111111111111"
+ROLE = f"arn:aws:iam::{ACCOUNT}:role/admin"
+PROFILE = f"arn:aws:iam::{ACCOUNT}:instance-profile/admin"
+
+
+@pytest.fixture(autouse=True)
+def account(monkeypatch):
+    monkeypatch.setattr(aws_session, "account_id", lambda: ACCOUNT)
+    monkeypatch.setattr(aws_session, "region", lambda: "us-east-1")
+
+
+def instance(instance_id, **extra):
+    return {
+        "InstanceId": instance_id, "VpcId": "vpc-1", "SubnetId": "subnet-1", "State": {"Name": "running"},
+        "SecurityGroups": [{"GroupId": "sg-open"}], "IamInstanceProfile": {"Arn": PROFILE}, **extra,
+    }
+
+
+def test_instance_profiles_resolve_to_roles_for_the_admin_join():
+    roles = inventory.instance_profile_roles([
+        {"Arn": PROFILE, "Roles": [{"Arn": ROLE}]},
+        {"Arn": f"arn:aws:iam::{ACCOUNT}:instance-profile/empty", "Roles": []},
+    ])
+    store = InventoryStore(":memory:")
+    store.put(inventory.ec2_instance(instance("i-1"), role_arn=roles.get(PROFILE)))
+    store.put(inventory.make_record("iam:role", ROLE, "admin", region="", flags=[inventory.ADMIN]))
+
+    assert roles == {PROFILE: ROLE}
+    rows = store.workloads_with_admin_roles()
+    assert [(row["resource_type"], row["role_arn"]) for row in rows] == [("ec2:instance", ROLE)]
+    assert store.get(f"arn:aws:ec2:us-east-1:{ACCOUNT}:instance/i-1")["role_arn"] == ROLE
+
+
+def test_security_group_and_volume_joins():
+    store = InventoryStore(":memory:")
+    store.put(inventory.ec2_instance(instance("i-1")))
+    store.put(inventory.security_group({"GroupId": "sg-open", "OwnerId": ACCOUNT}, internet_open=True))
+    store.put(inventory.ebs_volume({
+        "VolumeId": "vol-1", "Encrypted": False, "Attachments": [{"InstanceId": "i-1"}],
+    }))
+
+    assert [row["group_id"] for row in store.resources_in_open_security_groups()] == ["sg-open"]
+    assert store.unencrypted_volumes_on_running_instances() == [
+        {"volume_id": "vol-1", "instance_id": "i-1", "instance_name": None}
+    ]
+    assert [row["resource_id"] for row in store.by_subnet("subnet-1")] == ["i-1"]
+
+
+def test_prune_keeps_other_accounts_and_fresh_records(monkeypatch):
+    store = InventoryStore(":memory:")
+    monkeypatch.setattr(inventory.time, "time", lambda: 100.0)
+    store.put(inventory.ec2_instance(instance("i-old")))
+    store.put(inventory.ec2_instance(instance("i-other"), owner_id="222222222222"))
+    store.flush()
+    monkeypatch.setattr(inventory.time, "time", lambda: 200.0)
+    store.put(inventory.ec2_instance(instance("i-new")))
+
+    assert store.prune("ec2:instance", 150.0) == 1
+    assert sorted(row["resource_id"] for row in store.by_type("ec2:instance")) == ["i-new", "i-other"]
+    assert store.by_security_group("sg-open") and not store.query(
+        "SELECT * FROM resource_security_groups WHERE arn LIKE '%i-old'")
+
+
+def test_shared_store_flushes_pending_records_at_exit(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(inventory.atexit, "register", registered.append)
+    monkeypatch.setattr(inventory, "_store", None)
+    monkeypatch.setenv("INVENTORY_DB", str(tmp_path / "inventory.db"))
+
+    inventory.record(inventory.ec2_instance(instance("i-1")))
+    assert registered == [inventory.store().close]
+    registered[0]()
+
+    reopened = InventoryStore(str(tmp_path / "inventory.db"))
+    assert [row["resource_id"] for row in reopened.by_type("ec2:instance")] == ["i-1"]
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from modules import kms_posture
+from modules.kms_posture import KeyPostureIndex, external_principals, parse_reference
+
+KEY_ID = "1234abcd-12ab-34cd-56ef-1234567890ab"
+KEY_ARN = f"arn:aws:kms:us-east-1:111111111111:key/{KEY_ID}"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(kms_posture, "_cache", {})
+
+
+def customer_key(stub, policy=None, rotation=True):
+    stub.add_response("describe_key", {"KeyMetadata": {
+        "KeyId": KEY_ID, "Arn": KEY_ARN, "AWSAccountId": "111111111111", "KeyManager": "CUSTOMER",
+        "KeyState": "Enabled", "KeySpec": "SYMMETRIC_DEFAULT", "Origin": "AWS_KMS",
+    }}, {"KeyId": KEY_ID})
+    stub.add_response("get_key_rotation_status", {"KeyRotationEnabled": rotation}, {"KeyId": KEY_ID})
+    if policy is None:
+        stub.add_client_error("get_key_policy", "AccessDeniedException", "not allowed")
+    else:
+        stub.add_response("get_key_policy", {"Policy": json.dumps(policy)}, {"KeyId": KEY_ID, "PolicyName": "default"})
+
+
+def messages(findings):
+    return [(f.severity, f.message) for f in findings]
+
+
+def test_references_and_external_principals_are_parsed(stub_client):
+    stub_client("kms")
+    assert parse_reference(KEY_ARN) == ("us-east-1", "key", KEY_ID)
+    assert parse_reference("arn:aws:kms:eu-west-1:111111111111:alias/app") == ("eu-west-1", "alias", "alias/app")
+    assert parse_reference("alias/app") == ("us-east-1", "alias", "alias/app")
+
+    policy = {"Statement": [
+        {"Effect": "Allow", "Principal": {"AWS": "arn:aws:iam::111111111111:root"}},
+        {"Effect": "Allow", "Principal": {"AWS": ["222222222222", "arn:aws:iam::333333333333:role/x"]}},
+        {"Effect": "Allow", "Principal": "*", "Condition": {"StringEquals": {}}},
+        {"Effect": "Deny", "Principal": {"AWS": "444444444444"}},
+    ]}
+    assert external_principals(policy, "111111111111") == ["* (with conditions)", "222222222222", "333333333333"]
+
+
+def test_aliases_resolve_to_one_inspection_per_key(stub_client):
+    kms = stub_client("kms")
+    kms.add_response("list_aliases", {"Aliases": [
+        {"AliasName": "alias/app", "TargetKeyId": KEY_ID}, {"AliasName": "alias/aws/s3"},
+    ]})
+    customer_key(kms, policy={"Statement": [{"Effect": "Allow", "Principal": {"AWS": "222222222222"}}]}, rotation=False)
+
+    index = KeyPostureIndex(workers=1)
+    for reference in ("alias/app", KEY_ID, "alias/missing", None):
+        index.add(reference)
+    index.resolve()
+    kms.assert_no_pending_responses()
+
+    assert index.stats() == (3, 1)
+    assert index.posture("alias/app") is index.posture(KEY_ID)
+    assert messages(index.findings("alias/app")) == [
+        ("WARN", f"KMS key {KEY_ARN}: automatic rotation is not enabled"),
+        ("WARN", f"KMS key {KEY_ARN}: key policy allows other accounts (222222222222)"),
+    ]
+    assert messages(index.findings("alias/missing")) == [("INFO", "KMS key alias/missing: could not be resolved (alias not found)")]
+
+    # A second index within the cache TTL makes no calls
+    cached = KeyPostureIndex(workers=1)
+    cached.add(KEY_ID)
+    assert cached.resolve().posture(KEY_ID) is index.posture(KEY_ID)
+
+
+def test_unreadable_key_policy_keeps_the_other_checks(stub_client):
+    kms = stub_client("kms")
+    customer_key(kms, rotation=False)
+
+    index = KeyPostureIndex(workers=1)
+    index.add(KEY_ID)
+    findings = index.resolve().findings(KEY_ID)
+
+    assert [severity for severity, _ in messages(findings)] == ["WARN", "INFO"]
+    assert "rotation is not enabled" in findings[0].message
+    assert "key policy could not be inspected" in findings[1].message
+    assert "AccessDeniedException" in findings[1].message
+    # Partial results are not cached, so the policy is retried next time
+    assert kms_posture._cache == {}
+
+
+def test_keys_that_cannot_be_described_are_reported(stub_client):
+    kms = stub_client("kms")
+    kms.add_client_error("describe_key", "NotFoundException", "no such key")
+
+    index = KeyPostureIndex(workers=1)
+    index.add(KEY_ID)
+
+    assert messages(index.resolve().findings(KEY_ID))[0][0] == "INFO"
+    assert "no such key" in index.findings(KEY_ID)[0].message
@@ -0,0 +1,67 @@
+import pytest
+
+from modules import checkpoint, inventory, lambda_checker, prefetch, rule_engine
+from modules.checkpoint import Checkpoint
+
+def function(name):
+    return {"FunctionName": name, "FunctionArn": f"arn:aws:lambda:us-east-1:111111111111:function:{name}",
+            "Runtime": "python3.12", "Timeout": 3, "MemorySize": 128, "LastModified": "2026-01-01",
+            "Role": "arn:aws:iam::111111111111:role/fn", "PackageType": "Zip"}
+
+
+FUNCTIONS = tuple(function(f"fn-{n}") for n in range(2))
+
+
+def test_functions_come_from_the_shared_listing(stub_client, monkeypatch, capsys):
+    monkeypatch.setattr(prefetch, "get", lambda name: {"lambda.functions": FUNCTIONS}[name])
+    recorded = []
+    monkeypatch.setattr(inventory, "record", recorded.append)
+    monkeypatch.setattr(inventory, "prune", lambda *args: 0)
+    lam = stub_client("lambda")
+    for fn in FUNCTIONS:
+        lam.add_response("get_function_concurrency", {"ReservedConcurrentExecutions": 5}, {"FunctionName": fn["FunctionName"]})
+        lam.add_response("list_event_source_mappings", {"EventSourceMappings": []}, {"FunctionName": fn["FunctionName"]})
+
+    # No list_functions response is queued, so a second listing would fail the run
+    lambda_checker.run_check()
+    lam.assert_no_pending_responses()
+
+    output = capsys.readouterr().out
+    assert "[ERROR]" not in output
+    assert "[Function] fn-1" in output
+    assert [r["resource_id"] for r in recorded] == ["fn-0", "fn-1"]
+
+
+def test_resume_runs_every_function_not_journaled_after_the_listing_changes(stub_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(checkpoint, "BATCH_ITEMS", 2)
+    monkeypatch.setattr(inventory, "record", lambda record: None)
+    monkeypatch.setattr(inventory, "prune", lambda *args: 0)
+    evaluated = []
+    interrupt = {"fn-d"}
+
+    def evaluate(resource_type, batch):
+        names = [fn["FunctionName"] for fn in batch]
+        if interrupt & set(names):
+            raise KeyboardInterrupt
+        evaluated.extend(names)
+        return [[] for _ in batch]
+    monkeypatch.setattr(rule_engine, "evaluate", evaluate)
+    lam = stub_client("lambda")
+    lam.client.get_function_concurrency = lambda FunctionName: {}
+    lam.client.list_event_source_mappings = lambda FunctionName: {}
+
+    def run(names, resume):
+        monkeypatch.setattr(prefetch, "get", lambda name: tuple(function(n) for n in names))
+        journal = Checkpoint(str(tmp_path / "checkpoint.jsonl"), resume=resume, region="us-east-1")
+        try:
+            journal.run("Lambda", lambda_checker.run_check)
+        finally:
+            journal.close()
+
+    with pytest.raises(KeyboardInterrupt):
+        run(["fn-a", "fn-b", "fn-c", "fn-d", "fn-e"], resume=False)
+    interrupt.clear()
+    # fn-0 is new and fn-b was deleted, so every later batch boundary moved
+    run(["fn-0", "fn-a", "fn-c", "fn-d", "fn-e"], resume=True)
+
+    assert evaluated == ["fn-a", "fn-b", "fn-0", "fn-c", "fn-d", "fn-e"]
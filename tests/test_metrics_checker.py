@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from botocore.stub import Stubber
+
+from modules import metrics_checker
+from modules.metrics_checker import MAX_QUERIES_PER_CALL, build_queries, diagnose, fetch_metrics, reduce_values
+
+END = datetime(2026, 1, 2, tzinfo=timezone.utc)
+START = END - timedelta(hours=24)
+
+
+def test_queries_map_back_to_resource_metric_and_statistic():
+    resources = [("ec2", "i-1", {}), ("lambda", "fn", {"timeout_ms": 3000})]
+    queries, lookup = build_queries(resources, 3600)
+
+    assert len(queries) == 2 + 4
+    assert lookup["m0"] == (0, "CPUUtilization", "Average")
+    assert lookup["m2"] == (1, "Invocations", "Sum")
+    assert queries[2]["MetricStat"]["Metric"]["Dimensions"] == [{"Name": "FunctionName", "Value": "fn"}]
+
+
+def test_queries_are_batched_and_paged_series_accumulated():
+    resources = [("ec2", f"i-{n}", {}) for n in range(300)]
+    queries, _ = build_queries(resources, 3600)
+    cw = boto3.client("cloudwatch", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+
+    with Stubber(cw) as stub:
+        stub.add_response("get_metric_data", {
+            "MetricDataResults": [{"Id": "m0", "Values": [1.0, 2.0]}], "NextToken": "more",
+        })
+        stub.add_response("get_metric_data", {"MetricDataResults": [{"Id": "m0", "Values": [3.0]}]})
+        stub.add_response("get_metric_data", {"MetricDataResults": [{"Id": "m599", "Values": [50.0]}]})
+        values, batches = fetch_metrics(cw, queries, START, END, workers=1)
+        stub.assert_no_pending_responses()
+
+    assert batches == -(-len(queries) // MAX_QUERIES_PER_CALL) == 2
+    assert values["m0"] == [1.0, 2.0, 3.0]
+    assert values["m599"] == [50.0]
+
+
+def test_reduce_and_diagnose():
+    assert reduce_values("Sum", [1, 2, 3]) == 6
+    assert reduce_values("Average", [1, 3]) == 2
+    assert reduce_values("Maximum", []) is None
+
+    assert diagnose("ec2", {("CPUUtilization", "Average"): 1.0}, {}) == [("IDLE", "average CPU 1.0%")]
+    lambda_stats = {("Invocations", "Sum"): 100, ("Errors", "Sum"): 10, ("Duration", "Maximum"): 2900}
+    labels = [label for label, _ in diagnose("lambda", lambda_stats, {"timeout_ms": 3000})]
+    assert labels == ["ERRORING", "SATURATED"]
+    rds_stats = {("FreeStorageSpace", "Minimum"): 1024 ** 3, ("DatabaseConnections", "Maximum"): 4}
+    assert diagnose("rds", rds_stats, {"allocated_bytes": 20 * 1024 ** 3})[0][0] == "SATURATED"
+
+
+def test_worker_count_comes_from_the_environment(monkeypatch):
+    pools = []
+
+    class Pool(metrics_checker.ThreadPoolExecutor):
+        def __init__(self, max_workers):
+            pools.append(max_workers)
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(metrics_checker, "ThreadPoolExecutor", Pool)
+    monkeypatch.setenv("METRICS_WORKERS", "3")
+    fetch_metrics(None, [], START, END)
+    monkeypatch.delenv("METRICS_WORKERS")
+    fetch_metrics(None, [], START, END)
+
+    assert pools == [3, metrics_checker.DEFAULT_WORKERS]
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from modules import prefetch
+
+
+@pytest.fixture
+def datasets(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def source(name, value):
+        def fetch():
+            with lock:
+                calls.append(name)
+            return value
+        return fetch
+
+    def failing():
+        raise RuntimeError("denied")
+
+    monkeypatch.setattr(prefetch, "DATASETS", {
+        "a": ((), source("a", 1)),
+        "b": ((), source("b", 2)),
+        "broken": ((), failing),
+        "sum": (("a", "b"), lambda a, b: a + b),
+        "double": (("sum",), lambda total: total * 2),
+        "needs_broken": (("a", "broken"), lambda a, broken: a),
+    })
+    return calls
+
+
+def test_dependencies_come_before_dependents(datasets):
+    assert prefetch.dependencies(["double"]) == ["a", "b", "sum", "double"]
+    with pytest.raises(KeyError):
+        prefetch.dependencies(["missing"])
+
+
+def test_shared_run_fetches_each_dataset_once(datasets):
+    with prefetch.shared(["double", "sum"]):
+        assert prefetch.get("double") == 6
+        assert prefetch.get("sum") == 3
+        assert prefetch.get("a") == 1
+
+    assert sorted(datasets) == ["a", "b"]
+
+
+def test_dependency_errors_reach_the_dependent(datasets):
+    with prefetch.shared(["needs_broken"]):
+        with pytest.raises(RuntimeError, match="denied"):
+            prefetch.get("needs_broken")
+        assert prefetch.get("a") == 1
+
+
+def test_get_outside_a_shared_run_builds_its_own_copy(datasets):
+    assert prefetch.get("sum") == 3
+    assert prefetch.get("sum") == 3
+
+    assert datasets.count("a") == 2
+
+
+def test_declared_datasets_of_checkers():
+    from modules import lambda_checker
+    from modules.registry import LazyCheck
+
+    assert prefetch.declared(lambda_checker.run_check) == ("lambda.functions",)
+    assert "iam.instance_profiles" in prefetch.declared(LazyCheck("ec2_checker"))
+    assert set(prefetch.dependencies(["sg.exposure", "vpc.topology", "ebs.lineage"])) <= set(prefetch.DATASETS)
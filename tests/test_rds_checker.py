@@ -0,0 +1,44 @@
+from modules.rds_checker import ParameterGroupCache, add_snapshot_sharing
+
+
+def test_parameter_groups_are_paged_once_and_checked_per_engine(stub_client):
+    rds = stub_client("rds")
+    rds.add_response("describe_db_parameters", {
+        "Parameters": [{"ParameterName": "rds.force_ssl", "ParameterValue": "0"}], "Marker": "next",
+    }, {"DBParameterGroupName": "shared"})
+    rds.add_response("describe_db_parameters", {
+        "Parameters": [{"ParameterName": "log_connections"}, {"ParameterName": "slow_query_log", "ParameterValue": "0"}],
+    }, {"DBParameterGroupName": "shared", "Marker": "next"})
+
+    cache = ParameterGroupCache(rds.client)
+    for _ in range(3):
+        postgres = cache.findings("shared", "postgres")
+    mysql = cache.findings("shared", "mysql")
+    rds.assert_no_pending_responses()
+
+    # log_connections is unset, so the engine default applies and nothing is reported
+    assert postgres == ["SSL connections are not enforced (rds.force_ssl), value: 0"]
+    assert mysql == ["Slow query log is disabled (slow_query_log), value: 0"]
+
+
+def test_unreadable_parameter_groups_are_reported_not_raised(stub_client, capsys):
+    rds = stub_client("rds")
+    rds.add_client_error("describe_db_cluster_parameters", "AccessDenied", "not allowed")
+
+    ParameterGroupCache(rds.client).print_findings("cluster-group", "aurora-mysql", cluster=True)
+
+    assert "Could not read parameter group cluster-group" in capsys.readouterr().out
+
+
+def test_snapshot_restore_attributes_mark_public_and_shared_snapshots(stub_client):
+    rds = stub_client("rds")
+    snapshots = [{"DBSnapshotIdentifier": "public"}, {"DBSnapshotIdentifier": "private"}]
+    rds.add_response("describe_db_snapshot_attributes", {"DBSnapshotAttributesResult": {"DBSnapshotAttributes": [
+        {"AttributeName": "restore", "AttributeValues": ["all"]},
+    ]}}, {"DBSnapshotIdentifier": "public"})
+    rds.add_response("describe_db_snapshot_attributes", {"DBSnapshotAttributesResult": {"DBSnapshotAttributes": []}},
+                     {"DBSnapshotIdentifier": "private"})
+
+    add_snapshot_sharing(snapshots, cluster=False, workers=1)
+
+    assert [s["SharedWith"] for s in snapshots] == [["all"], []]
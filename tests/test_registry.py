@@ -0,0 +1,54 @@
+import builtins
+import sys
+
+import pytest
+
+import modules
+from modules import prefetch, registry
+from modules.registry import LazyCheck
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    # A checker module on the modules package path that counts its own imports
+    (tmp_path / "fake_checker.py").write_text(
+        "import builtins\n"
+        "builtins.fake_checker_imports = getattr(builtins, 'fake_checker_imports', 0) + 1\n"
+        "DATASETS = ('ec2.vpcs',)\n"
+        "def run_check():\n"
+        "    return 'ran'\n"
+    )
+    monkeypatch.setattr(modules, "__path__", [*modules.__path__, str(tmp_path)])
+    monkeypatch.setattr(registry, "import_times", {})
+    monkeypatch.setattr(builtins, "fake_checker_imports", 0, raising=False)
+    yield builtins
+    sys.modules.pop("modules.fake_checker", None)
+
+
+def test_checkers_are_imported_on_first_use_only(checker):
+    check = LazyCheck("fake_checker")
+
+    assert repr(check) == "LazyCheck('modules.fake_checker')"
+    assert "modules.fake_checker" not in sys.modules
+    assert check() == "ran"
+    assert check() == "ran"
+    assert checker.fake_checker_imports == 1
+    assert list(registry.import_times) == ["modules.fake_checker"]
+
+
+def test_datasets_are_declared_through_the_lazy_check(checker):
+    assert prefetch.declared(LazyCheck("fake_checker")) == ("ec2.vpcs",)
+    assert checker.fake_checker_imports == 1
+
+
+def test_already_imported_modules_are_not_timed(monkeypatch, capsys):
+    monkeypatch.setattr(registry, "import_times", {})
+
+    assert registry.load("modules.registry") is registry
+    assert registry.import_times == {}
+
+    registry.import_times["modules.slow"] = 0.25
+    registry.print_import_report(0.01)
+    out = capsys.readouterr().out
+    assert "Startup (menu ready): 10.0 ms" in out
+    assert "250.0 ms  modules.slow" in out
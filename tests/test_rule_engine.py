@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from modules.rule_engine import _MISSING, DEFAULT_RULES_DIR, Finding, Rule, RuleSet, field_getter, load_rules
+
+
+def rule(rule_id, *conditions, message="flagged", severity="WARN"):
+    return Rule({
+        "id": rule_id, "resource": "rds:db", "severity": severity,
+        "when": [dict(zip(("field", "op", "value"), c)) for c in conditions], "message": message,
+    }, "test.json")
+
+
+def test_field_paths_reach_into_lists_and_report_missing_values():
+    record = {"DBSubnetGroup": {"Subnets": [{"SubnetIdentifier": "subnet-1"}]}}
+
+    assert field_getter("DBSubnetGroup.Subnets.0.SubnetIdentifier")(record) == "subnet-1"
+    assert field_getter("DBSubnetGroup.Subnets.3.SubnetIdentifier")(record) is _MISSING
+    assert field_getter("DBSubnetGroup.VpcId")({"DBSubnetGroup": None}) is _MISSING
+
+
+def test_conditions_are_combined_and_missing_values_never_meet_thresholds():
+    rules = RuleSet([
+        rule("small-backups", ("BackupRetentionPeriod", "lt", 7), ("Engine", "in", ["postgres", "mysql"]),
+             message="Backups kept {BackupRetentionPeriod} day(s) for {DBInstanceIdentifier}"),
+        rule("no-encryption", ("StorageEncrypted", "falsy"), severity="ERROR", message="Storage is not encrypted"),
+    ])
+    records = [
+        {"DBInstanceIdentifier": "a", "Engine": "postgres", "BackupRetentionPeriod": 1, "StorageEncrypted": True},
+        {"DBInstanceIdentifier": "b", "Engine": "oracle-ee", "BackupRetentionPeriod": 0},
+        {"DBInstanceIdentifier": "c", "Engine": "mysql"},
+    ]
+
+    findings = rules.evaluate("rds:db", records)
+
+    assert findings[0] == [Finding("small-backups", "WARN", "Backups kept 1 day(s) for a")]
+    assert findings[1] == [Finding("no-encryption", "ERROR", "Storage is not encrypted")]
+    assert findings[2] == [Finding("no-encryption", "ERROR", "Storage is not encrypted")]
+    assert rules.evaluate("lambda:function", records) == [[], [], []]
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError, match="severity"):
+        rule("x", severity="CRITICAL")
+    with pytest.raises(ValueError, match="condition"):
+        rule("x", ("Engine", "like", "post%"))
+    with pytest.raises(ValueError, match="message"):
+        Rule({"id": "x", "resource": "rds:db"}, "test.json")
+
+
+def test_rule_files_load_with_disabled_ids_and_reject_duplicates(tmp_path):
+    spec = {"id": "dup", "resource": "rds:db", "message": "m", "when": [{"field": "Engine", "op": "exists"}]}
+    (tmp_path / "a.json").write_text(json.dumps({"rules": [spec]}))
+
+    assert load_rules(str(tmp_path), disabled={"dup"}).evaluate("rds:db", [{"Engine": "x"}]) == [[]]
+    assert load_rules(str(tmp_path), disabled=set()).evaluate("rds:db", [{"Engine": "x"}])[0][0].rule_id == "dup"
+
+    (tmp_path / "b.json").write_text(json.dumps({"rules": [spec]}))
+    with pytest.raises(ValueError, match="duplicate"):
+        load_rules(str(tmp_path), disabled=set())
+
+
+def test_shipped_rules_compile():
+    rules = load_rules(DEFAULT_RULES_DIR, disabled=set())
+
+    assert {"lambda:function", "rds:db"} <= set(rules.rules)
+    findings = rules.evaluate("lambda:function", [{"Runtime": "python3.7", "Timeout": 900}])
+    assert "Runtime python3.7 is deprecated" in [f.message for f in findings[0]]
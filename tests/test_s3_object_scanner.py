@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import s3_object_scanner
+from modules.s3_object_scanner import Shard, _plan_shards, _scan_shard, listing_cap, scan_bucket
+
+
+class FakeS3:
+    # list_objects_v2 over an in-memory key list, with S3's Prefix, Delimiter,
+    # StartAfter, MaxKeys and continuation semantics
+    def __init__(self, keys, paginator_page_size=1000):
+        self.keys = sorted(keys)
+        self.paginator_page_size = paginator_page_size
+        self.requests = []
+        self.returned = 0
+
+    def list_objects_v2(self, Bucket, Prefix="", Delimiter=None, StartAfter=None, MaxKeys=1000, ContinuationToken=None):
+        self.requests.append({"Prefix": Prefix, "Delimiter": Delimiter, "StartAfter": StartAfter, "MaxKeys": MaxKeys})
+        after = ContinuationToken or StartAfter
+        contents, prefixes, last = [], [], None
+        for key in self.keys:
+            if not key.startswith(Prefix) or (after is not None and key <= after):
+                continue
+            if len(contents) + len(prefixes) == MaxKeys:
+                self.returned += len(contents)
+                return {"Contents": contents, "CommonPrefixes": prefixes, "IsTruncated": True, "NextContinuationToken": last}
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                common = key[:key.index(Delimiter, len(Prefix)) + 1]
+                if not prefixes or prefixes[-1]["Prefix"] != common:
+                    prefixes.append({"Prefix": common})
+                # Resuming after a rolled-up prefix skips the rest of it, as S3 does
+                last = common + "\U0010ffff"
+            else:
+                contents.append({"Key": key, "Size": 1})
+                last = key
+        self.returned += len(contents)
+        return {"Contents": contents, "CommonPrefixes": prefixes, "IsTruncated": False}
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, **params):
+        token = None
+        while True:
+            page = self.list_objects_v2(MaxKeys=self.paginator_page_size, ContinuationToken=token, **params)
+            yield page
+            if not page["IsTruncated"]:
+                return
+            token = page["NextContinuationToken"]
+
+    def head_object(self, Bucket, Key):
+        return {"ServerSideEncryption": "AES256"}
+
+    def get_object_acl(self, Bucket, Key):
+        return {"Grants": []}
+
+
+NESTED = (
+    ["index.html"]
+    + [f"logs/2024/{month:02}/part-{n}" for month in range(1, 13) for n in range(3)]
+    + [f"logs/2025/{month:02}/part-{n}" for month in range(1, 4) for n in range(3)]
+    + ["logs/manifest.json", "logsbook.txt"]
+    + [f"images/{n}.png" for n in range(20)]
+)
+
+
+def test_plan_splits_nested_prefixes():
+    s3 = FakeS3(NESTED)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        shards = _plan_shards(s3, "bucket", pool)
+
+    prefixes = {shard.prefix for shard in shards if shard.delimiter is None}
+    assert "logs/2024/07/" in prefixes
+    assert "images/" in prefixes
+
+
+def test_scan_counts_every_key_once():
+    s3 = FakeS3(NESTED)
+    summary = scan_bucket(s3, "bucket", sample_rate=0, time_budget=60, workers=4)
+
+    assert summary.objects == len(NESTED)
+    assert summary.shards > 10
+    assert not summary.capped
+
+
+def test_flat_level_is_split_by_character_without_gaps(monkeypatch):
+    monkeypatch.setattr(s3_object_scanner, "PREFIX_DISCOVERY_PAGES", 1)
+    keys = [f"{c}{n:04}" for c in "07aZ_-" for n in range(30)] + ["", "été", "~x"]
+    s3 = FakeS3([k for k in keys if k], paginator_page_size=10)
+
+    summary = scan_bucket(s3, "bucket", sample_rate=0, time_budget=60, workers=4)
+
+    assert summary.objects == len(keys) - 1
+
+
+def test_range_shards_stop_at_their_end():
+    s3 = FakeS3([f"a{n:04}" for n in range(500)] + [" early"])
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stats = _scan_shard(s3, "bucket", Shard("", end="!"), 0, float("inf"), pool)
+
+    assert stats.objects == 1
+    assert s3.requests[0]["MaxKeys"] == s3_object_scanner.RANGE_PAGE_SIZE
+    assert s3.returned <= s3_object_scanner.RANGE_PAGE_SIZE
+
+
+def test_listing_is_capped_in_proportion_to_sample_rate():
+    assert listing_cap(0.01, 10_000_000) == 100_000
+    assert listing_cap(0.0001, 1_000_000) == s3_object_scanner.PAGE_SIZE
+    assert listing_cap(0.5, 0) is None
+
+    s3 = FakeS3([f"k{n:04}" for n in range(400)])
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stats = _scan_shard(s3, "bucket", Shard(""), 0, float("inf"), pool, cap=150)
+
+    assert stats.objects == 150
+    assert stats.capped == 1
+    assert s3.returned == 150
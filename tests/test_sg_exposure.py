@@ -0,0 +1,74 @@
+from modules.sg_exposure import ExposureIndex, IntervalIndex
+
+
+def group(group_id, *permissions, vpc_id="vpc-1"):
+    return {"GroupId": group_id, "GroupName": group_id, "VpcId": vpc_id, "IpPermissions": list(permissions)}
+
+
+def tcp(from_port, to_port, *cidrs, groups=()):
+    return {
+        "IpProtocol": "tcp", "FromPort": from_port, "ToPort": to_port,
+        "IpRanges": [{"CidrIp": c} for c in cidrs if ":" not in c],
+        "Ipv6Ranges": [{"CidrIpv6": c} for c in cidrs if ":" in c],
+        "UserIdGroupPairs": [{"GroupId": g} for g in groups],
+    }
+
+
+def index(*groups):
+    exposure = ExposureIndex()
+    for g in groups:
+        exposure.add_group(g)
+    return exposure.build()
+
+
+def test_interval_index_matches_overlapping_ranges():
+    intervals = IntervalIndex([(0, 65535, "all"), (22, 22, "ssh"), (20, 30, "range")])
+
+    assert intervals.lookup(22) == {"all", "ssh", "range"}
+    assert intervals.lookup(31) == {"all"}
+    assert intervals.lookup(-1) == frozenset()
+
+
+def test_only_broad_public_sources_count_as_internet():
+    exposure = index(
+        group("sg-web", tcp(443, 443, "0.0.0.0/0"), tcp(22, 22, "203.0.113.7/32")),
+        group("sg-v6", tcp(80, 80, "::/0")),
+        group("sg-private", tcp(0, 65535, "10.0.0.0/8", "100.64.0.0/10", "fc00::/7")),
+    )
+
+    assert exposure.groups_open_to_internet(443) == {"sg-web"}
+    assert exposure.groups_open_to_internet(22) == set()
+    assert exposure.groups_open_to_internet(80) == {"sg-v6"}
+    assert exposure.groups_open_to_internet(5432) == set()
+
+
+def test_all_protocol_rules_apply_to_every_port():
+    everything = {"IpProtocol": "-1", "IpRanges": [{"CidrIp": "0.0.0.0/0"}]}
+    exposure = index(group("sg-open", everything))
+
+    assert exposure.groups_open_to_internet(5432, "udp") == {"sg-open"}
+
+
+def test_address_lookup_and_lateral_reach():
+    exposure = index(
+        group("sg-lb", tcp(443, 443, "0.0.0.0/0")),
+        group("sg-app", tcp(8080, 8080, groups=["sg-lb"])),
+        group("sg-db", tcp(5432, 5432, "10.1.0.0/16", groups=["sg-app"])),
+    )
+
+    assert exposure.groups_open_to_address("10.1.2.3", 5432) == {"sg-db"}
+    assert exposure.lateral_reach({"sg-lb"}) == {"sg-app", "sg-db"}
+    assert exposure.lateral_reach({"sg-lb"}, port=8080) == {"sg-app"}
+
+
+def test_exposed_enis_are_deduplicated_across_groups():
+    exposure = index(group("sg-a", tcp(22, 22, "0.0.0.0/0")), group("sg-b", tcp(22, 22, "0.0.0.0/0")))
+    exposure.add_interface({
+        "NetworkInterfaceId": "eni-1", "SubnetId": "subnet-1",
+        "Association": {"PublicIp": "198.51.100.1"},
+        "Groups": [{"GroupId": "sg-a"}, {"GroupId": "sg-b"}],
+    })
+
+    enis = exposure.exposed_enis({"sg-a", "sg-b"})
+    assert [eni["id"] for eni in enis] == ["eni-1"]
+    assert enis[0]["public_ip"] == "198.51.100.1"
@@ -0,0 +1,52 @@
+from modules.tag_checker import evaluate, parse_policy, print_region, scan_region, service_of
+
+
+def resource(arn, **tags):
+    return {"ResourceARN": arn, "Tags": [{"Key": key, "Value": value} for key, value in tags.items()]}
+
+
+def test_policy_spec_lists_keys_and_allowed_values():
+    assert parse_policy(" owner , env=prod| staging ,cost-center=,") == {
+        "owner": None, "env": {"prod", "staging"}, "cost-center": None,
+    }
+    assert parse_policy("") == {}
+
+
+def test_services_are_named_with_their_resource_type():
+    assert service_of("arn:aws:ec2:us-east-1:111111111111:instance/i-0abc") == "ec2:instance"
+    assert service_of("arn:aws:lambda:us-east-1:111111111111:function:api") == "lambda:function"
+    assert service_of("arn:aws:logs:us-east-1:111111111111:log-group:/aws/x") == "logs:log-group"
+    assert service_of("arn:aws:s3:::my-bucket") == "s3"
+    assert service_of("not-an-arn") == "unknown"
+
+
+def test_missing_blank_and_disallowed_tags_are_reported():
+    policy = parse_policy("owner,env=prod|staging")
+    violations = evaluate([
+        resource("arn:ok", owner="team", env="prod"),
+        resource("arn:blank", owner="  ", env="staging"),
+        resource("arn:dev", owner="team", env="dev"),
+        {"ResourceARN": "arn:untagged"},
+    ], policy)
+
+    assert violations == {
+        "arn:blank": ["missing owner"],
+        "arn:dev": ["env=dev"],
+        "arn:untagged": ["missing owner", "missing env"],
+    }
+
+
+def test_region_scan_pages_and_groups_by_service(stub_client, capsys):
+    tagging = stub_client("resourcegroupstaggingapi")
+    instance = "arn:aws:ec2:us-east-1:111111111111:instance/i-0abc"
+    tagging.add_response("get_resources", {"ResourceTagMappingList": [resource(instance)], "PaginationToken": "next"},
+                         {"ResourcesPerPage": 100, "ResourceTypeFilters": ["ec2:instance", "s3"]})
+    tagging.add_response("get_resources", {"ResourceTagMappingList": [resource("arn:aws:s3:::logs", owner="ops")]},
+                         {"ResourcesPerPage": 100, "ResourceTypeFilters": ["ec2:instance", "s3"], "PaginationToken": "next"})
+
+    resources, violations = scan_region("us-east-1", parse_policy("owner"), ["ec2:instance", "s3"])
+    print_region("us-east-1", resources, violations)
+
+    assert len(resources) == 2
+    assert violations == {instance: ["missing owner"]}
+    assert "[WARN] ec2:instance: 1/1 non-compliant (missing owner: 1)" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+from modules.vpc_topology import ISOLATED, PRIVATE_NAT, PRIVATE_TRANSIT, PUBLIC, VpcTopology, classify_routes
+
+
+def route(destination, **target):
+    return {"DestinationCidrBlock": destination, "State": "active", **target}
+
+
+def test_default_route_target_decides_classification():
+    local = route("10.0.0.0/16", GatewayId="local")
+
+    assert classify_routes([local, route("0.0.0.0/0", GatewayId="igw-1")]) == PUBLIC
+    assert classify_routes([local, route("0.0.0.0/0", NatGatewayId="nat-1")]) == PRIVATE_NAT
+    assert classify_routes([local, route("0.0.0.0/0", TransitGatewayId="tgw-1")]) == PRIVATE_TRANSIT
+    assert classify_routes([local, {"DestinationIpv6CidrBlock": "::/0", "EgressOnlyInternetGatewayId": "eigw-1"}]) == PRIVATE_NAT
+    assert classify_routes([local, route("192.168.0.0/16", GatewayId="igw-1")]) == ISOLATED
+
+
+def test_blackhole_default_route_is_ignored():
+    routes = [route("0.0.0.0/0", GatewayId="igw-1") | {"State": "blackhole"}]
+
+    assert classify_routes(routes) == ISOLATED
+
+
+def topology():
+    result = VpcTopology()
+    for subnet_id in ("subnet-public", "subnet-private", "subnet-implicit"):
+        result.add_subnet({"SubnetId": subnet_id, "VpcId": "vpc-1"})
+    result.add_route_table({
+        "RouteTableId": "rtb-main", "VpcId": "vpc-1",
+        "Associations": [{"Main": True}],
+        "Routes": [route("0.0.0.0/0", NatGatewayId="nat-1")],
+    })
+    result.add_route_table({
+        "RouteTableId": "rtb-public", "VpcId": "vpc-1",
+        "Associations": [{"SubnetId": "subnet-public"}],
+        "Routes": [route("0.0.0.0/0", GatewayId="igw-1")],
+    })
+    result.add_route_table({
+        "RouteTableId": "rtb-isolated", "VpcId": "vpc-1",
+        "Associations": [{"SubnetId": "subnet-private"}],
+        "Routes": [route("10.0.0.0/16", GatewayId="local")],
+    })
+    return result
+
+
+def test_subnets_without_an_explicit_table_use_the_main_table():
+    vpc = topology()
+
+    assert vpc.classify("subnet-public") == PUBLIC
+    assert vpc.classify("subnet-private") == ISOLATED
+    assert vpc.classify("subnet-implicit") == PRIVATE_NAT
+    assert vpc.subnet("subnet-implicit").implicit
+    assert vpc.classify("subnet-unknown") is None
+
+
+def test_placement_reports_the_most_exposed_subnet():
+    vpc = topology()
+
+    assert vpc.placement(["subnet-private", "subnet-public"]) == PUBLIC
+    assert vpc.placement(["subnet-private", "subnet-implicit"]) == PRIVATE_NAT
+    assert vpc.placement(["subnet-unknown"]) is None